@@ -0,0 +1,187 @@
+import argparse
+import itertools
+import json
+import tempfile
+import time
+import tracemalloc
+import typing as t
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_corpus, iter_presets
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, process_file, reflow_source
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Fractional slowdown (or memory growth) relative to the baseline that's considered a regression
+DEFAULT_THRESHOLD = 0.25
+
+OPTION_NAMES = ("ignore_indented", "alternate_capital_handling", "reflow_block_comments")
+
+# "file" mode runs process_file end to end; "memory" mode runs reflow_source over preloaded source,
+# isolating the reflow itself from filesystem overhead
+MODES = ("file", "memory")
+
+
+@dataclass
+class BenchResult:  # noqa: D101
+    mode: str
+    corpus: str
+    options: str
+    n_files: int
+    n_lines: int
+    seconds: float
+    peak_mem_bytes: int
+
+    @property
+    def lines_per_sec(self) -> float:  # noqa: D102
+        return self.n_lines / self.seconds
+
+    @property
+    def files_per_sec(self) -> float:  # noqa: D102
+        return self.n_files / self.seconds
+
+    @property
+    def key(self) -> str:  # noqa: D102
+        return f"{self.mode}:{self.corpus}[{self.options}]"
+
+
+def _option_label(flags: tuple[bool, ...]) -> str:
+    return ",".join(f"{name}={int(flag)}" for name, flag in zip(OPTION_NAMES, flags, strict=True))
+
+
+def _restore(sources: dict[Path, str]) -> None:
+    for file, src in sources.items():
+        file.write_text(src)
+
+
+def _run_once(
+    mode: str, sources: dict[Path, str], line_length: int, flags: tuple[bool, ...]
+) -> None:
+    if mode == "file":
+        ignore_indented, alternate_capital_handling, reflow_block_comments = flags
+        for file in sources:
+            process_file(
+                file,
+                line_length,
+                ignore_indented=ignore_indented,
+                alternate_capital_handling=alternate_capital_handling,
+                reflow_block_comments=reflow_block_comments,
+            )
+    else:
+        options = ReflowOptions(line_length, *flags)
+        for src in sources.values():
+            reflow_source(src, options)
+
+
+def bench_corpus(
+    spec: CorpusSpec, work_dir: Path, mode: str, line_length: int, repeat: int
+) -> t.Iterator[BenchResult]:
+    """
+    Benchmark the reflow over the provided corpus for every combination of its boolean options.
+
+    In file mode, files are restored to their generated contents before every run so each run does
+    the same work; restoring the files is not included in the timings. Reported wall time is the
+    best of `repeat` runs; peak memory is measured separately with `tracemalloc`, since tracing
+    skews the timings.
+    """
+    files = generate_corpus(spec, work_dir / spec.name)
+    sources = {file: file.read_text() for file in files}
+    n_lines = sum(src.count("\n") for src in sources.values())
+
+    for flags in itertools.product((True, False), repeat=len(OPTION_NAMES)):
+        timings = []
+        for _ in range(repeat):
+            if mode == "file":
+                _restore(sources)
+            start = time.perf_counter()
+            _run_once(mode, sources, line_length, flags)
+            timings.append(time.perf_counter() - start)
+
+        if mode == "file":
+            _restore(sources)
+        tracemalloc.start()
+        _run_once(mode, sources, line_length, flags)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        yield BenchResult(
+            mode=mode,
+            corpus=spec.name,
+            options=_option_label(flags),
+            n_files=len(files),
+            n_lines=n_lines,
+            seconds=min(timings),
+            peak_mem_bytes=peak,
+        )
+
+
+def find_regressions(
+    results: t.Iterable[BenchResult], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Compare results against the baseline, returning a description of each regression found."""
+    regressions = []
+    for res in results:
+        base = baseline.get(res.key)
+        if base is None:
+            continue
+
+        base_lps = base["n_lines"] / base["seconds"]
+        if res.lines_per_sec < base_lps * (1 - threshold):
+            regressions.append(
+                f"{res.key}: {res.lines_per_sec:,.0f} lines/s vs. baseline {base_lps:,.0f} lines/s"
+            )
+
+        if res.peak_mem_bytes > base["peak_mem_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{res.key}: {res.peak_mem_bytes:,} bytes peak vs. "
+                f"baseline {base['peak_mem_bytes']:,} bytes"
+            )
+
+    return regressions
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:  # noqa: D103
+    parser = argparse.ArgumentParser(description="Benchmark matlab-reflow-comments")
+    parser.add_argument("--corpus", action="append", choices=sorted(PRESETS), default=None)
+    parser.add_argument("--mode", action="append", choices=MODES, default=None)
+    parser.add_argument("--line-length", type=int, default=78)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, spec in itertools.product(args.mode or MODES, iter_presets(args.corpus)):
+            for res in bench_corpus(spec, Path(tmp_dir), mode, args.line_length, args.repeat):
+                print(
+                    f"{res.key:<90} {res.lines_per_sec:>12,.0f} lines/s "
+                    f"{res.files_per_sec:>10,.1f} files/s {res.peak_mem_bytes / 2**20:>8.2f} MiB"
+                )
+                results.append(res)
+
+    if args.save_baseline:
+        # Merge into any existing baseline so modes & corpora can be recorded separately
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline.update({res.key: asdict(res) for res in results})
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline found at {args.baseline}, skipping regression check")
+        return 0
+
+    regressions = find_regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
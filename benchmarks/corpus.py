@@ -0,0 +1,159 @@
+import random
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = (
+    "the", "data", "is", "used", "to", "compute", "pressure", "altitude", "sensor", "value", "of",
+    "and", "a", "returns", "matrix", "input", "output", "for", "each", "sample", "in", "window",
+    "ground", "level", "average", "this", "function", "plots", "raw", "user", "region", "object's",
+    "property", "filtered", "timestamp", "vector", "must", "be", "with", "an", "optional",
+    "threshold", "see", "also", "interpolated", "calibration", "coefficients", "100%", "e.g.",
+)  # fmt: skip
+
+CODE_TEMPLATES = (
+    "{var} = {func}({arg}, {num});",
+    "{var} = {arg}(:, {num}) .* {num};",
+    "{var}({num}) = [];",
+    "plot({arg}, {var}, 'LineWidth', {num});",
+    "{var} = mean({arg}(idx{num}:end));",
+    "if {var} > {num}",
+    "for ii = 1:{num}",
+)
+
+IDENTIFIERS = ("dataObj", "pressure", "alt", "ts", "rawData", "h", "idx", "coeffs", "window")
+FUNCTIONS = ("interp1", "filtfilt", "cumtrapz", "smooth", "diff", "abs", "round")
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    Shape of a synthetic MATLAB corpus.
+
+    `comment_density` is the probability that a new source chunk is a comment run rather than code,
+    and `block_density` is the fraction of comment runs that are written as block comments.
+    """
+
+    name: str
+    n_files: int
+    lines_per_file: int
+    comment_density: float = 0.3
+    block_density: float = 0.1
+    max_indent: int = 3
+    max_comment_words: int = 60
+
+
+PRESETS = {
+    "many-small": CorpusSpec("many-small", n_files=400, lines_per_file=60),
+    "few-large": CorpusSpec("few-large", n_files=4, lines_per_file=20_000),
+    "comment-heavy": CorpusSpec(
+        "comment-heavy", n_files=50, lines_per_file=800, comment_density=0.7, block_density=0.2
+    ),
+    "code-heavy": CorpusSpec(
+        "code-heavy", n_files=50, lines_per_file=800, comment_density=0.05, block_density=0.0
+    ),
+}
+
+
+def _prose(rng: random.Random, max_words: int, capitalize: bool = True) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(3, max_words))]
+    if capitalize:
+        words[0] = words[0].capitalize()
+
+    return " ".join(words)
+
+
+def _comment_run(rng: random.Random, indent: str, spec: CorpusSpec) -> list[str]:
+    """Generate a comment run, hard wrapped at a random width as a human might have left it."""
+    wrap_at = rng.randint(40, 120)
+    lines = []
+    for paragraph in range(rng.randint(1, 3)):
+        if paragraph:
+            lines.append(f"{indent}%")
+
+        cur = f"{indent}%"
+        for word in _prose(rng, spec.max_comment_words).split():
+            if len(cur) + len(word) + 1 > wrap_at and cur.strip() != "%":
+                lines.append(cur)
+                cur = f"{indent}%"
+            cur = f"{cur} {word}"
+        lines.append(cur)
+
+        if rng.random() < 0.2:
+            # Inner indented example, e.g. a usage snippet in help text
+            lines.append(f"{indent}%")
+            lines.append(f"{indent}%     {rng.choice(IDENTIFIERS)} = {rng.choice(FUNCTIONS)}(x);")
+
+    return lines
+
+
+def _block_comment(rng: random.Random, indent: str, spec: CorpusSpec) -> list[str]:
+    body = _prose(rng, spec.max_comment_words).split()
+    lines = [f"{indent}%{{"]
+    while body:
+        n_words = rng.randint(4, 14)
+        lines.append(f"{indent}{' '.join(body[:n_words])}")
+        body = body[n_words:]
+    lines.append(f"{indent}%}}")
+
+    return lines
+
+
+def _code_line(rng: random.Random, indent: str) -> str:
+    template = rng.choice(CODE_TEMPLATES)
+    line = template.format(
+        var=rng.choice(IDENTIFIERS),
+        func=rng.choice(FUNCTIONS),
+        arg=rng.choice(IDENTIFIERS),
+        num=rng.randint(1, 500),
+    )
+
+    return f"{indent}{line}"
+
+
+def generate_source(rng: random.Random, spec: CorpusSpec) -> str:
+    """Generate a single synthetic MATLAB source file matching the provided corpus spec."""
+    lines = [f"function out = {rng.choice(FUNCTIONS)}_{rng.randint(0, 9999)}(dataObj)"]
+    while len(lines) < spec.lines_per_file:
+        indent = "    " * rng.randint(0, spec.max_indent)
+        if rng.random() < spec.comment_density:
+            if rng.random() < spec.block_density:
+                lines.extend(_block_comment(rng, indent, spec))
+            else:
+                lines.extend(_comment_run(rng, indent, spec))
+        else:
+            lines.extend(_code_line(rng, indent) for _ in range(rng.randint(1, 8)))
+
+            if rng.random() < 0.1:
+                lines.append("")
+    lines.append("end")
+
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(spec: CorpusSpec, out_dir: Path, seed: int = 0) -> list[Path]:
+    """
+    Write a synthetic MATLAB corpus matching the provided spec into the specified directory.
+
+    Corpora are fully determined by the spec & seed, so benchmark runs are comparable.
+    """
+    rng = random.Random(f"{spec.name}-{seed}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    files = []
+    for idx in range(spec.n_files):
+        file = out_dir / f"{spec.name}_{idx:05d}.m"
+        file.write_text(generate_source(rng, spec))
+        files.append(file)
+
+    return files
+
+
+def iter_presets(names: t.Optional[t.Iterable[str]] = None) -> t.Iterator[CorpusSpec]:
+    """Yield the named corpus presets, or all of them if no names are provided."""
+    if names is None:
+        yield from PRESETS.values()
+        return
+
+    for name in names:
+        yield PRESETS[name]
@@ -0,0 +1,95 @@
+import hashlib
+import mmap
+import os
+import typing as t
+from importlib import metadata
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+def _tool_version() -> str:
+    try:
+        return metadata.version("pre-commit-matlab")
+    except metadata.PackageNotFoundError:  # pragma: no cover
+        return "unknown"
+
+
+class ReflowCache:
+    """
+    On-disk record of file contents that are already formatted for a given set of reflow options.
+
+    Each entry is an empty marker file named by a hash of the file contents, the reflow options, and
+    the tool version, so upgrading the tool or changing options never reuses a stale result. Markers
+    are created & removed with single filesystem operations, so concurrent runs can safely share a
+    cache directory; the worst outcome of a race is a redundant reflow.
+
+    The cache is bounded to `max_entries` markers, evicting the least recently used entries first.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._salt = _tool_version().encode()
+
+    def _hasher(self, options: t.Sequence[t.Any]) -> "hashlib._Hash":
+        h = hashlib.sha256(self._salt)
+        h.update(repr(tuple(options)).encode())
+        h.update(b"\0")
+        return h
+
+    def key(self, contents: t.Union[bytes, mmap.mmap], options: t.Sequence[t.Any]) -> str:
+        """Build the cache key for the provided file contents & reflow options."""
+        h = self._hasher(options)
+        h.update(contents)
+        return h.hexdigest()
+
+    def file_key(self, file: Path, options: t.Sequence[t.Any]) -> str:
+        """
+        Build the cache key for the contents of the provided file & reflow options.
+
+        The file is hashed in chunks, so it is never fully loaded into memory.
+        """
+        with file.open("rb") as f:
+            return hashlib.file_digest(f, lambda: self._hasher(options)).hexdigest()
+
+    def is_clean(self, key: str) -> bool:
+        """
+        Check whether the provided key is recorded as already formatted.
+
+        Hits refresh the entry's modification time so it is treated as recently used for eviction.
+        """
+        try:
+            os.utime(self.cache_dir / key)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def mark_clean(self, key: str) -> None:
+        """Record the provided key as already formatted."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / key).touch()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is within its size bound."""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [entry for entry in it if entry.is_file()]
+        except FileNotFoundError:
+            return
+
+        n_excess = len(entries) - self.max_entries
+        if n_excess <= 0:
+            return
+
+        def _mtime(entry: os.DirEntry) -> float:
+            try:
+                return entry.stat().st_mtime
+            except FileNotFoundError:
+                # Already removed by a concurrent run, sort it first so it's skipped quickly
+                return float("-inf")
+
+        entries.sort(key=_mtime)
+        for entry in entries[:n_excess]:
+            Path(entry.path).unlink(missing_ok=True)
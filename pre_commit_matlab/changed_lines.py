@@ -0,0 +1,132 @@
+import re
+import subprocess
+import typing as t
+from pathlib import Path
+
+# 1-based, inclusive (start, end) line numbers
+LineRange: t.TypeAlias = tuple[int, int]
+
+# Paths containing spaces are followed by a tab, while git quotes any path containing a tab
+_DIFF_FILE_RE = re.compile(r"^\+\+\+ (?P<path>[^\t]*)")
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+# Characters escaped by name when git quotes a path, see `quote_c_style` in git's quote.c
+_C_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13}
+_OCTAL_DIGITS = frozenset("01234567")
+
+
+def _git(args: t.Sequence[str]) -> t.Optional[str]:
+    """Run the provided git command, returning its output or `None` if it can't be run."""
+    try:
+        proc = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            encoding="utf-8",
+            errors="surrogateescape",
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return proc.stdout
+
+
+def _unquote_path(path: str) -> str:
+    """
+    Undo git's C-style quoting of the provided diff path, if it's quoted.
+
+    Quoted paths escape special characters by name & any other bytes, e.g. of non-UTF-8 names, as
+    octal.
+    """
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    raw = bytearray()
+    idx = 1
+    end = len(path) - 1
+    while idx < end:
+        char = path[idx]
+        if char != "\\" or idx + 1 == end:
+            raw.extend(char.encode("utf-8", errors="surrogateescape"))
+            idx += 1
+        elif path[idx + 1] in _OCTAL_DIGITS:
+            raw.append(int(path[idx + 1 : idx + 4], 8))
+            idx += 4
+        else:
+            escaped = path[idx + 1]
+            raw.append(_C_ESCAPES.get(escaped, ord(escaped)))
+            idx += 2
+
+    return raw.decode("utf-8", errors="surrogateescape")
+
+
+def _parse_diff(diff: str, root: Path) -> dict[Path, list[LineRange]]:
+    """
+    Collect the line ranges of each file touched by the provided zero-context unified diff.
+
+    Diff paths are expected to be relative to the provided repository `root`.
+
+    Ranges are in terms of the post-image line numbers. Pure deletions are recorded as a range
+    spanning the lines on either side of the deletion, so a comment run that had a line removed is
+    still considered touched.
+    """
+    ranges: dict[Path, list[LineRange]] = {}
+    file_ranges: list[LineRange] = []
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            file_match = _DIFF_FILE_RE.match(line)
+            file_ranges = []
+            path = _unquote_path(file_match["path"]) if file_match else ""
+            if path.startswith("b/"):
+                ranges[(root / path[2:]).resolve()] = file_ranges
+        elif line.startswith("@@ "):
+            hunk_match = _HUNK_RE.match(line)
+            if hunk_match is None:  # pragma: no cover
+                continue
+
+            start = int(hunk_match["start"])
+            count = 1 if hunk_match["count"] is None else int(hunk_match["count"])
+            if count == 0:
+                file_ranges.append((max(start, 1), start + 1))
+            else:
+                file_ranges.append((start, start + count - 1))
+
+    return ranges
+
+
+def changed_line_ranges(files: t.Sequence[Path]) -> list[t.Optional[list[LineRange]]]:
+    """
+    Determine the line ranges of each of the provided files that differ from the git `HEAD`.
+
+    Changes are considered whether or not they're staged. Ranges are returned in the same order as
+    the input files. Files that aren't tracked by git have a range of `None`, indicating that the
+    entire file should be considered changed, as do all files if git can't be queried (e.g. outside
+    of a repository or before the first commit). Tracked files without changes have no ranges, while
+    changed files whose ranges can't be matched up with the diff are considered changed entirely.
+    """
+    paths = [str(file) for file in files]
+    diff_args = ["diff", "HEAD", "--no-color", "--no-ext-diff", "--no-renames"]
+    top_level = _git(["rev-parse", "--show-toplevel"])
+    tracked = _git(["ls-files", "--full-name", "-z", "--", *paths])
+    changed = _git([*diff_args, "--name-only", "-z", "--", *paths])
+    diff = _git(["-c", "core.quotePath=false", *diff_args, "--unified=0", "--", *paths])
+    if top_level is None or tracked is None or changed is None or diff is None:
+        return [None] * len(files)
+
+    # All of the git commands give us paths relative to the repository root
+    root = Path(top_level.strip())
+    tracked_files = {(root / path).resolve() for path in tracked.split("\0") if path}
+    changed_files = {(root / path).resolve() for path in changed.split("\0") if path}
+    diff_ranges = _parse_diff(diff, root)
+
+    file_ranges: list[t.Optional[list[LineRange]]] = []
+    for file in files:
+        resolved = file.resolve()
+        if resolved not in tracked_files:
+            file_ranges.append(None)
+        elif resolved in changed_files:
+            file_ranges.append(diff_ranges.get(resolved))
+        else:
+            file_ranges.append([])
+
+    return file_ranges
@@ -0,0 +1,144 @@
+import argparse
+import http.client
+import os
+import sys
+import typing as t
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from pre_commit_matlab.source_io import atomic_write
+
+# This module is imported on every invocation of the client, so it deliberately avoids importing the
+# reflow machinery unless it has to fall back to reflowing locally
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 45484
+
+# Filename used to request reading source from stdin & writing the reflowed source to stdout
+STDIN_PATH = Path("-")
+
+# Environment variable used to point the client at a daemon somewhere other than the default
+DAEMON_URL_ENV = "MATLAB_REFLOWD_URL"
+
+# Request header used to provide each of the `ReflowOptions` fields
+OPTION_HEADERS = {
+    "line_length": "X-Line-Length",
+    "ignore_indented": "X-Ignore-Indented",
+    "alternate_capital_handling": "X-Alternate-Capital-Handling",
+    "reflow_block_comments": "X-Reflow-Block-Comments",
+    "display_width": "X-Display-Width",
+}
+
+# Connecting to a daemon on the local machine should be near instant, so don't wait around long
+# before falling back to reflowing locally
+_CONNECT_TIMEOUT = 0.5
+
+
+class DaemonError(Exception):
+    """Raised when the reflow daemon rejects a request."""
+
+
+def _run_locally(argv: t.Sequence[str]) -> int:
+    from pre_commit_matlab import matlab_reflow_comments
+
+    return matlab_reflow_comments.main(argv)
+
+
+def _build_headers(args: argparse.Namespace) -> dict[str, str]:
+    headers = {}
+    for name, header in OPTION_HEADERS.items():
+        value = getattr(args, name)
+        if value is None:
+            continue
+
+        # Booleans are sent as integers so the daemon doesn't have to guess at their spelling
+        headers[header] = str(int(value))
+
+    return headers
+
+
+def reflow_remote(
+    conn: http.client.HTTPConnection, data: bytes, headers: t.Mapping[str, str]
+) -> t.Optional[bytes]:
+    """
+    Reflow the provided raw source using the daemon on the other end of the provided connection.
+
+    The source's encoding & newline style are preserved, as when reflowing locally. Returns the
+    reflowed source, or `None` if the source is already formatted. A `DaemonError` is raised if the
+    daemon rejects the request.
+    """
+    conn.request("POST", "/", body=data, headers=dict(headers))
+    response = conn.getresponse()
+    body = response.read()
+    if response.status == http.client.NO_CONTENT:
+        return None
+    if response.status != http.client.OK:
+        raise DaemonError(body.decode("utf-8", errors="replace") or response.reason)
+
+    return body
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:  # noqa: D103
+    if argv is None:
+        argv = sys.argv[1:]
+
+    client_parser = argparse.ArgumentParser(add_help=False)
+    default_url = os.environ.get(DAEMON_URL_ENV, f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    client_parser.add_argument("--daemon-url", default=default_url)
+    client_args, reflow_argv = client_parser.parse_known_args(argv)
+
+    # Options are only forwarded when provided so the daemon's defaults apply otherwise. Boolean
+    # options are parsed identically to the formatter's CLI so the two behave the same
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filenames", nargs="*", type=Path)
+    parser.add_argument("--line-length", type=int)
+    parser.add_argument("--ignore-indented", type=bool)
+    parser.add_argument("--alternate-capital-handling", type=bool)
+    parser.add_argument("--reflow-block-comments", type=bool)
+    parser.add_argument("--display-width", type=bool)
+    args, unsupported = parser.parse_known_args(reflow_argv)
+    reads_stdin = STDIN_PATH in args.filenames
+    walks_dirs = any(path.is_dir() for path in args.filenames)
+    if unsupported or walks_dirs or (reads_stdin and len(args.filenames) > 1):
+        # Anything beyond straight reflow of individual files is left to the full CLI
+        return _run_locally(reflow_argv)
+
+    url = urlsplit(client_args.daemon_url)
+    conn = http.client.HTTPConnection(
+        url.hostname or DEFAULT_HOST, url.port or DEFAULT_PORT, timeout=_CONNECT_TIMEOUT
+    )
+    try:
+        conn.connect()
+    except OSError:
+        return _run_locally(reflow_argv)
+
+    # Reflowing a large file can take a while, so only the connection attempt is time limited
+    conn.sock.settimeout(None)
+
+    headers = _build_headers(args)
+    try:
+        if reads_stdin:
+            src = sys.stdin.read()
+            reflowed = reflow_remote(conn, src.encode("utf-8"), headers)
+            sys.stdout.write(src if reflowed is None else reflowed.decode("utf-8"))
+            return 0
+
+        # Following pre-commit convention, a non-zero exit code signals that files were modified
+        ret = 0
+        for file in args.filenames:
+            try:
+                reflowed = reflow_remote(conn, file.read_bytes(), headers)
+                if reflowed is not None:
+                    atomic_write(file, reflowed)
+                    ret = 1
+            except (OSError, ValueError, DaemonError, http.client.HTTPException) as e:
+                print(f"{file}: {e}", file=sys.stderr)
+                ret = 1
+    finally:
+        conn.close()
+
+    return ret
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
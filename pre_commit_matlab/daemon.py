@@ -0,0 +1,131 @@
+import argparse
+import typing as t
+from dataclasses import fields
+from email.message import Message
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pre_commit_matlab.client import DEFAULT_HOST, DEFAULT_PORT, OPTION_HEADERS
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_bytes
+
+_TRUE_VALUES = frozenset(("1", "true", "yes"))
+_FALSE_VALUES = frozenset(("0", "false", "no"))
+
+
+def _parse_bool(value: str) -> bool:
+    normalized = value.strip().lower()
+    if normalized in _TRUE_VALUES:
+        return True
+    if normalized in _FALSE_VALUES:
+        return False
+
+    raise ValueError(f"Invalid boolean: '{value}'")
+
+
+def parse_options(headers: t.Union[t.Mapping[str, str], Message]) -> ReflowOptions:
+    """
+    Build reflow options from the provided request headers.
+
+    Each option is specified by its corresponding header in `OPTION_HEADERS`; any missing options
+    take their default value. A `ValueError` is raised if a header value can't be parsed.
+    """
+    kwargs: dict[str, t.Any] = {}
+    for field in fields(ReflowOptions):
+        header = OPTION_HEADERS[field.name]
+        value = headers.get(header)
+        if value is None:
+            continue
+
+        try:
+            kwargs[field.name] = int(value) if field.type is int else _parse_bool(value)
+        except ValueError as e:
+            raise ValueError(f"Invalid value for {header}: '{value}'") from e
+
+    return ReflowOptions(**kwargs)
+
+
+class ReflowRequestHandler(BaseHTTPRequestHandler):
+    """
+    Reflow the MATLAB source POSTed in the request body.
+
+    Source is reflowed as raw bytes, so its encoding & newline style are preserved, see
+    `reflow_bytes`, and options are provided via the headers in `OPTION_HEADERS`. Responds with the
+    reflowed source if it differs from the input, or `204 No Content` if the source is already
+    formatted.
+    """
+
+    # Keep connections alive so a client can reuse one connection for a batch of files
+    protocol_version = "HTTP/1.1"
+    server_version = "matlab-reflowd"
+
+    def do_POST(self) -> None:  # noqa: D102
+        try:
+            options = parse_options(self.headers)
+            content_length = int(self.headers.get("Content-Length", 0))
+            data = self.rfile.read(content_length)
+        except ValueError as e:
+            self._respond(HTTPStatus.BAD_REQUEST, str(e).encode())
+            return
+
+        reflowed = reflow_bytes(data, options)
+        if reflowed == data:
+            self._respond(HTTPStatus.NO_CONTENT)
+        else:
+            self._respond(HTTPStatus.OK, reflowed, content_type="application/octet-stream")
+
+    def _respond(
+        self,
+        status: HTTPStatus,
+        body: bytes = b"",
+        content_type: str = "text/plain; charset=utf-8",
+    ) -> None:
+        self.send_response(status)
+        if status is not HTTPStatus.NO_CONTENT:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: t.Any) -> None:  # noqa: D102
+        if t.cast(ReflowServer, self.server).verbose:
+            super().log_message(format, *args)
+
+
+class ReflowServer(ThreadingHTTPServer):
+    """
+    Reflow daemon HTTP server, bound to the provided host & port.
+
+    Requests are each handled in their own thread. Call `serve_forever` to begin serving.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verbose: bool = False
+    ) -> None:
+        super().__init__((host, port), ReflowRequestHandler)
+        self.verbose = verbose
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:  # noqa: D103
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bind-host", default=DEFAULT_HOST)
+    parser.add_argument("--bind-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    with ReflowServer(args.bind_host, args.bind_port, args.verbose) as server:
+        host, port = server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        print(f"matlab-reflowd listening on {host}:{port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
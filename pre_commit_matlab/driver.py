@@ -0,0 +1,164 @@
+import argparse
+import codecs
+import sys
+import typing as t
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from pathlib import Path
+
+from pre_commit_matlab.matlab_reflow_comments import (
+    DEFAULT_FALLBACK_ENCODING,
+    add_reflow_arguments,
+    options_from_args,
+    reflow_bytes,
+)
+from pre_commit_matlab.source_io import atomic_write, decode_source, decode_view, read_source
+
+# Entry point group that third-party packages register their `TransformPlugin`s under
+ENTRY_POINT_GROUP = "pre_commit_matlab.transforms"
+
+# A transform takes the full source of a file, with newlines normalized to "\n", & returns the
+# transformed source
+Transform = t.Callable[[str], str]
+
+
+def _no_arguments(parser: argparse._ActionsContainer) -> None:
+    return
+
+
+@dataclass(frozen=True)
+class TransformPlugin:
+    """
+    A named source transform that can be run by the driver.
+
+    `add_arguments` adds the transform's command line options to the provided argument group, and
+    `build` creates the transform from the parsed command line options.
+    """
+
+    name: str
+    build: t.Callable[[argparse.Namespace], Transform]
+    add_arguments: t.Callable[[argparse._ActionsContainer], None] = _no_arguments
+
+
+def _build_reflow(args: argparse.Namespace) -> Transform:
+    options = options_from_args(args)
+
+    def _reflow(src: str) -> str:
+        # Reflow the source as raw bytes, as matlab-reflow-comments does, so only newlines break
+        # lines; decoded text would also be split on e.g. form feeds & Unicode line separators
+        return reflow_bytes(src.encode("utf-8"), options).decode("utf-8")
+
+    return _reflow
+
+
+REFLOW_COMMENTS = TransformPlugin("reflow-comments", _build_reflow, add_reflow_arguments)
+
+_REGISTRY: dict[str, TransformPlugin] = {REFLOW_COMMENTS.name: REFLOW_COMMENTS}
+
+
+def register_transform(plugin: TransformPlugin) -> TransformPlugin:
+    """
+    Register the provided transform plugin with the driver, returning it.
+
+    Plugins may also be registered by third-party packages via the `ENTRY_POINT_GROUP` entry point
+    group, with each entry point referencing a `TransformPlugin`.
+    """
+    if plugin.name in _REGISTRY:
+        raise ValueError(f"A transform named '{plugin.name}' is already registered")
+
+    _REGISTRY[plugin.name] = plugin
+    return plugin
+
+
+def load_transforms() -> dict[str, TransformPlugin]:
+    """
+    Collect the available transform plugins, in the order they're run by default.
+
+    Built-in & directly registered plugins come first, followed by any entry point plugins in order
+    of their entry point names.
+    """
+    plugins = dict(_REGISTRY)
+    for entry_point in sorted(entry_points(group=ENTRY_POINT_GROUP), key=lambda ep: ep.name):
+        plugin = entry_point.load()
+        if not isinstance(plugin, TransformPlugin):
+            raise ValueError(
+                f"Entry point '{entry_point.name}' doesn't reference a TransformPlugin: {plugin!r}"
+            )
+        if plugin.name in plugins:
+            raise ValueError(f"A transform named '{plugin.name}' is already registered")
+
+        plugins[plugin.name] = plugin
+
+    return plugins
+
+
+def apply_transforms(
+    file: Path, transforms: t.Sequence[Transform], encoding: str = DEFAULT_FALLBACK_ENCODING
+) -> bool:
+    """
+    Run the provided transforms over the file in order, returning `True` if the file was modified.
+
+    The file is read & decoded once, and only written back, atomically, if the transformed source
+    differs from the original. Its encoding & newline style are preserved; the source is decoded as
+    UTF-8 if valid, otherwise using the fallback `encoding`.
+    """
+    with read_source(file) as data:
+        source = decode_source(data, encoding)
+        if source.codec is None:
+            src, codec = source.text, None
+        else:
+            src, codec = decode_view(source.text, source.codec)
+
+        transformed_src = src
+        for transform in transforms:
+            transformed_src = transform(transformed_src)
+
+        if transformed_src == src and not source.mixed_newlines:
+            return False
+
+        if codec is not None:
+            transformed_src = transformed_src.encode(codec).decode("latin-1")
+
+        transformed = source.encode(transformed_src)
+        with memoryview(data) as raw:
+            if raw == transformed:
+                return False
+
+    atomic_write(file, transformed)
+    return True
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:  # noqa: D103
+    plugins = load_transforms()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filenames", nargs="*", type=Path)
+    parser.add_argument("--transform", action="append", choices=list(plugins), dest="transforms")
+    parser.add_argument("--encoding", default=DEFAULT_FALLBACK_ENCODING)
+    for plugin in plugins.values():
+        plugin.add_arguments(parser.add_argument_group(plugin.name))
+    args = parser.parse_args(argv)
+
+    try:
+        codecs.lookup(args.encoding)
+    except LookupError:
+        parser.error(f"Unknown encoding: '{args.encoding}'")
+
+    # Every available transform is run unless a subset is requested
+    names = args.transforms or list(plugins)
+    transforms = [plugins[name].build(args) for name in dict.fromkeys(names)]
+
+    # Following pre-commit convention, a non-zero exit code signals that files were modified
+    ret = 0
+    for file in args.filenames:
+        try:
+            ret |= apply_transforms(file, transforms, args.encoding)
+        except (OSError, ValueError) as e:
+            print(f"{file}: {e}", file=sys.stderr)
+            ret = 1
+
+    return ret
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
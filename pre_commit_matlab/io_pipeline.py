@@ -0,0 +1,93 @@
+import itertools
+import typing as t
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+# Number of files each I/O thread may have in flight, read ahead or awaiting their write, at once
+WINDOW_PER_THREAD = 4
+
+T = t.TypeVar("T")
+D = t.TypeVar("D")
+R = t.TypeVar("R")
+
+# Rewrites the file for a processed item on an I/O thread, returning the item's final result
+Writer = t.Callable[[], R]
+
+
+class FileSystem(t.Protocol):
+    """
+    Whole-file access to the storage being processed.
+
+    Implementations must be safe to call from multiple threads at once, and `write_bytes` must only
+    replace the target once its new contents are complete.
+    """
+
+    def read_bytes(self, file: Path) -> bytes: ...  # noqa: D102
+
+    def write_bytes(self, file: Path, data: bytes) -> None: ...  # noqa: D102
+
+
+def pipelined(
+    items: t.Iterable[T],
+    read: t.Callable[[T], D],
+    process: t.Callable[[T, D], tuple[R, t.Optional[Writer[R]]]],
+    fail: t.Callable[[T, OSError], R],
+    n_threads: int,
+    window: t.Optional[int] = None,
+) -> t.Iterator[R]:
+    """
+    Process the provided items, overlapping their reads & writes with processing.
+
+    Items are read ahead by a pool of `n_threads` I/O threads, then processed in input order on the
+    calling thread. `process` returns the item's result along with an optional `Writer`, which is
+    run on an I/O thread & whose return value replaces the result once it completes. Results are
+    yielded in input order, each once its write, if any, has completed. If reading or writing an
+    item raises an `OSError`, its result is built by `fail` instead.
+
+    At most `window` items are in flight at once, counting both items read ahead & items awaiting
+    their write, bounding memory use no matter how far processing falls behind storage or vice
+    versa. By default, `WINDOW_PER_THREAD` items are allowed per I/O thread.
+    """
+    if window is None:
+        window = n_threads * WINDOW_PER_THREAD
+
+    items_iter = iter(items)
+    reads: deque[tuple[T, Future[D]]] = deque()
+    writes: deque[tuple[T, R, t.Optional[Future[R]]]] = deque()
+
+    def _finish(item: T, result: R, write: t.Optional[Future[R]]) -> R:
+        if write is None:
+            return result
+
+        try:
+            return write.result()
+        except OSError as e:
+            return fail(item, e)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        while True:
+            for item in itertools.islice(items_iter, window - len(reads) - len(writes)):
+                reads.append((item, executor.submit(read, item)))
+
+            if not reads:
+                if not writes:
+                    break
+
+                # Nothing is left to process until the oldest write completes, making room in the
+                # window for more reads
+                yield _finish(*writes.popleft())
+                continue
+
+            item, fetched = reads.popleft()
+            try:
+                data = fetched.result()
+            except OSError as e:
+                writes.append((item, fail(item, e), None))
+            else:
+                result, writer = process(item, data)
+                write = executor.submit(writer) if writer is not None else None
+                writes.append((item, result, write))
+
+            while writes and (writes[0][2] is None or writes[0][2].done()):
+                yield _finish(*writes.popleft())
@@ -1,62 +1,1263 @@
 import argparse
-import textwrap
+import bisect
+import codecs
+import contextlib
+import difflib
+import functools
+import hashlib
+import itertools
+import mmap
+import os
+import sys
+import time
 import typing as t
 from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import astuple, dataclass, field
+from enum import IntEnum
 from pathlib import Path
 
+from pre_commit_matlab.cache import DEFAULT_MAX_ENTRIES, ReflowCache
+from pre_commit_matlab.changed_lines import LineRange, changed_line_ranges
+from pre_commit_matlab.io_pipeline import FileSystem, pipelined
+from pre_commit_matlab.segments import (
+    BlockComment,
+    CodeLines,
+    CommentRun,
+    Segment,
+    VerbatimComment,
+)
+from pre_commit_matlab.shard import Shard, load_costs, shard_files
+from pre_commit_matlab.source_io import (
+    DecodedSource,
+    atomic_write,
+    decode_source,
+    decode_view,
+    read_source,
+    replace_from_temp,
+    sibling_temp_file,
+)
+from pre_commit_matlab.stats import FileStats, format_summary, write_report
+from pre_commit_matlab.walk import walk_matlab_files
+from pre_commit_matlab.watch import create_watcher, iter_changes
+from pre_commit_matlab.wrap import wrap, wrap_simple
 
-def _n_leading_spaces(line: str) -> int:
-    return len(line) - len(line.lstrip())
+# Below this many files the cost of spinning up worker processes outweighs any gains from spreading
+# the files across them, so we fall back to processing serially
+MIN_PARALLEL_FILES = 8
 
+# When walking directories the total number of files isn't known up front, so files are dispatched
+# to workers in fixed size chunks
+_WALK_CHUNKSIZE = 16
 
-def _dump_buffer(
-    f: t.TextIO, buffer: deque, line_length: int, indent_level: int, is_block: bool = False
-) -> deque:
+# Encoding used for comments that aren't valid UTF-8
+DEFAULT_FALLBACK_ENCODING = "latin-1"
+
+# Number of wrapped comment runs memoized per process, repeated boilerplate (e.g. license headers)
+# is then only wrapped once
+DEFAULT_WRAP_CACHE_SIZE = 4096
+
+# When a large file's comments are reflowed in parallel, each chunk of the file covers at least this
+# many lines, so the cost of shipping it to a worker stays small next to the cost of reflowing it
+MIN_SPLIT_CHUNK_LINES = 2_000
+
+# Number of chunks a large file is split into per worker, so workers given chunks that are quick to
+# reflow (e.g. mostly code) can pick up more
+_SPLIT_CHUNKS_PER_JOB = 4
+
+# ProcessPoolExecutor is limited to 61 workers on Windows
+_MAX_WINDOWS_WORKERS = 61
+
+# Filename used to request reading source from stdin & writing the reflowed source to stdout
+STDIN_PATH = Path("-")
+
+
+@dataclass(frozen=True)
+class ReflowOptions:
+    """
+    Options controlling how MATLAB comments are reflowed.
+
+    See `process_file` for a description of each option.
+    """
+
+    line_length: int = 78
+    ignore_indented: bool = True
+    alternate_capital_handling: bool = False
+    reflow_block_comments: bool = True
+    display_width: bool = False
+
+
+def _stabilize_lines(
+    lines: list[str], contents: str, initial: str, following: str, is_block: bool
+) -> list[str]:
+    """
+    Adjust wrapped comment run lines so they're parsed back as the same comment run.
+
+    A comment's first line keeps the whitespace following its `%`, which `wrap` drops if the first
+    word doesn't fit alongside it, since otherwise the line is no longer part of the run & may even
+    open or close a block comment. Continuation lines starting with whitespace that `wrap` doesn't
+    recognize would be parsed as inner indentation, and block comment lines starting with `%}` would
+    close the block, so these are joined onto the line before them, even if it then exceeds the line
+    length.
+    """
+    if not lines:
+        return lines
+
+    first_text = lines[0][len(initial) :]
+    if not is_block and contents[:1].isspace() and not first_text[:1].isspace():
+        lines[0] = f"{initial} {first_text}"
+
+    # `wrap` never starts a line with ASCII whitespace
+    if ("%}" not in contents) if is_block else contents.isascii():
+        return lines
+
+    n_following = len(following)
+    stable = lines[:1]
+    for line in lines[1:]:
+        text = line[n_following:]
+        if text.lstrip().startswith("%}") if is_block else text[:1].isspace():
+            stable[-1] = f"{stable[-1]} {text}"
+        else:
+            stable.append(line)
+
+    return stable
+
+
+def _parsed_contents(lines: t.Sequence[str], indent_level: int, is_block: bool) -> str:
+    """Build the run contents that the wrapped lines are parsed back into, see `_iter_segments`."""
+    if is_block:
+        return " ".join(line.lstrip() for line in lines)
+
+    return "".join(line[indent_level + 1 :].rstrip() for line in lines)
+
+
+def _wrap_paragraph(
+    contents: str, line_length: int, indent_level: int, is_block: bool, display_width: bool = False
+) -> tuple[str, ...]:
+    """
+    Wrap the provided comment run contents, see `_wrap_run` for details.
+
+    Whitespace dropped at a line break is parsed back as a single space, and a wrapped line may be
+    parsed back differently than it was wrapped, so the contents are rewrapped as they'd be parsed
+    until the wrapped lines are stable. This makes reflowing idempotent, rather than converging over
+    repeated passes.
+    """
+    if is_block:
+        initial = following = f"{' '*indent_level}"
+    else:
+        initial = f"{' '*indent_level}%"  # Don't include the initial leading space
+        following = f"{' '*indent_level}% "
+
+    if line_length <= len(following):
+        # No room for any text after the prefix, so rather than breaking words into pieces that can
+        # be parsed back differently, give each word its own line
+        lines = [f"{following}{word}" for word in contents.split()]
+        return tuple(_stabilize_lines(lines, contents, initial, following, is_block))
+
+    # Typical comments are simple enough to parse back exactly, unless a block comment's contents
+    # start with whitespace, which a block comment line is stripped of
+    if not (is_block and contents.startswith(" ")):
+        simple_lines = wrap_simple(contents, line_length, initial, following)
+        if simple_lines is not None:
+            return tuple(_stabilize_lines(simple_lines, contents, initial, following, is_block))
+
+    def _wrap(contents: str) -> list[str]:
+        lines = wrap(contents, line_length, initial, following, display_width)
+        return _stabilize_lines(lines, contents, initial, following, is_block)
+
+    lines = _wrap(contents)
+    while (parsed_contents := _parsed_contents(lines, indent_level, is_block)) != contents:
+        contents = parsed_contents
+        rewrapped = _wrap(contents)
+        if rewrapped == lines:
+            break
+        lines = rewrapped
+
+    return tuple(lines)
+
+
+_cached_wrap_paragraph = functools.lru_cache(maxsize=DEFAULT_WRAP_CACHE_SIZE)(_wrap_paragraph)
+
+
+def configure_wrap_cache(max_size: int = DEFAULT_WRAP_CACHE_SIZE) -> None:
+    """
+    Replace the per-process memoization of wrapped comment runs with an empty one of the given size.
+
+    Runs are keyed by their contents, indent level, block-ness, line length, and width mode, and the
+    least recently used runs are evicted first. A `max_size` of `0` disables memoization, while
+    `None` leaves it unbounded.
+    """
+    global _cached_wrap_paragraph
+    _cached_wrap_paragraph = functools.lru_cache(maxsize=max_size)(_wrap_paragraph)
+
+
+def wrap_cache_info() -> "functools._CacheInfo":
+    """Report the hits, misses, and size of the memoization of wrapped comment runs."""
+    return _cached_wrap_paragraph.cache_info()
+
+
+def _wrap_run(
+    text: str,
+    line_length: int,
+    indent_level: int,
+    is_block: bool = False,
+    codec: t.Optional[str] = None,
+    display_width: bool = False,
+) -> t.Sequence[str]:
+    """
+    Reflow a comment run's contents to the specified line length, preserving the indent level.
+
+    If `is_block` is true, lines will be prefixed by indentation only & not contain a `%` char.
+
+    If a `codec` is provided, the contents are a latin-1 view of the raw source bytes. Any non-ASCII
+    contents are decoded before reflowing, so line lengths are measured in characters, and
+    re-encoded afterwards. See `decode_view` for details.
+
+    If `display_width` is `True`, line lengths are instead measured in terminal columns, see
+    `text_width`. ASCII contents are measured the same either way, so they're wrapped as usual.
+
+    Wrapped runs are memoized, see `configure_wrap_cache` for details.
+    """
+    run_codec = None
+    if codec is not None and not text.isascii():
+        text, run_codec = decode_view(text, codec)
+
+    # Keep ASCII runs, whose width is their length, sharing memoized wraps across width modes
+    display_width = display_width and not text.isascii()
+    reflowed_lines = _cached_wrap_paragraph(
+        text, line_length, indent_level, is_block, display_width
+    )
+    if run_codec is not None:
+        reflowed_lines = tuple(line.encode(run_codec).decode("latin-1") for line in reflowed_lines)
+
+    # A run with no wrappable contents still occupies a (blank) line in the output
+    return reflowed_lines or ("",)
+
+
+class LineKind(IntEnum):
+    """Classification of a MATLAB source line, as it pertains to comment reflow."""
+
+    CODE = 0  # Anything that isn't a comment, including blank lines
+    COMMENT = 1  # Comment eligible for reflow
+    CAPITAL_COMMENT = 2  # Reflowable comment starting a new run (`alternate_capital_handling`)
+    BLANK_COMMENT = 3  # Comment with no inner indentation, e.g. `%` or `%%`
+    INDENTED_COMMENT = 4  # Comment with inner indentation (`ignore_indented`)
+    BLOCK_OPEN = 5  # Block comment opening delimiter (`%{`)
+    BLOCK_CLOSE = 6  # Block comment closing delimiter (`%}`)
+    BLOCK_BODY = 7  # Line inside of a block comment
+
+
+# (kind, line, indent, content), see `classify_lines` for details
+ClassifiedLine: t.TypeAlias = tuple[LineKind, str, int, str]
+
+_CODE = LineKind.CODE
+_COMMENT = LineKind.COMMENT
+_CAPITAL_COMMENT = LineKind.CAPITAL_COMMENT
+_BLANK_COMMENT = LineKind.BLANK_COMMENT
+_INDENTED_COMMENT = LineKind.INDENTED_COMMENT
+_BLOCK_OPEN = LineKind.BLOCK_OPEN
+_BLOCK_CLOSE = LineKind.BLOCK_CLOSE
+_BLOCK_BODY = LineKind.BLOCK_BODY
+
+# Line boundaries recognized by str.splitlines other than "\n"
+_OTHER_LINE_BOUNDARIES = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+# Whitespace characters (per str.isspace) that are also ASCII
+_ASCII_WHITESPACE = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+def _classify_comment(
+    line: str,
+    indent: int,
+    ignore_indented: bool,
+    alternate_capital_handling: bool,
+    codec: t.Optional[str] = None,
+) -> ClassifiedLine:
+    """
+    Classify a comment line that isn't a block comment delimiter.
+
+    See `_classify_text` for a description of `codec`.
+    """
+    # Only strip the leading percent sign so inline percentages aren't mangled
+    if codec is None:
+        uncommented_line = line[indent + 1 :].rstrip()
+    else:
+        # Multi-byte characters may end in bytes that are whitespace when viewed as latin-1
+        uncommented_line = line[indent + 1 :].rstrip(_ASCII_WHITESPACE)
+    inner_indent = len(uncommented_line) - len(uncommented_line.lstrip())
+    first_char = uncommented_line[inner_indent : inner_indent + 1]
+    if codec is not None and not uncommented_line[: inner_indent + 1].isascii():
+        # Viewed as latin-1, multi-byte whitespace (e.g. a UTF-8 no-break space) isn't recognized,
+        # while other encodings' characters may be mistaken for whitespace, so measure the text
+        decoded_line = decode_view(uncommented_line, codec)[0].rstrip()
+        inner_indent = len(decoded_line) - len(decoded_line.lstrip())
+        first_char = decoded_line[inner_indent : inner_indent + 1]
+
+    if inner_indent == 0:
+        return (_BLANK_COMMENT, line, indent, "")
+    if ignore_indented and inner_indent >= 2:
+        return (_INDENTED_COMMENT, line, indent, "")
+    if alternate_capital_handling and first_char.isupper():
+        return (_CAPITAL_COMMENT, line, indent, uncommented_line)
+
+    return (_COMMENT, line, indent, uncommented_line)
+
+
+def classify_lines(src: t.Iterable[str], options: ReflowOptions) -> t.Iterator[ClassifiedLine]:
+    """
+    Classify each of the provided MATLAB source line(s) in a single pass.
+
+    Each line is yielded as a `(kind, line, indent, content)` tuple, where `indent` is the number of
+    leading whitespace characters in the line. For reflowable comments `content` is the line with
+    its leading whitespace & comment character stripped, for block comment bodies it is the line
+    with its leading whitespace stripped, and is otherwise empty.
+    """
+    reflow_blocks = options.reflow_block_comments
+    ignore_indented = options.ignore_indented
+    alternate_capital_handling = options.alternate_capital_handling
+
+    in_comment_block = False
+    for line in src:
+        lstripped_line = line.lstrip()
+        indent = len(line) - len(lstripped_line)
+
+        # Check for the close of a block comment
+        if reflow_blocks and lstripped_line.startswith("%}"):
+            in_comment_block = False
+            yield (_BLOCK_CLOSE, line, indent, "")
+        elif reflow_blocks and in_comment_block:
+            # Lines inside of a comment block likely won't begin with a %, so they're all body
+            yield (_BLOCK_BODY, line, indent, lstripped_line)
+        elif not lstripped_line.startswith("%"):
+            yield (_CODE, line, indent, "")
+        elif reflow_blocks and lstripped_line.startswith("%{"):
+            in_comment_block = True
+            yield (_BLOCK_OPEN, line, indent, "")
+        else:
+            yield _classify_comment(line, indent, ignore_indented, alternate_capital_handling)
+
+
+def _find_line_starting_with(src: str, marker: str, pos: int) -> int:
+    """
+    Find the start of the next line, at or after `pos`, whose first non-whitespace text is `marker`.
+
+    `pos` must be the start of a line. Returns `-1` if no such line is found.
+    """
+    idx = src.find(marker, pos)
+    while idx != -1:
+        line_start = src.rfind("\n", pos, idx) + 1 or pos
+        if line_start == idx or src[line_start:idx].isspace():
+            return line_start
+
+        # Marker is preceded by something else on its line, so resume the search on the next line
+        pos = src.find("\n", idx) + 1
+        if not pos:
+            break
+        idx = src.find(marker, pos)
+
+    return -1
+
+
+def _classify_text(
+    src: str, options: ReflowOptions, codec: t.Optional[str] = None
+) -> t.Iterator[ClassifiedLine]:
+    """
+    Classify the provided MATLAB source code, equivalent to `classify_lines(src.splitlines())`.
+
+    Rather than visiting every line, the source is scanned for the next line that could start a
+    comment (or close a block comment when inside of one), so code is never split into lines. Each
+    contiguous run of code lines is yielded as a single `CODE` item containing the newline-joined
+    lines.
+
+    If a `codec` is provided, the source is instead a latin-1 view of raw bytes whose lines are
+    separated by `"\n"`, and any comment that isn't valid UTF-8 is decoded with `codec`. Only the
+    comment runs that are reflowed are decoded.
+    """
+    if codec is None and any(boundary in src for boundary in _OTHER_LINE_BOUNDARIES):
+        # Rare enough that we can take the slow road rather than worry about mirroring splitlines
+        yield from classify_lines(src.splitlines(), options)
+        return
+
+    reflow_blocks = options.reflow_block_comments
+    ignore_indented = options.ignore_indented
+    alternate_capital_handling = options.alternate_capital_handling
+
+    n_chars = len(src)
+    pos = 0
+    while pos < n_chars:
+        start = _find_line_starting_with(src, "%", pos)
+        if start == -1:
+            start = n_chars
+
+        if start > pos:
+            yield (_CODE, src[pos:start].removesuffix("\n"), 0, "")
+        pos = start
+
+        # Classify consecutive comment lines until we hit code again
+        while pos < n_chars:
+            end = src.find("\n", pos)
+            if end == -1:
+                end = n_chars
+
+            line = src[pos:end]
+            lstripped_line = line.lstrip()
+            if not lstripped_line.startswith("%"):
+                break
+
+            pos = end + 1
+            indent = len(line) - len(lstripped_line)
+            if reflow_blocks and lstripped_line.startswith("%}"):
+                yield (_BLOCK_CLOSE, line, indent, "")
+            elif reflow_blocks and lstripped_line.startswith("%{"):
+                yield (_BLOCK_OPEN, line, indent, "")
+
+                # Everything up to the closing delimiter is the body of the block comment
+                block_end = _find_line_starting_with(src, "%}", pos)
+                if block_end == -1:
+                    block_end = n_chars
+
+                if block_end > pos:
+                    for body_line in src[pos:block_end].removesuffix("\n").split("\n"):
+                        lstripped_line = body_line.lstrip()
+                        indent = len(body_line) - len(lstripped_line)
+                        yield (_BLOCK_BODY, body_line, indent, lstripped_line)
+                pos = block_end
+            else:
+                yield _classify_comment(
+                    line, indent, ignore_indented, alternate_capital_handling, codec
+                )
+
+
+def _iter_segments(classified: t.Iterable[ClassifiedLine]) -> t.Iterator[Segment]:
+    """
+    Group the provided classified source into segments, yielding each as soon as it's complete.
+
+    Only the current comment run is held in memory. See `parse_segments` for details.
+    """
+    run_lines: list[str] = []
+    run_contents: list[str] = []
+    indent_level = 0  # Number of leading spaces
+    open_line: t.Optional[str] = None  # Opening delimiter of the current block comment, if any
+    for kind, line, indent, content in classified:
+        if kind is _BLOCK_BODY:
+            # If this isn't the first line in the text block we need to add a leading space to the
+            # line, otherwise it gets run into the last word from the previous line
+            run_contents.append(f" {content}" if run_contents else content)
+            run_lines.append(line)
+            continue
+
+        if kind is _COMMENT or kind is _CAPITAL_COMMENT:
+            if not run_lines:
+                # New run, set the indentation level for the incoming block
+                indent_level = indent
+            elif kind is _CAPITAL_COMMENT:
+                # Comment line starts with a capital letter, so we want to treat this as the start
+                # of a new comment run
+                yield CommentRun(run_lines, "".join(run_contents), indent_level)
+                run_lines, run_contents = [], []
+
+            run_lines.append(line)
+            run_contents.append(content)
+            continue
+
+        # Everything else ends the current run, if any. The run's indent level carries over, so a
+        # block comment opened directly after a run shares its indentation
+        run = None
+        if run_lines:
+            # A stray closing delimiter ends a run of comment lines rather than a block's body
+            is_block = open_line is not None
+            run = CommentRun(run_lines, "".join(run_contents), indent_level, is_block)
+            run_lines, run_contents = [], []
+        elif kind is not _CODE and kind is not _BLOCK_CLOSE:
+            indent_level = indent
+
+        if kind is _BLOCK_CLOSE and open_line is not None:
+            yield BlockComment(open_line, run, line)
+            open_line = None
+            continue
+
+        if run is not None:
+            yield run
+        if kind is _BLOCK_OPEN:
+            open_line = line
+        elif kind is _CODE:
+            yield CodeLines(line)
+        else:
+            yield VerbatimComment(line)
+
+    # EOF, an unclosed block comment's body is still reflowed as a block, since it would be parsed
+    # back as one
+    if open_line is not None:
+        body = None
+        if run_lines:
+            body = CommentRun(run_lines, "".join(run_contents), indent_level, is_block=True)
+        yield BlockComment(open_line, body, None)
+    elif run_lines:
+        yield CommentRun(run_lines, "".join(run_contents), indent_level)
+
+
+def parse_segments(src: str, options: ReflowOptions) -> list[Segment]:
+    """
+    Parse the provided MATLAB source code into a list of segments.
+
+    Source is split into `CodeLines`, `CommentRun`s that are reflowed as a unit, `BlockComment`s,
+    and `VerbatimComment`s that are never reflowed, according to the provided options. Rendering
+    the segments with `render_segments` reproduces the source, with each line terminated by a
+    newline.
+
+    The segments can be analyzed, reflowed with `reflow_segments`, and rendered without rescanning
+    the source.
+    """
+    return list(_iter_segments(_classify_text(src, options)))
+
+
+def _reflow_run(
+    run: CommentRun, line_length: int, codec: t.Optional[str] = None, display_width: bool = False
+) -> CommentRun:
+    lines = _wrap_run(run.text, line_length, run.indent_level, run.is_block, codec, display_width)
+    return CommentRun(lines, run.text, run.indent_level, run.is_block)
+
+
+def _reflow_segment(
+    segment: Segment, line_length: int, codec: t.Optional[str] = None, display_width: bool = False
+) -> Segment:
+    """Reflow a single segment, see `reflow_segments` for details."""
+    if isinstance(segment, CommentRun):
+        return _reflow_run(segment, line_length, codec, display_width)
+    if isinstance(segment, BlockComment) and segment.body is not None:
+        body = _reflow_run(segment.body, line_length, codec, display_width)
+        return BlockComment(segment.open_line, body, segment.close_line)
+
+    return segment
+
+
+def reflow_segments(segments: t.Iterable[Segment], options: ReflowOptions) -> list[Segment]:
+    """
+    Reflow the comment runs in the provided segments, returning new segments.
+
+    The provided segments are left untouched, and segments that don't contain a comment run are
+    passed through as-is.
+
+    See `process_file` for a description of the reflow behavior.
+    """
+    line_length = options.line_length
+    display_width = options.display_width
+    return [
+        _reflow_segment(segment, line_length, display_width=display_width) for segment in segments
+    ]
+
+
+def _reflow_classified(
+    classified: t.Iterable[ClassifiedLine],
+    options: ReflowOptions,
+    stats: t.Optional[FileStats] = None,
+    codec: t.Optional[str] = None,
+) -> t.Iterator[str]:
+    """
+    Reflow the comment runs in the provided classified source, yielding the reformatted line(s).
+
+    Anything outside of a comment run is passed through untouched.
+
+    If `stats` are provided, the number of comment runs flushed & wrap cache lookups are added to
+    them once the source is exhausted. See `_classify_text` for a description of `codec`.
+    """
+    return _render_reflowed(_iter_segments(classified), options, stats, codec)
+
+
+def _render_reflowed(
+    segments: t.Iterable[Segment],
+    options: ReflowOptions,
+    stats: t.Optional[FileStats] = None,
+    codec: t.Optional[str] = None,
+) -> t.Iterator[str]:
+    """Reflow the provided segments, yielding their rendered chunks, see `_reflow_classified`."""
+    if stats is not None:
+        start_info = wrap_cache_info()
+
+    line_length = options.line_length
+    display_width = options.display_width
+    n_flushed = 0
+    for segment in segments:
+        # Equivalent to rendering the reflowed segment, without building it
+        if isinstance(segment, CodeLines):
+            yield segment.text
+        elif isinstance(segment, CommentRun):
+            n_flushed += 1
+            yield from _wrap_run(
+                segment.text,
+                line_length,
+                segment.indent_level,
+                segment.is_block,
+                codec,
+                display_width,
+            )
+        else:
+            n_flushed += isinstance(segment, BlockComment) and segment.body is not None
+            yield from _reflow_segment(segment, line_length, codec, display_width).chunks()
+
+    if stats is None:
+        return
+
+    stats.runs_flushed += n_flushed
+
+    end_info = wrap_cache_info()
+    stats.wrap_hits += end_info.hits - start_info.hits
+    stats.wrap_misses += end_info.misses - start_info.misses
+
+
+# Lines that leave the reflow buffer empty, ending the unit of lines that share reflow state
+_UNIT_TERMINATORS = frozenset((_CODE, _BLANK_COMMENT, _INDENTED_COMMENT, _BLOCK_CLOSE))
+
+# Lines that are rewritten by the reflow, and so mark their unit as touched
+_REFLOWED_KINDS = frozenset((_COMMENT, _CAPITAL_COMMENT, _BLOCK_OPEN, _BLOCK_BODY, _BLOCK_CLOSE))
+
+
+def _merge_line_ranges(line_ranges: t.Iterable[LineRange]) -> list[LineRange]:
+    """Sort the provided line ranges & merge any that overlap or abut."""
+    merged: list[LineRange] = []
+    for start, end in sorted(line_ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def _reflow_line_ranges(
+    classified: t.Iterable[ClassifiedLine],
+    options: ReflowOptions,
+    line_ranges: t.Iterable[LineRange],
+    stats: t.Optional[FileStats] = None,
+    codec: t.Optional[str] = None,
+) -> t.Iterator[str]:
+    """
+    Reflow only the comment runs overlapping the provided line ranges, yielding the resulting lines.
+
+    Source is split into units of line(s) that share reflow state, e.g. a comment run along with the
+    line that ends it. A unit is reflowed only if one of its comment lines falls within one of the
+    1-based, inclusive line ranges, otherwise its lines are passed through verbatim.
+
+    A `CODE` item may hold several newline-joined lines, as yielded by `_classify_text`.
+    """
+    merged_ranges = _merge_line_ranges(line_ranges)
+    range_starts = [start for start, _ in merged_ranges]
+
+    unit: list[ClassifiedLine] = []
+    touched = False
+    line_no = 1
+    for item in classified:
+        kind, line = item[0], item[1]
+        unit.append(item)
+        if not touched and kind in _REFLOWED_KINDS:
+            idx = bisect.bisect_right(range_starts, line_no) - 1
+            touched = idx >= 0 and line_no <= merged_ranges[idx][1]
+
+        line_no += line.count("\n") + 1 if kind is _CODE else 1
+        if kind in _UNIT_TERMINATORS:
+            if touched:
+                yield from _reflow_classified(unit, options, stats, codec)
+            else:
+                yield from (line for _, line, _, _ in unit)
+
+            unit.clear()
+            touched = False
+
+    if touched:
+        yield from _reflow_classified(unit, options, stats, codec)
+    else:
+        yield from (line for _, line, _, _ in unit)
+
+
+def iter_reflow_lines(
+    src: t.Iterable[str],
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+) -> t.Iterator[str]:
+    """
+    Reflow comments in the provided MATLAB source line(s), yielding the reformatted line(s).
+
+    Source lines are expected to be stripped of their line endings, and yielded lines are likewise
+    returned without them. Only the current comment run is held in memory, so lines are yielded as
+    soon as the run they belong to has ended. Lines outside of a comment run are passed through
+    untouched.
+
+    If `line_ranges` are provided, only comment runs overlapping at least one of the 1-based,
+    inclusive `(start, end)` line ranges are reflowed; all other lines are passed through verbatim.
+
+    If `stats` are provided, the number of comment runs flushed is tallied into them once the source
+    is exhausted.
+
+    See `process_file` for a description of the reflow behavior.
+    """
+    classified = classify_lines(src, options)
+    if line_ranges is not None:
+        return _reflow_line_ranges(classified, options, line_ranges, stats)
+
+    return _reflow_classified(classified, options, stats)
+
+
+def _iter_reflow_chunks(
+    src: str,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    codec: t.Optional[str] = None,
+) -> t.Iterator[str]:
+    """
+    Reflow the provided source, yielding chunks of one or more newline-joined lines.
+
+    See `_classify_text` for a description of `codec`.
+    """
+    classified = _classify_text(src, options, codec)
+    if line_ranges is not None:
+        return _reflow_line_ranges(classified, options, line_ranges, stats, codec)
+
+    return _reflow_classified(classified, options, stats, codec)
+
+
+def reflow_source(
+    src: str,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+) -> str:
+    """
+    Reflow comments in the provided MATLAB source code, returning the reformatted source.
+
+    Each line of the returned source is terminated by a newline.
+
+    See `iter_reflow_lines` for a description of `line_ranges` & `stats`, and `process_file` for a
+    description of the reflow behavior.
+    """
+    reflowed = _iter_reflow_chunks(src, options, line_ranges, stats)
+    return "".join(f"{chunk}\n" for chunk in reflowed)
+
+
+class _SplitReflow(t.NamedTuple):
+    """
+    Settings for reflowing the comments of large files in parallel.
+
+    Files of at least `min_lines` lines are split into up to `n_chunks` chunks, of at least
+    `MIN_SPLIT_CHUNK_LINES` lines each, which are reflowed by the workers of `executor`.
+    """
+
+    executor: Executor
+    min_lines: int
+    n_chunks: int
+
+
+def _block_comment_spans(src: str) -> list[tuple[int, int]]:
+    """
+    Locate the block comments in the provided source, mirroring `_classify_text`.
+
+    Each block comment is returned as the offsets of the start of its opening line & the start of
+    the line after its closing line, or the end of the source if it's unclosed.
+    """
+    spans = []
+    n_chars = len(src)
+    pos = 0
+    while (start := _find_line_starting_with(src, "%{", pos)) != -1:
+        body_start = src.find("\n", start) + 1 or n_chars
+        close = _find_line_starting_with(src, "%}", body_start)
+        if close == -1:
+            spans.append((start, n_chars))
+            break
+
+        pos = src.find("\n", close) + 1 or n_chars
+        spans.append((start, pos))
+
+    return spans
+
+
+def _split_source(src: str, options: ReflowOptions, n_chunks: int) -> list[str]:
+    """
+    Split the provided source into up to `n_chunks` chunks of similar size.
+
+    Chunks only end after a line of code outside of any block comment, where no comment can span the
+    split & parsing starts afresh, so reflowing each chunk independently & concatenating the results
+    is equivalent to reflowing the whole source. Fewer chunks are returned if the source doesn't
+    have enough such lines.
+    """
+    spans = _block_comment_spans(src) if options.reflow_block_comments else []
+    span_starts = [start for start, _ in spans]
+
+    n_chars = len(src)
+    chunk_size = n_chars // n_chunks
+    chunks: list[str] = []
+    start = 0
+    pos = chunk_size
+    while len(chunks) < n_chunks - 1:
+        split = src.find("\n", pos) + 1
+        if not split or split >= n_chars:
+            break
+
+        # Skip past any block comment, since its body may contain lines that look like code
+        span_idx = bisect.bisect_left(span_starts, split) - 1
+        if span_idx >= 0 and split < spans[span_idx][1]:
+            pos = spans[span_idx][1]
+            continue
+
+        line_start = src.rfind("\n", 0, split - 1) + 1
+        if src[line_start:split].lstrip().startswith("%"):
+            pos = split
+            continue
+
+        chunks.append(src[start:split])
+        start = split
+        pos = split + chunk_size
+
+    chunks.append(src[start:])
+    return chunks
+
+
+def _reflow_chunk(
+    text: str, options: ReflowOptions, codec: t.Optional[str], collect_stats: bool
+) -> tuple[t.Optional[str], t.Optional[FileStats]]:
+    """
+    Worker for `_reflow_split`, reflowing a single chunk of a source's text.
+
+    Returns `None` in place of the reflowed text if the chunk can't change. If `collect_stats` is
+    `True`, the comment runs of unchanged chunks are still tallied, as they would be when reflowing
+    the whole source.
+    """
+    segments = list(_iter_segments(_classify_text(text, options, codec)))
+    stats = FileStats() if collect_stats else None
+    if not _needs_reflow(text, options, codec, segments):
+        if stats is not None:
+            stats.runs_flushed = sum(
+                isinstance(segment, CommentRun)
+                or (isinstance(segment, BlockComment) and segment.body is not None)
+                for segment in segments
+            )
+        return None, stats
+
+    reflowed = "".join(f"{chunk}\n" for chunk in _render_reflowed(segments, options, stats, codec))
+    return reflowed, stats
+
+
+def _reflow_split(
+    source: DecodedSource,
+    options: ReflowOptions,
+    split: _SplitReflow,
+    stats: t.Optional[FileStats] = None,
+) -> t.Optional[str]:
+    """
+    Reflow the provided source in parallel, see `_reflow_decoded` for details.
+
+    The source's text is split into chunks that can be reflowed independently, see `_split_source`,
+    whose reflowed text is stitched back together in order. Returns `None` if no chunk can change.
+    """
+    n_chunks = min(split.n_chunks, source.text.count("\n") // MIN_SPLIT_CHUNK_LINES)
+    chunks = _split_source(source.text, options, n_chunks)
+    results = split.executor.map(
+        _reflow_chunk,
+        chunks,
+        itertools.repeat(options),
+        itertools.repeat(source.codec),
+        itertools.repeat(stats is not None),
+    )
+
+    reflowed_chunks = []
+    all_stats = []
+    changed = False
+    for chunk, (reflowed, chunk_stats) in zip(chunks, results, strict=True):
+        changed |= reflowed is not None
+        reflowed_chunks.append(chunk if reflowed is None else reflowed)
+        if chunk_stats is not None:
+            all_stats.append(chunk_stats)
+
+    if not changed:
+        return None
+
+    if stats is not None:
+        for chunk_stats in all_stats:
+            stats.runs_flushed += chunk_stats.runs_flushed
+            stats.wrap_hits += chunk_stats.wrap_hits
+            stats.wrap_misses += chunk_stats.wrap_misses
+
+    # Reflowing terminates every line, including the last line of an unchanged final chunk
+    if not reflowed_chunks[-1].endswith("\n"):
+        reflowed_chunks[-1] += "\n"
+    return "".join(reflowed_chunks)
+
+
+def _can_split(source: DecodedSource, split: _SplitReflow) -> bool:
+    """Check whether the provided source is large enough, & simple enough, to reflow in parallel."""
+    if source.mixed_newlines:
+        return False
+    if source.codec is None and any(b in source.text for b in _OTHER_LINE_BOUNDARIES):
+        return False
+
+    n_lines = source.text.count("\n")
+    return n_lines >= split.min_lines and n_lines >= 2 * MIN_SPLIT_CHUNK_LINES
+
+
+def _reflow_decoded(
+    source: DecodedSource,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    split: t.Optional[_SplitReflow] = None,
+) -> t.Optional[str]:
+    """
+    Reflow the provided source, returning `None` if `needs_reflow` shows it can't change.
+
+    Unless reflowing line ranges, the source is parsed once for both the prefilter & the reflow.
+
+    If `split` settings are provided, large sources are reflowed in parallel, see `_SplitReflow`.
+    """
+    if split is not None and line_ranges is None and _can_split(source, split):
+        return _reflow_split(source, options, split, stats)
+
+    if source.mixed_newlines:
+        segments = None
+    else:
+        segments = list(_iter_segments(_classify_text(source.text, options, source.codec)))
+        if not _needs_reflow(source.text, options, source.codec, segments):
+            return None
+
+    if line_ranges is not None or segments is None:
+        reflowed = _iter_reflow_chunks(source.text, options, line_ranges, stats, source.codec)
+    else:
+        reflowed = _render_reflowed(segments, options, stats, source.codec)
+
+    return "".join(f"{chunk}\n" for chunk in reflowed)
+
+
+def reflow_bytes(
+    data: t.Union[bytes, mmap.mmap],
+    options: ReflowOptions,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+) -> bytes:
+    """
+    Reflow comments in the provided raw MATLAB source, returning the reformatted source as bytes.
+
+    The source's encoding & newline style (LF, CRLF, or CR, detected from its first line break) are
+    preserved, and lines that aren't reflowed are returned byte for byte. Each line of the returned
+    source is terminated by the detected newline.
+
+    Source isn't decoded as a whole; only the comment runs that are reflowed are decoded, as UTF-8
+    if valid, otherwise using the fallback `encoding`. A UTF-8 byte order mark is passed through,
+    while a source starting with a UTF-16 or UTF-32 byte order mark is fully decoded.
+
+    If `stats` are provided, the number of lines & comment runs flushed are tallied into them.
+
+    See `iter_reflow_lines` for a description of `line_ranges`, and `process_file` for a description
+    of the reflow behavior.
+    """
+    source = decode_source(data, encoding)
+    if stats is not None:
+        stats.lines += _count_lines(source.text)
+
+    reflowed_src = _reflow_decoded(source, options, line_ranges, stats)
+    if reflowed_src is None:
+        return bytes(data)
+
+    return source.encode(reflowed_src)
+
+
+def reflow_stream(
+    src: t.TextIO,
+    dst: t.TextIO,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+) -> bool:
+    """
+    Reflow comments in the MATLAB source read from `src`, writing the reformatted source to `dst`.
+
+    Source is read & written incrementally, so peak memory is bounded by the largest comment run
+    rather than the size of the source. Returns `True` if the written source differs from the input.
+
+    `src` is expected to be opened with universal newlines, and each line written to `dst` is
+    terminated by a newline.
+
+    If `stats` are provided, the number of lines read & comment runs flushed are tallied into them.
+
+    See `iter_reflow_lines` for a description of `line_ranges`, and `process_file` for a description
+    of the reflow behavior.
+    """
+    # Neither side is held in memory, so compare digests of what was read & written
+    in_hash = hashlib.blake2b()
+    out_hash = hashlib.blake2b()
+    n_lines = 0
+
+    def _hashed_src() -> t.Iterator[str]:
+        nonlocal n_lines
+        for line in src:
+            n_lines += 1
+            in_hash.update(line.encode(errors="surrogatepass"))
+            yield line[:-1] if line.endswith("\n") else line
+
+    for line in iter_reflow_lines(_hashed_src(), options, line_ranges, stats):
+        out_hash.update(line.encode(errors="surrogatepass"))
+        out_hash.update(b"\n")
+        dst.write(f"{line}\n")
+
+    if stats is not None:
+        stats.lines += n_lines
+
+    return in_hash.digest() != out_hash.digest()
+
+
+def find_first_change(
+    src: str, options: ReflowOptions, line_ranges: t.Optional[t.Iterable[LineRange]] = None
+) -> t.Optional[int]:
+    """
+    Locate the first line of the provided MATLAB source code that would be changed by reflowing.
+
+    Returns the 1-based line number of the first differing line, or `None` if the source is already
+    formatted. Reflowing stops as soon as a difference is found, so only the source up to the end of
+    the first modified comment run is processed.
+
+    See `iter_reflow_lines` for a description of `line_ranges`, and `process_file` for a description
+    of the reflow behavior.
+    """
+    return _find_first_change(src, options, line_ranges)
+
+
+def _find_first_change(
+    src: str,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    codec: t.Optional[str] = None,
+) -> t.Optional[int]:
+    """Implementation of `find_first_change`, see `_classify_text` for a description of `codec`."""
+    pos = 0
+    for chunk in _iter_reflow_chunks(src, options, line_ranges, codec=codec):
+        expected = f"{chunk}\n"
+        if not src.startswith(expected, pos):
+            n_common = len(os.path.commonprefix((expected, src[pos : pos + len(expected)])))
+            return src.count("\n", 0, pos + n_common) + 1
+
+        pos += len(expected)
+
+    if pos < len(src):
+        return src.count("\n", 0, pos) + 1
+
+    return None
+
+
+def _stream_find_first_change(
+    src: t.TextIO, options: ReflowOptions, line_ranges: t.Optional[t.Iterable[LineRange]] = None
+) -> t.Optional[int]:
+    """
+    Incremental counterpart to `find_first_change`, reading source line(s) from `src` as needed.
+
+    Only source lines that have been read but not yet reflowed are held in memory.
+    """
+    pending: deque = deque()
+
+    def _recorded_src() -> t.Iterator[str]:
+        for line in src:
+            pending.append(line)
+            yield line[:-1] if line.endswith("\n") else line
+
+    line_no = 0
+    for line in iter_reflow_lines(_recorded_src(), options, line_ranges):
+        line_no += 1
+        if not pending or pending.popleft() != f"{line}\n":
+            return line_no
+
+    if pending:
+        return line_no + 1
+
+    return None
+
+
+def _is_stable_run(
+    lines: t.Sequence[str], indent_level: int, is_block: bool, line_length: int
+) -> bool:
     """
-    Reflow the buffered line(s) to the specified line length, preserving the indent level.
+    Check whether the provided comment run would be reproduced exactly by `_wrap_run`.
+
+    Only runs that hit `wrap`'s fast path are recognized: every line is the expected prefix followed
+    by printable ASCII words separated by single spaces, fits within the line length, and couldn't
+    have fit the next line's first word.
+    """
+    prefix = " " * indent_level if is_block else f"{' ' * indent_level}% "
+    if max(map(len, lines)) > line_length or not all(line.startswith(prefix) for line in lines):
+        return False
+
+    # Joining with a space means stray whitespace anywhere shows up as a double space
+    n_prefix = len(prefix)
+    texts = [line[n_prefix:] for line in lines]
+    joined = " ".join(texts)
+    if (
+        not joined
+        or not (joined.isascii() and joined.isprintable())
+        or "  " in joined
+        or joined.startswith(" ")
+        or joined.endswith(" ")
+    ):
+        return False
+
+    # The greedy wrap would have pulled a line's first word back onto the previous line if it fit
+    return all(
+        len(prev_line) + 1 + len(text.partition(" ")[0]) > line_length
+        for prev_line, text in zip(lines, texts[1:], strict=False)
+    )
+
+
+def _segments_need_reflow(segments: t.Iterable[Segment], line_length: int) -> bool:
+    """Check whether reflowing could change any of the provided segments' comment runs."""
+    for segment in segments:
+        if isinstance(segment, CommentRun):
+            if not _is_stable_run(segment.lines, segment.indent_level, False, line_length):
+                return True
+        elif isinstance(segment, BlockComment) and segment.body is not None:
+            body = segment.body
+            if not _is_stable_run(body.lines, body.indent_level, True, line_length):
+                return True
+
+    return False
 
-    If `is_block` is true, lines will be prefixed by indentation only & not contain a `%` char.
 
-    The buffer is cleared & returned after the new line(s) are written.
+def _needs_reflow(
+    src: str,
+    options: ReflowOptions,
+    codec: t.Optional[str] = None,
+    segments: t.Optional[t.Iterable[Segment]] = None,
+) -> bool:
     """
-    if is_block:
-        initial = following = f"{' '*indent_level}"
-    else:
-        initial = f"{' '*indent_level}%"  # Don't include the initial leading space
-        following = f"{' '*indent_level}% "
+    Implementation of `needs_reflow`, see `_classify_text` for a description of `codec`.
+
+    If the source has already been parsed, its `segments` can be provided to avoid rescanning it.
+    """
+    if src and not src.endswith("\n"):
+        return True
+    if codec is None and any(boundary in src for boundary in _OTHER_LINE_BOUNDARIES):
+        # Line endings are normalized when splitting these lines
+        return True
+
+    if segments is None:
+        segments = _iter_segments(_classify_text(src, options, codec))
+
+    return _segments_need_reflow(segments, options.line_length)
+
+
+def needs_reflow(src: str, options: ReflowOptions) -> bool:
+    """
+    Cheaply check whether the provided MATLAB source code could be changed by reflowing.
+
+    A single linear scan checks each comment run for lines over the line length or lines that could
+    be merged, without wrapping anything. The check is conservative: if `False` is returned then
+    `reflow_source` is guaranteed to return the source unchanged, but `True` may be returned for
+    some already formatted source, e.g. comments containing tabs or non-ASCII characters.
+
+    See `process_file` for a description of the reflow behavior.
+    """
+    return _needs_reflow(src, options)
+
 
-    reflowed_src = textwrap.fill(
-        "".join(buffer),
-        width=line_length,
-        initial_indent=initial,
-        subsequent_indent=following,
-        break_on_hyphens=False,
+def _diff_source(src: str, reflowed_src: str, filename: str) -> str:
+    """Build a unified diff from the source to its reflowed counterpart."""
+    diff = difflib.unified_diff(
+        src.splitlines(keepends=True),
+        reflowed_src.splitlines(keepends=True),
+        fromfile=f"a/{filename}",
+        tofile=f"b/{filename}",
     )
-    reflowed_src = f"{reflowed_src}\n"
-    f.write(reflowed_src)
 
-    buffer.clear()
-    return buffer
+    # Mirror git's marker for a missing newline at EOF so it doesn't run into the next line
+    return "".join(
+        line if line.endswith("\n") else f"{line}\n\\ No newline at end of file\n" for line in diff
+    )
 
 
-def _write_line(
-    f: t.TextIO,
-    line: str,
-    buffer: deque,
-    line_length: int,
-    indent_level: int,
-    is_block: bool = False,
-) -> deque:
+def _stream_reflow_file(
+    file: Path,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+) -> bool:
     """
-    Write the provided source line after checking for buffered comments to empty.
+    Reflow the provided file incrementally, writing to a temporary file as lines are produced.
 
-    The buffer is cleared & returned after the new line(s) are written.
+    The temporary file is only renamed over the target if the reflowed source differs. Symlinks are
+    resolved first, so their target is written rather than the link being replaced.
     """
-    if buffer:
-        buffer = _dump_buffer(f, buffer, line_length, indent_level, is_block)
-    f.write(f"{line}\n")
+    start = time.perf_counter()
+    file = file.resolve()
+    fd, tmp_file = sibling_temp_file(file)
+    try:
+        with file.open() as src, os.fdopen(fd, "w") as dst:
+            changed = reflow_stream(src, dst, options, line_ranges, stats)
+
+        reflowed = time.perf_counter()
+        if changed:
+            bytes_written = tmp_file.stat().st_size
+            replace_from_temp(file, tmp_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+    if stats is not None:
+        stats.reflow_s = reflowed - start
+        stats.write_s = time.perf_counter() - reflowed
+        stats.bytes_written = bytes_written if changed else 0
+        stats.changed = changed
+
+    return changed
+
+
+def _count_lines(src: str) -> int:
+    return src.count("\n") + (not src.endswith("\n") and bool(src))
+
+
+def _reflow_data(
+    data: t.Union[bytes, mmap.mmap],
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    split: t.Optional[_SplitReflow] = None,
+) -> t.Optional[bytes]:
+    """Reflow the provided raw source, returning the reflowed source if it differs, else `None`."""
+    source = decode_source(data, encoding)
+    if stats is not None:
+        stats.lines += _count_lines(source.text)
+
+    # Most files are already formatted, so reflowing is skipped for any that can't change
+    reflowed_text = _reflow_decoded(source, options, line_ranges, stats, split)
+    if reflowed_text is None:
+        return None
+
+    reflowed_src = source.encode(reflowed_text)
+    with memoryview(data) as raw:
+        if raw == reflowed_src:
+            return None
+
+    return reflowed_src
 
-    return buffer
+
+def _reflow_file(
+    file: Path,
+    options: ReflowOptions,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+) -> bool:
+    start = time.perf_counter()
+    with read_source(file) as data:
+        read = time.perf_counter()
+        reflowed_src = _reflow_data(data, options, line_ranges, stats, encoding)
+        reflowed = time.perf_counter()
+
+    if reflowed_src is not None:
+        atomic_write(file, reflowed_src)
+
+    if stats is not None:
+        stats.read_s = read - start
+        stats.reflow_s = reflowed - read
+        stats.write_s = time.perf_counter() - reflowed
+        stats.bytes_written = len(reflowed_src) if reflowed_src is not None else 0
+        stats.changed = reflowed_src is not None
+
+    return reflowed_src is not None
 
 
 def process_file(
@@ -65,10 +1266,20 @@ def process_file(
     ignore_indented: bool,
     alternate_capital_handling: bool,
     reflow_block_comments: bool,
-) -> None:
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    display_width: bool = False,
+) -> bool:
     """
     Reflow comments (`%`) in the provided MATLAB file (`*.m`) to the specified line length.
 
+    The reflowed source is built in memory & only written back, atomically, if it differs from the
+    original. Returns `True` if the file was modified.
+
+    The file's encoding & newline style are preserved. Comments are decoded as UTF-8 if valid,
+    otherwise using the fallback `encoding`. See `reflow_bytes` for details.
+
     Blank comment lines are passed back into the reformatted source code.
 
     If `ignore_indented` is `True`, comments that contain inner indentation of at least two spaces
@@ -82,105 +1293,846 @@ def process_file(
     `%}`) are reflowed. Per MATLAB's spec, the delimiters must be the only thing on their respective
     lines.
 
+    If `display_width` is `True`, line lengths are measured in terminal columns rather than
+    characters, so comments containing wide (e.g. CJK text or emoji) or zero width (e.g. combining)
+    characters are wrapped to the width they're displayed at. ASCII comments are unaffected.
+
+    If `line_ranges` are provided, only comment runs overlapping at least one of the 1-based,
+    inclusive `(start, end)` line ranges are reflowed; all other lines are copied through verbatim.
+
+    If `stats` are provided, they're populated with instrumentation of the work done to process the
+    file. See `FileStats` for details.
+
     View the README for code samples.
     """
-    src = file.read_text().splitlines()
-    with file.open("w") as f:
-        buffer: deque = deque()
-        indent_level = 0  # Number of leading spaces
-        in_comment_block = False
-        for line in src:
-            lstripped_line = line.lstrip()
+    options = ReflowOptions(
+        line_length,
+        ignore_indented,
+        alternate_capital_handling,
+        reflow_block_comments,
+        display_width,
+    )
+    return _reflow_file(file, options, line_ranges=line_ranges, stats=stats, encoding=encoding)
+
+
+def _check_data(
+    file: Path,
+    data: t.Union[bytes, mmap.mmap],
+    options: ReflowOptions,
+    diff: bool = False,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+) -> t.Optional[str]:
+    """Check the provided raw contents of the file, see `_check_file` for details."""
+    source = decode_source(data, encoding)
+    if diff:
+        reflowed_src = _reflow_decoded(source, options, line_ranges)
+        if reflowed_src is None or reflowed_src == source.text:
+            return None
+
+        return _diff_source(
+            source.readable(source.text), source.readable(reflowed_src), file.as_posix()
+        )
+
+    if not (source.mixed_newlines or _needs_reflow(source.text, options, source.codec)):
+        return None
+
+    line_no = _find_first_change(source.text, options, line_ranges, source.codec)
+    if line_no is None:
+        return None
+
+    return f"{file}:{line_no}: would reflow comments\n"
+
+
+def _check_file(
+    file: Path,
+    options: ReflowOptions,
+    stream: bool = False,
+    diff: bool = False,
+    line_ranges: t.Optional[t.Iterable[LineRange]] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+) -> t.Optional[str]:
+    """
+    Check whether the provided file would be changed by reflowing, without modifying it.
+
+    Returns `None` if the file is already formatted, otherwise a report of the change: a unified
+    diff if `diff` is `True`, or the location of the first line that would change.
+
+    Differences in newline style alone aren't reported, since reflowing preserves the file's own.
+    """
+    if stream and not diff:
+        with file.open() as f:
+            line_no = _stream_find_first_change(f, options, line_ranges)
+        if line_no is None:
+            return None
+
+        return f"{file}:{line_no}: would reflow comments\n"
+
+    with read_source(file) as data:
+        return _check_data(file, data, options, diff, line_ranges, encoding)
+
+
+class _FileOutcome(t.NamedTuple):
+    changed: bool = False
+    error: t.Optional[str] = None
+    report: t.Optional[str] = None
+    stats: t.Optional[FileStats] = None
+    output: t.Optional[bytes] = None
+
+
+def _verify_idempotent(
+    file: Path,
+    reflowed_src: t.Optional[bytes],
+    options: ReflowOptions,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+) -> t.Optional[str]:
+    """
+    Check that reflowing the reflowed source of the file again leaves it unchanged.
+
+    Returns `None` if the reflowed source is stable, otherwise an error locating the first line that
+    a second pass would change.
+    """
+    if reflowed_src is None:
+        # Source was left unchanged, so it's already stable
+        return None
+
+    source = decode_source(reflowed_src, encoding)
+    line_no = _find_first_change(source.text, options, None, source.codec)
+    if line_no is None:
+        return None
+
+    return f"{file}:{line_no}: reflowed comments aren't stable, reflowing again changes this line"
+
+
+def _process_data(
+    file: Path,
+    data: t.Union[bytes, mmap.mmap],
+    options: ReflowOptions,
+    cache: t.Optional[ReflowCache] = None,
+    check: bool = False,
+    diff: bool = False,
+    line_ranges: t.Optional[t.Sequence[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    verify_idempotent: bool = False,
+    split: t.Optional[_SplitReflow] = None,
+) -> tuple[_FileOutcome, t.Optional[bytes]]:
+    """
+    Process the provided raw contents of the file, without reading or writing the file itself.
+
+    Returns the outcome, along with the reflowed source to write back if the file changed. See
+    `_process_one` for details.
+    """
+    if cache is not None:
+        start = time.perf_counter()
+        cache_options = (*astuple(options), encoding)
+        key = cache.key(data, cache_options)
+        if cache.is_clean(key):
+            if stats is not None:
+                stats.read_s += time.perf_counter() - start
+                stats.cached = True
+            return _FileOutcome(stats=stats), None
+
+    start = time.perf_counter()
+    error = None
+    if check or diff:
+        report = _check_data(file, data, options, diff, line_ranges, encoding)
+        if verify_idempotent and report is not None:
+            reflowed_src = _reflow_data(data, options, line_ranges, None, encoding)
+            error = _verify_idempotent(file, reflowed_src, options, encoding)
+        if stats is not None:
+            stats.reflow_s = time.perf_counter() - start
+            stats.changed = report is not None
+
+        if report is None and cache is not None and line_ranges is None:
+            cache.mark_clean(key)
+
+        outcome = _FileOutcome(changed=report is not None, error=error, report=report, stats=stats)
+        return outcome, None
+
+    reflowed_src = _reflow_data(data, options, line_ranges, stats, encoding, split)
+    changed = reflowed_src is not None
+    if verify_idempotent:
+        error = _verify_idempotent(file, reflowed_src, options, encoding)
+    if stats is not None:
+        stats.reflow_s = time.perf_counter() - start
+        stats.bytes_written = len(reflowed_src) if reflowed_src is not None else 0
+        stats.changed = changed
+
+    # Unstable output isn't recorded, so it's verified again on the next run
+    if cache is not None and line_ranges is None and error is None:
+        # Record the contents being written back, rather than rereading them once written
+        if reflowed_src is not None:
+            key = cache.key(reflowed_src, cache_options)
+        cache.mark_clean(key)
+
+    return _FileOutcome(changed=changed, error=error, stats=stats), reflowed_src
+
+
+def _process_stream(
+    file: Path,
+    options: ReflowOptions,
+    cache: t.Optional[ReflowCache] = None,
+    check: bool = False,
+    diff: bool = False,
+    line_ranges: t.Optional[t.Sequence[LineRange]] = None,
+    stats: t.Optional[FileStats] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+) -> _FileOutcome:
+    """Process the provided file incrementally, see `_process_one` for details."""
+    if cache is not None:
+        start = time.perf_counter()
+        cache_options = (*astuple(options), encoding)
+        key = cache.file_key(file, cache_options)
+        if cache.is_clean(key):
+            if stats is not None:
+                stats.read_s = time.perf_counter() - start
+                stats.cached = True
+            return _FileOutcome(stats=stats)
+
+    if check or diff:
+        start = time.perf_counter()
+        report = _check_file(file, options, True, diff, line_ranges, encoding)
+        if stats is not None:
+            stats.reflow_s = time.perf_counter() - start
+            stats.changed = report is not None
+
+        if report is None and cache is not None and line_ranges is None:
+            cache.mark_clean(key)
+
+        return _FileOutcome(changed=report is not None, report=report, stats=stats)
+
+    changed = _stream_reflow_file(file, options, line_ranges, stats)
+
+    if cache is not None and line_ranges is None:
+        if changed:
+            key = cache.file_key(file, cache_options)
+        cache.mark_clean(key)
+
+    return _FileOutcome(changed=changed, stats=stats)
+
+
+def _process_one(
+    file: Path,
+    options: ReflowOptions,
+    cache: t.Optional[ReflowCache] = None,
+    stream: bool = False,
+    check: bool = False,
+    diff: bool = False,
+    line_ranges: t.Optional[t.Sequence[LineRange]] = None,
+    collect_stats: bool = False,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    verify_idempotent: bool = False,
+    split: t.Optional[_SplitReflow] = None,
+    write: bool = True,
+    return_output: bool = False,
+) -> _FileOutcome:
+    """
+    Worker wrapper for `process_file`, capturing whether the file changed or failed to process.
+
+    Errors are returned rather than raised so they can be reported in input order regardless of
+    which worker process handled the file.
+
+    If a `cache` is provided, files whose contents are already recorded as formatted for the current
+    options are skipped entirely, and files are recorded as formatted once processed.
+
+    If `stream` is `True`, the file is reflowed incrementally rather than loaded into memory.
+
+    If either `check` or `diff` is `True`, the file is left untouched & a report of the change that
+    would be made is returned instead. See `_check_file` for details.
+
+    If `line_ranges` are provided, only comment runs overlapping them are considered. Since the rest
+    of the file isn't necessarily formatted, the file is never recorded as formatted in the `cache`.
+
+    If `collect_stats` is `True`, instrumentation of the work done is included in the outcome.
+
+    `encoding` is the fallback for comments that aren't valid UTF-8, see `reflow_bytes` for details.
+
+    If `verify_idempotent` is `True`, the reflowed source is reflowed a second time & an error is
+    returned if that would change it. Streamed files aren't verified.
+
+    If `split` settings are provided, the comments of large files are reflowed in parallel, see
+    `_SplitReflow`. Files are only split when reflowed in place.
+
+    If `write` is `False`, the reflowed source isn't written back. If `return_output` is `True`, the
+    file's contents after reflowing are included in the outcome. Neither applies to streamed or
+    checked files.
+    """
+    stats = FileStats(file=str(file)) if collect_stats else None
+    if line_ranges is not None and not line_ranges:
+        # Nothing to reflow, so no need to even open the file
+        return _FileOutcome(stats=stats)
+
+    try:
+        if stream:
+            return _process_stream(file, options, cache, check, diff, line_ranges, stats, encoding)
+
+        start = time.perf_counter()
+        with read_source(file) as data:
+            read = time.perf_counter()
+            outcome, reflowed_src = _process_data(
+                file,
+                data,
+                options,
+                cache,
+                check,
+                diff,
+                line_ranges,
+                stats,
+                encoding,
+                verify_idempotent,
+                split,
+            )
+            if return_output and not (check or diff):
+                outcome = outcome._replace(
+                    output=reflowed_src if reflowed_src is not None else bytes(data)
+                )
+
+        reflowed = time.perf_counter()
+        if write and reflowed_src is not None:
+            atomic_write(file, reflowed_src)
+    except (OSError, ValueError) as e:
+        return _FileOutcome(error=f"{file}: {e}", stats=stats)
+
+    if stats is not None:
+        stats.read_s += read - start
+        stats.write_s = time.perf_counter() - reflowed
 
-            # Check for the close of a block comment
-            if reflow_block_comments and lstripped_line.startswith("%}"):
-                # If we're exiting the block comment, reflow the contents & then write closing tag
-                # If we're here then the indent level will already be set by the logic further down
-                in_comment_block = False
-                buffer = _write_line(f, line, buffer, line_length, indent_level, is_block=True)
-                continue
-
-            # If we're inside a comment block, lines will likely not begin with a %
-            # Since we're dumping lines inside comment blocks as-is, we can short-circuit here
-            if reflow_block_comments and in_comment_block:
-                if buffer:
-                    # If this isn't the first line in the text block we need to add a leading space
-                    # to the line, otherwise it gets run into the last word from the previous line
-                    buffer.append(f" {lstripped_line}")
-                else:
-                    buffer.append(lstripped_line)
-
-                continue
-
-            if lstripped_line.startswith("%"):
-                # Comment line
-                if not buffer:
-                    # New buffer, set the indentation level for the incoming block
-                    indent_level = _n_leading_spaces(line)
-
-                # Check for the opening of a block comment
-                if reflow_block_comments and lstripped_line.startswith("%{"):
-                    # If we're entering a block comment, dump out any existing buffer & write the
-                    # opening tag straight out
-                    in_comment_block = True
-                    buffer = _write_line(f, line, buffer, line_length, indent_level)
-                    continue
-
-                # Count the inner level of indentation of the comment itself to use for both the
-                # empty comment line check and the ignore indent check
-                # Only strip leading percent sign so inline percentages aren't mangled
-                uncommented_line = lstripped_line.replace("%", "", 1).rstrip()
-                inner_indent = _n_leading_spaces(uncommented_line)
-
-                if inner_indent == 0:
-                    # Blank line, write straight out
-                    buffer = _write_line(f, line, buffer, line_length, indent_level)
-                    continue
-
-                if ignore_indented and inner_indent >= 2:
-                    # Inner indented comment, write straight out
-                    buffer = _write_line(f, line, buffer, line_length, indent_level)
-                    continue
-
-                # `uncommented_line` is likely to start with leading whitespace that we don't care
-                # about for this check
-                if alternate_capital_handling and uncommented_line.lstrip()[0].isupper():
-                    # Comment line starts with a capital letter
-                    # We want to treat this as the start of a new comment block, so if there is an
-                    # existing buffer, dump it before adding the current line into a fresh buffer
-                    if buffer:
-                        buffer = _dump_buffer(f, buffer, line_length, indent_level)
-
-                # If we're here, then we have a line eligible for reflowing so add it to the buffer
-                buffer.append(uncommented_line)
-                continue
-
-            # Non-comment line, write straight out
-            buffer = _write_line(f, line, buffer, line_length, indent_level)
+    return outcome
+
+
+def _process_ranged(
+    file: Path, line_ranges: t.Optional[t.Sequence[LineRange]], **kwargs: t.Any
+) -> _FileOutcome:
+    """Adapter for mapping `_process_one` over paired files & line ranges."""
+    return _process_one(file, line_ranges=line_ranges, **kwargs)
+
+
+class LocalFileSystem:
+    """Access to the local filesystem, replacing files atomically via a temporary file & rename."""
+
+    def read_bytes(self, file: Path) -> bytes:  # noqa: D102
+        return file.read_bytes()
+
+    def write_bytes(self, file: Path, data: bytes) -> None:  # noqa: D102
+        atomic_write(file, data)
+
+
+_PipelineJob = tuple[Path, t.Optional[t.Sequence[LineRange]]]
+
+
+def _pipeline_read(job: _PipelineJob, fs: FileSystem) -> tuple[bytes, float]:
+    file, line_ranges = job
+    if line_ranges is not None and not line_ranges:
+        # Nothing to reflow, so no need to even open the file
+        return b"", 0.0
+
+    start = time.perf_counter()
+    data = fs.read_bytes(file)
+    return data, time.perf_counter() - start
+
+
+def _pipeline_process(
+    job: _PipelineJob,
+    fetched: tuple[bytes, float],
+    fs: FileSystem,
+    collect_stats: bool = False,
+    **kwargs: t.Any,
+) -> tuple[_FileOutcome, t.Optional[t.Callable[[], _FileOutcome]]]:
+    file, line_ranges = job
+    data, read_s = fetched
+    stats = FileStats(file=str(file), read_s=read_s) if collect_stats else None
+    if line_ranges is not None and not line_ranges:
+        return _FileOutcome(stats=stats), None
+
+    try:
+        outcome, reflowed_src = _process_data(
+            file, data, line_ranges=line_ranges, stats=stats, **kwargs
+        )
+    except (OSError, ValueError) as e:
+        return _FileOutcome(error=f"{file}: {e}", stats=stats), None
+
+    if reflowed_src is None:
+        return outcome, None
+
+    def _write() -> _FileOutcome:
+        start = time.perf_counter()
+        fs.write_bytes(file, reflowed_src)
+        if stats is not None:
+            stats.write_s = time.perf_counter() - start
+        return outcome
+
+    return outcome, _write
+
+
+def _pipeline_fail(job: _PipelineJob, e: OSError, collect_stats: bool = False) -> _FileOutcome:
+    file, _ = job
+    return _FileOutcome(
+        error=f"{file}: {e}", stats=FileStats(file=str(file)) if collect_stats else None
+    )
+
+
+def _process_pipelined(
+    files: t.Iterable[Path],
+    file_ranges: t.Iterable[t.Optional[t.Sequence[LineRange]]],
+    fs: FileSystem,
+    n_threads: int,
+    window: t.Optional[int] = None,
+    collect_stats: bool = False,
+    **kwargs: t.Any,
+) -> t.Iterator[_FileOutcome]:
+    """
+    Process the provided files in memory, overlapping file reads & writes with reflowing.
+
+    Files are read ahead & written back by `n_threads` I/O threads through the provided filesystem,
+    while reflowing happens on the calling thread, so processing isn't held up waiting on storage
+    with high latency, e.g. a network filesystem. See `pipelined` for details of the in-flight
+    `window`, and `_process_one` for the remaining options; files are never streamed.
+
+    Outcomes are yielded in input order. Since writes are drained in the background, `write_s` in
+    any collected stats is the time taken by the write itself rather than time spent waiting on it.
+    """
+    return pipelined(
+        zip(files, file_ranges, strict=False),
+        functools.partial(_pipeline_read, fs=fs),
+        functools.partial(_pipeline_process, fs=fs, collect_stats=collect_stats, **kwargs),
+        functools.partial(_pipeline_fail, collect_stats=collect_stats),
+        n_threads,
+        window,
+    )
+
+
+@dataclass(frozen=True)
+class ReflowResult:
+    """
+    Outcome of reflowing a single file with `reflow_many`.
+
+    `changed` is `True` if reflowing changed the file's contents, whether or not they were written
+    back. If the file couldn't be processed, `error` describes why & the file is left untouched.
+    `stats` holds the time spent on each phase of processing the file, along with a tally of the
+    work done; see `FileStats` for details. If requested, `output` holds the file's contents after
+    reflowing, unless processing failed.
+    """
+
+    path: Path
+    changed: bool = False
+    error: t.Optional[str] = None
+    stats: FileStats = field(default_factory=FileStats)
+    output: t.Optional[bytes] = None
+
+
+def _reflow_one(
+    file: Path,
+    options: ReflowOptions,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    write: bool = True,
+    return_output: bool = False,
+) -> ReflowResult:
+    """Worker for `reflow_many`, reflowing a single file."""
+    outcome = _process_one(
+        file,
+        options,
+        collect_stats=True,
+        encoding=encoding,
+        write=write,
+        return_output=return_output,
+    )
+    # Stats are always collected
+    stats = t.cast(FileStats, outcome.stats)
+    return ReflowResult(file, outcome.changed, outcome.error, stats, outcome.output)
+
+
+def reflow_many(
+    paths: t.Iterable[t.Union[str, Path]],
+    options: ReflowOptions,
+    executor: t.Optional[Executor] = None,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    write: bool = True,
+    return_output: bool = False,
+) -> list[ReflowResult]:
+    """
+    Reflow comments in the provided MATLAB files, returning a result for each file in input order.
+
+    Directories are walked for MATLAB files, subject to any `.gitignore` files found along the way;
+    see `walk_matlab_files` for details. Each file is reflowed as by `process_file`, and errors
+    reading or writing a file are captured in its result rather than raised. See `ReflowResult` for
+    the details reported.
+
+    If an `executor` is provided, files are reflowed by its workers, so callers can share their own
+    thread or process pool; otherwise files are reflowed serially in the calling thread.
+
+    If `write` is `False`, files are left untouched & only the results are reported. If
+    `return_output` is `True`, each file's reflowed contents are included in its result.
+    """
+    worker = functools.partial(
+        _reflow_one, options=options, encoding=encoding, write=write, return_output=return_output
+    )
+    files = _iter_files(Path(path) for path in paths)
+    if executor is None:
+        return list(map(worker, files))
+
+    return list(executor.map(worker, files))
+
+
+def _reflow_watched(
+    file: Path,
+    digests: dict[Path, bytes],
+    options: ReflowOptions,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    verify_idempotent: bool = False,
+) -> t.Optional[_FileOutcome]:
+    """
+    Reflow a file that changed while watching, returning `None` if it was skipped.
+
+    `digests` records a digest of each file's contents as of its last reflow, so files whose
+    contents haven't changed since, including those changed only by reflowing them, are skipped.
+    """
+    try:
+        data = file.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if digests.get(file) == digest:
+            return None
+
+        outcome, reflowed_src = _process_data(
+            file, data, options, encoding=encoding, verify_idempotent=verify_idempotent
+        )
+        if reflowed_src is not None:
+            atomic_write(file, reflowed_src)
+            digest = hashlib.blake2b(reflowed_src, digest_size=16).digest()
+    except (OSError, ValueError) as e:
+        digests.pop(file, None)
+        return _FileOutcome(error=f"{file}: {e}")
+
+    digests[file] = digest
+    return outcome
+
+
+def _watch(
+    paths: t.Sequence[Path],
+    exclude: t.Iterable[str],
+    options: ReflowOptions,
+    encoding: str = DEFAULT_FALLBACK_ENCODING,
+    verify_idempotent: bool = False,
+) -> int:
+    """
+    Reflow files beneath the provided paths as they're saved, until interrupted.
+
+    Changes are watched for using inotify where available, otherwise by polling, and debounced so a
+    burst of saves is reflowed as one batch. See `iter_changes` & `_reflow_watched` for details.
+    Returns `0` once interrupted.
+    """
+    digests: dict[Path, bytes] = {}
+    with contextlib.closing(create_watcher(paths, exclude)) as watcher:
+        try:
+            for batch in iter_changes(watcher):
+                for file in batch:
+                    outcome = _reflow_watched(file, digests, options, encoding, verify_idempotent)
+                    if outcome is None:
+                        continue
+
+                    if outcome.error is not None:
+                        print(outcome.error, file=sys.stderr)
+                    elif outcome.changed:
+                        print(f"{file}: reflowed comments")
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+def _parse_line_range(line_range: str) -> LineRange:
+    """Parse a 1-based, inclusive `START-END` line range, as provided on the command line."""
+    try:
+        start, end = (int(line_no) for line_no in line_range.split("-"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"Invalid line range, expected START-END: '{line_range}'"
+        ) from e
+
+    if start < 1 or end < start:
+        raise argparse.ArgumentTypeError(
+            f"Line range must start at 1 or later & not end before it starts: '{line_range}'"
+        )
+
+    return start, end
+
+
+def _parse_shard(shard: str) -> Shard:
+    """Parse a 1-based `INDEX/COUNT` shard, as provided on the command line."""
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Invalid shard, expected INDEX/COUNT: '{shard}'") from e
+
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"Shard index must be between 1 & the number of shards: '{shard}'"
+        )
+
+    return index, count
+
+
+def _iter_files(paths: t.Iterable[Path], exclude: t.Iterable[str] = ()) -> t.Iterator[Path]:
+    """
+    Yield the files to process from the provided paths, walking any directories as they're reached.
+
+    Explicitly provided files are always yielded, while files discovered by walking a directory are
+    subject to the `exclude` patterns & any `.gitignore` files. See `walk_matlab_files` for details.
+    """
+    for path in paths:
+        if path.is_dir():
+            yield from walk_matlab_files(path, exclude)
         else:
-            # EOF, Dump any remaining comments in the buffer (file ends in comments)
-            if buffer:
-                buffer = _dump_buffer(f, buffer, line_length, indent_level)
+            yield path
 
 
-def main(argv: t.Optional[t.Sequence[str]] = None) -> None:  # pragma: no cover  # noqa: D103
-    parser = argparse.ArgumentParser()
-    parser.add_argument("filenames", nargs="*", type=Path)
+def _worker_pool(n_jobs: int, wrap_cache_size: int) -> ProcessPoolExecutor:
+    """Create a pool of `n_jobs` worker processes, each memoizing up to `wrap_cache_size` runs."""
+    return ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=configure_wrap_cache, initargs=(wrap_cache_size,)
+    )
+
+
+def _default_jobs() -> int:
+    n_cpus = os.cpu_count() or 1
+    if sys.platform == "win32":  # pragma: no cover
+        n_cpus = min(n_cpus, _MAX_WINDOWS_WORKERS)
+
+    return n_cpus
+
+
+def add_reflow_arguments(parser: argparse._ActionsContainer) -> None:
+    """Add the command line options controlling the reflow to the provided parser."""
     parser.add_argument("--line-length", type=int, default=78)
     parser.add_argument("--ignore-indented", type=bool, default=True)
     parser.add_argument("--alternate-capital-handling", type=bool, default=False)
     parser.add_argument("--reflow-block-comments", type=bool, default=True)
+    parser.add_argument("--display-width", type=bool, default=False)
+
+
+def options_from_args(args: argparse.Namespace) -> ReflowOptions:
+    """Build reflow options from command line options added by `add_reflow_arguments`."""
+    return ReflowOptions(
+        line_length=args.line_length,
+        ignore_indented=args.ignore_indented,
+        alternate_capital_handling=args.alternate_capital_handling,
+        reflow_block_comments=args.reflow_block_comments,
+        display_width=args.display_width,
+    )
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:  # noqa: D103
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filenames", nargs="*", type=Path)
+    add_reflow_arguments(parser)
+    parser.add_argument("--jobs", "-j", type=int, default=_default_jobs())
+    parser.add_argument("--io-threads", type=int, default=0)
+    parser.add_argument("--split-min-lines", type=int, default=0)
+    parser.add_argument("--cache-dir", type=Path, default=None)
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--wrap-cache-size", type=int, default=DEFAULT_WRAP_CACHE_SIZE)
+    parser.add_argument("--encoding", default=DEFAULT_FALLBACK_ENCODING)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--diff", action="store_true")
+    parser.add_argument("--verify-idempotent", action="store_true")
+    parser.add_argument("--watch", action="store_true")
+    parser.add_argument("--exclude", action="append", default=[])
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--stats-json", type=Path, default=None)
+    parser.add_argument("--shard", type=_parse_shard, default=None)
+    parser.add_argument("--shard-costs", type=Path, default=None)
+    ranges_group = parser.add_mutually_exclusive_group()
+    ranges_group.add_argument("--line-ranges", type=_parse_line_range, action="append")
+    ranges_group.add_argument("--changed-lines", action="store_true")
     args = parser.parse_args(argv)
 
-    for file in args.filenames:
-        process_file(
-            file,
-            args.line_length,
-            args.ignore_indented,
-            args.alternate_capital_handling,
-            args.reflow_block_comments,
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if args.io_threads < 0:
+        parser.error("--io-threads must be at least 0")
+
+    if args.split_min_lines < 0:
+        parser.error("--split-min-lines must be at least 0")
+
+    if args.wrap_cache_size < 0:
+        parser.error("--wrap-cache-size must be at least 0")
+
+    try:
+        codecs.lookup(args.encoding)
+    except LookupError:
+        parser.error(f"Unknown encoding: '{args.encoding}'")
+
+    options = options_from_args(args)
+
+    if args.line_ranges is not None and (len(args.filenames) != 1 or args.filenames[0].is_dir()):
+        parser.error("--line-ranges can only be used with a single file")
+
+    if args.verify_idempotent and (
+        args.stream or args.line_ranges is not None or args.changed_lines
+    ):
+        parser.error(
+            "--verify-idempotent can't be combined with --stream, --line-ranges, or --changed-lines"
+        )
+
+    if args.shard_costs is not None and args.shard is None:
+        parser.error("--shard-costs can only be used with --shard")
+
+    if args.shard is not None and args.watch:
+        parser.error("--shard can't be combined with --watch")
+
+    if args.watch and not args.filenames:
+        parser.error("--watch requires at least one file or directory to watch")
+
+    if args.watch and (
+        args.stream or args.check or args.diff or args.line_ranges is not None or args.changed_lines
+    ):
+        parser.error(
+            "--watch can't be combined with --stream, --check, --diff, --line-ranges, or "
+            "--changed-lines"
         )
 
+    configure_wrap_cache(args.wrap_cache_size)
+
+    if STDIN_PATH in args.filenames:
+        if len(args.filenames) > 1:
+            parser.error("Reading from stdin (-) can't be combined with other filenames")
+        if args.verify_idempotent:
+            parser.error("--verify-idempotent can't be used when reading from stdin (-)")
+        if args.changed_lines:
+            parser.error("--changed-lines can't be used when reading from stdin (-)")
+        if args.watch:
+            parser.error("--watch can't be used when reading from stdin (-)")
+        if args.shard is not None:
+            parser.error("--shard can't be used when reading from stdin (-)")
+
+        if args.diff:
+            src = sys.stdin.read()
+            report = _diff_source(src, reflow_source(src, options, args.line_ranges), "-")
+            sys.stdout.write(report)
+            return int(bool(report))
+        if args.check:
+            line_no = _stream_find_first_change(sys.stdin, options, args.line_ranges)
+            if line_no is None:
+                return 0
+
+            print(f"-:{line_no}: would reflow comments")
+            return 1
+
+        reflow_stream(sys.stdin, sys.stdout, options, args.line_ranges)
+        return 0
+
+    if args.watch:
+        # Only files saved from here on are reflowed, in this process so the wrap cache stays warm
+        return _watch(args.filenames, args.exclude, options, args.encoding, args.verify_idempotent)
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = ReflowCache(args.cache_dir, args.cache_max_entries)
+
+    # Directories are walked lazily so processing can begin as soon as the first file is found
+    files: t.Iterable[Path] = args.filenames
+    if any(path.is_dir() for path in args.filenames):
+        files = _iter_files(args.filenames, args.exclude)
+
+    if args.shard is not None:
+        # Every shard partitions the full list of files the same way, then keeps only its portion
+        costs = None
+        if args.shard_costs is not None:
+            try:
+                costs = load_costs(args.shard_costs)
+            except (OSError, ValueError) as e:
+                parser.error(f"Can't load --shard-costs: {e}")
+        files = shard_files(files, args.shard, costs)
+
+    file_ranges: t.Iterable[t.Optional[t.Sequence[LineRange]]]
+    if args.changed_lines:
+        files = list(files)
+        file_ranges = changed_line_ranges(files)
+    else:
+        file_ranges = itertools.repeat(args.line_ranges)
+
+    process_kwargs: dict[str, t.Any] = {
+        "options": options,
+        "cache": cache,
+        "check": args.check,
+        "diff": args.diff,
+        "collect_stats": args.stats or args.stats_json is not None,
+        "encoding": args.encoding,
+        "verify_idempotent": args.verify_idempotent,
+    }
+    worker = functools.partial(_process_ranged, stream=args.stream, **process_kwargs)
+
+    # Peek at the start of the files to decide whether a worker pool is worthwhile, without waiting
+    # on the rest of any directory walk
+    n_files = len(files) if isinstance(files, list) else None
+    files_iter = iter(files)
+    head = list(itertools.islice(files_iter, MIN_PARALLEL_FILES))
+    files = itertools.chain(head, files_iter)
+
+    outcomes: list[_FileOutcome]
+    if args.jobs <= 1 or len(head) < MIN_PARALLEL_FILES:
+        with contextlib.ExitStack() as stack:
+            split = None
+            if args.split_min_lines and args.jobs > 1 and not args.stream:
+                # Too few files to spread across workers, so spread the comments of large files
+                # across them instead. Workers are only started once a file is split
+                executor = stack.enter_context(_worker_pool(args.jobs, args.wrap_cache_size))
+                n_chunks = args.jobs * _SPLIT_CHUNKS_PER_JOB
+                split = _SplitReflow(executor, args.split_min_lines, n_chunks)
+
+            if args.io_threads and not args.stream:
+                # Overlap storage latency with reflowing, e.g. for checkouts on a network filesystem
+                outcomes = list(
+                    _process_pipelined(
+                        files,
+                        file_ranges,
+                        LocalFileSystem(),
+                        args.io_threads,
+                        split=split,
+                        **process_kwargs,
+                    )
+                )
+            else:
+                outcomes = list(map(functools.partial(worker, split=split), files, file_ranges))
+    else:
+        if n_files is None:
+            n_jobs = args.jobs
+            chunksize = _WALK_CHUNKSIZE
+        else:
+            n_jobs = min(args.jobs, n_files)
+            chunksize = max(1, n_files // (n_jobs * 4))
+
+        # Results come back in input order no matter which worker finishes first, so reporting stays
+        # deterministic across runs
+        with _worker_pool(n_jobs, args.wrap_cache_size) as executor:
+            outcomes = list(executor.map(worker, files, file_ranges, chunksize=chunksize))
+
+    if cache is not None:
+        cache.evict()
+
+    file_stats = [outcome.stats for outcome in outcomes if outcome.stats is not None]
+    if args.stats:
+        print(format_summary(file_stats), file=sys.stderr)
+    if args.stats_json is not None:
+        write_report(file_stats, args.stats_json)
+
+    # Following pre-commit convention, a non-zero exit code signals that files were modified (or
+    # would be, when checking)
+    ret = 0
+    for outcome in outcomes:
+        if outcome.report is not None:
+            sys.stdout.write(outcome.report)
+
+        if outcome.error is not None:
+            print(outcome.error, file=sys.stderr)
+            ret = 1
+        elif outcome.changed:
+            ret = 1
+
+    return ret
+
 
 if __name__ == "__main__":  # pragma: no cover
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+import abc
+import typing as t
+
+
+class Segment(abc.ABC):
+    """
+    Base class for the segments that MATLAB source is parsed into before reflowing.
+
+    Segments are immutable by convention & hold their source line(s) without line endings.
+    """
+
+    __slots__: tuple[str, ...] = ()
+
+    @abc.abstractmethod
+    def chunks(self) -> t.Iterator[str]:
+        """Yield the segment's source, as chunks of one or more newline-joined lines."""
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class CodeLines(Segment):
+    """One or more consecutive lines of code, joined by newlines."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def chunks(self) -> t.Iterator[str]:  # noqa: D102
+        yield self.text
+
+
+class VerbatimComment(Segment):
+    """
+    A comment line that is never reflowed.
+
+    This covers blank comments, indented comments (when ignored), and block comment delimiters that
+    don't belong to a `BlockComment`.
+    """
+
+    __slots__ = ("line",)
+
+    def __init__(self, line: str) -> None:
+        self.line = line
+
+    def chunks(self) -> t.Iterator[str]:  # noqa: D102
+        yield self.line
+
+
+class CommentRun(Segment):
+    """
+    A run of comment lines that are reflowed together.
+
+    `text` is the run's contents as they're wrapped, with comment characters & leading indentation
+    removed, and `indent_level` is the number of leading spaces given to the wrapped lines. If
+    `is_block` is `True`, the wrapped lines aren't prefixed by a `%`.
+    """
+
+    __slots__ = ("lines", "text", "indent_level", "is_block")
+
+    def __init__(
+        self, lines: t.Sequence[str], text: str, indent_level: int, is_block: bool = False
+    ) -> None:
+        self.lines = lines
+        self.text = text
+        self.indent_level = indent_level
+        self.is_block = is_block
+
+    def chunks(self) -> t.Iterator[str]:  # noqa: D102
+        yield from self.lines
+
+
+class BlockComment(Segment):
+    """
+    A block comment, from its opening delimiter (`%{`) through its closing delimiter (`%}`).
+
+    `body` is `None` if the block is empty, and `close_line` is `None` if the block is left open at
+    the end of the source.
+    """
+
+    __slots__ = ("open_line", "body", "close_line")
+
+    def __init__(
+        self, open_line: str, body: t.Optional[CommentRun], close_line: t.Optional[str]
+    ) -> None:
+        self.open_line = open_line
+        self.body = body
+        self.close_line = close_line
+
+    def chunks(self) -> t.Iterator[str]:  # noqa: D102
+        yield self.open_line
+        if self.body is not None:
+            yield from self.body.lines
+        if self.close_line is not None:
+            yield self.close_line
+
+
+def render_segments(segments: t.Iterable[Segment]) -> str:
+    """Render the provided segments back into source, terminating each line with a newline."""
+    return "".join(f"{chunk}\n" for segment in segments for chunk in segment.chunks())
@@ -0,0 +1,81 @@
+import heapq
+import json
+import typing as t
+from pathlib import Path
+
+# 1-based shard index & the total number of shards
+Shard: t.TypeAlias = tuple[int, int]
+
+
+def load_costs(report_file: Path) -> dict[Path, float]:
+    """
+    Load the recorded processing time of each file from a `--stats-json` report.
+
+    A `ValueError` is raised if the report can't be parsed.
+    """
+    try:
+        with report_file.open() as f:
+            report = json.load(f)
+        return {Path(entry["file"]): float(entry["total_s"]) for entry in report["files"]}
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid stats report: {e}") from e
+
+
+def _file_size(file: Path) -> int:
+    try:
+        return file.stat().st_size
+    except OSError:
+        return 0
+
+
+def _estimate_costs(
+    files: t.Sequence[Path], costs: t.Optional[t.Mapping[Path, float]] = None
+) -> list[float]:
+    """
+    Estimate the cost of processing each of the provided files.
+
+    Files with a recorded cost use it, while the rest are estimated from their size, scaled by the
+    cost per byte of the recorded files so both are in the same units. Without any recorded costs,
+    each file's cost is simply its size.
+    """
+    sizes = [_file_size(file) for file in files]
+    if not costs:
+        return [float(size) for size in sizes]
+
+    recorded = [
+        (costs[file], size) for file, size in zip(files, sizes, strict=True) if file in costs
+    ]
+    recorded_bytes = sum(size for _, size in recorded)
+    cost_per_byte = sum(cost for cost, _ in recorded) / recorded_bytes if recorded_bytes else 0.0
+    if not cost_per_byte:
+        return [float(size) for size in sizes]
+
+    return [costs.get(file, size * cost_per_byte) for file, size in zip(files, sizes, strict=True)]
+
+
+def shard_files(
+    files: t.Iterable[Path], shard: Shard, costs: t.Optional[t.Mapping[Path, float]] = None
+) -> list[Path]:
+    """
+    Select the provided shard's portion of the files, balancing the estimated cost of each shard.
+
+    Files are assigned greedily, most expensive first, to the shard with the least total cost so
+    far (longest processing time first scheduling), with ties broken by path & shard index. The
+    partition depends only on the files & their costs, so every shard computes the same partition
+    independently. See `_estimate_costs` for how costs are estimated from file sizes & any recorded
+    `costs`. The shard's files are returned in their input order.
+    """
+    index, count = shard
+    files = list(files)
+    estimates = _estimate_costs(files, costs)
+    by_cost = sorted(range(len(files)), key=lambda idx: (-estimates[idx], str(files[idx])))
+
+    loads = [(0.0, shard_idx) for shard_idx in range(1, count + 1)]
+    selected = set()
+    for idx in by_cost:
+        load, shard_idx = heapq.heappop(loads)
+        if shard_idx == index:
+            selected.add(idx)
+        heapq.heappush(loads, (load + estimates[idx], shard_idx))
+
+    return [file for idx, file in enumerate(files) if idx in selected]
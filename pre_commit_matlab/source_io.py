@@ -0,0 +1,155 @@
+import codecs
+import contextlib
+import mmap
+import os
+import shutil
+import tempfile
+import typing as t
+from pathlib import Path
+
+# Files at least this large, in bytes, are memory mapped rather than read into memory
+MMAP_THRESHOLD = 1 << 20
+
+# Byte order marks of encodings whose newlines aren't single bytes, so sources must be fully decoded
+# UTF-32 is checked first since its little endian BOM starts with UTF-16's
+_WIDE_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def decode_view(view: str, codec: str) -> tuple[str, str]:
+    """
+    Decode the provided latin-1 view of raw source bytes, returning the text & the codec used.
+
+    Text is decoded as UTF-8 if possible, otherwise using the provided fallback `codec`.
+    """
+    raw = view.encode("latin-1")
+    try:
+        return raw.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return raw.decode(codec), codec
+
+
+class DecodedSource(t.NamedTuple):
+    """
+    Raw source bytes prepared for reflowing.
+
+    `text` has its newlines normalized to `"\n"` & is converted back to bytes using `encoding`. If
+    `codec` is set, `text` is a latin-1 view of the raw bytes rather than fully decoded text, see
+    `decode_view`. `mixed_newlines` is `True` if the source contained line breaks
+    other than its detected `newline`, which are normalized when converting back to bytes.
+    """
+
+    text: str
+    encoding: str
+    codec: t.Optional[str]
+    bom: bytes
+    newline: str
+    mixed_newlines: bool = False
+
+    def readable(self, text: str) -> str:
+        """Fully decode the provided text, a counterpart of `text`, for display."""
+        if self.codec is None:
+            return text
+
+        return decode_view(text, self.codec)[0]
+
+    def encode(self, text: str) -> bytes:
+        """Convert the provided text, a counterpart of `text`, back to raw source bytes."""
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+
+        return self.bom + text.encode(self.encoding)
+
+
+def _detect_newline(src: str) -> str:
+    """Detect the newline style of the provided source from its first line break."""
+    first_lf = src.find("\n")
+    if first_lf == -1:
+        return "\r" if "\r" in src else "\n"
+    if first_lf > 0 and src[first_lf - 1] == "\r":
+        return "\r\n"
+
+    return "\n"
+
+
+def decode_source(data: t.Union[bytes, mmap.mmap], encoding: str) -> DecodedSource:
+    """
+    Prepare the provided raw source for reflowing, detecting its encoding & newline style.
+
+    Unless the source starts with a UTF-16 or UTF-32 byte order mark, it is viewed as latin-1, which
+    maps each byte to a single character, rather than decoded. `encoding` is the fallback for
+    comments that aren't valid UTF-8.
+    """
+    for bom, wide_encoding in _WIDE_BOMS:
+        if data[: len(bom)] == bom:
+            with memoryview(data) as raw:
+                text = str(raw[len(bom) :], wide_encoding)
+            codec = None
+            break
+    else:
+        bom = codecs.BOM_UTF8 if data[: len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else b""
+        with memoryview(data) as raw:
+            text = str(raw[len(bom) :], "latin-1")
+        wide_encoding, codec = "latin-1", encoding
+
+    newline = _detect_newline(text)
+    mixed_newlines = False
+    if newline != "\n":
+        n_newlines = text.count(newline)
+        text = text.replace(newline, "\n")
+        mixed_newlines = text.count("\n") != n_newlines
+
+    return DecodedSource(text, wide_encoding, codec, bom, newline, mixed_newlines)
+
+
+@contextlib.contextmanager
+def read_source(file: Path) -> t.Iterator[t.Union[bytes, mmap.mmap]]:
+    """
+    Provide the raw contents of the provided file.
+
+    Files of at least `MMAP_THRESHOLD` bytes are memory mapped rather than read; the mapping is
+    closed on exit, so the file can then be replaced.
+    """
+    with file.open("rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def sibling_temp_file(file: Path) -> tuple[int, Path]:
+    """
+    Create a temporary file alongside the target, returning its file descriptor & path.
+
+    Creating the file alongside the target keeps the final rename on the same filesystem.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=file.parent, prefix=f".{file.name}.", suffix=".tmp")
+    return fd, Path(tmp_name)
+
+
+def replace_from_temp(file: Path, tmp_file: Path) -> None:
+    """Atomically replace the target with the temporary file, carrying over permission bits."""
+    shutil.copymode(file, tmp_file)
+    os.replace(tmp_file, file)
+
+
+def atomic_write(file: Path, contents: t.Union[str, bytes]) -> None:
+    """
+    Replace the contents of the target file via a temporary file & rename.
+
+    Symlinks are resolved first, so their target is written rather than the link being replaced.
+    """
+    file = file.resolve()
+    fd, tmp_file = sibling_temp_file(file)
+    try:
+        with os.fdopen(fd, "wb" if isinstance(contents, bytes) else "w") as f:
+            f.write(contents)
+        replace_from_temp(file, tmp_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
@@ -0,0 +1,128 @@
+import json
+import statistics
+import typing as t
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Files taking at least this many times the median file's processing time are called out as slow
+SLOW_FILE_FACTOR = 4.0
+
+# Processing times below this are dominated by noise, so files this fast are never called out
+MIN_SLOW_FILE_S = 0.01
+
+MAX_SLOW_FILES = 10
+
+
+@dataclass
+class FileStats:
+    """
+    Instrumentation of the work done to process a single file.
+
+    Times are wall times, in seconds. When reflowing incrementally (`stream`), reading is
+    interleaved with reflowing & so is included in `reflow_s`, while `write_s` only covers replacing
+    the original file. When checking (`check` or `diff`), all work is included in `reflow_s`.
+
+    `runs_flushed` counts the comment runs reflowed, of which `wrap_hits` were already memoized &
+    `wrap_misses` had to be wrapped. Files skipped because they're recorded as
+    formatted in the cache are marked as `cached`.
+    """
+
+    file: str = ""
+    read_s: float = 0.0
+    reflow_s: float = 0.0
+    write_s: float = 0.0
+    lines: int = 0
+    runs_flushed: int = 0
+    wrap_hits: int = 0
+    wrap_misses: int = 0
+    bytes_written: int = 0
+    changed: bool = False
+    cached: bool = False
+
+    @property
+    def total_s(self) -> float:  # noqa: D102
+        return self.read_s + self.reflow_s + self.write_s
+
+
+def find_slow_files(stats: t.Sequence[FileStats]) -> list[FileStats]:
+    """
+    Identify outliers in processing time, slowest first.
+
+    A file is considered slow if it took at least `SLOW_FILE_FACTOR` times as long as the median
+    file, and at least `MIN_SLOW_FILE_S`. At most `MAX_SLOW_FILES` are returned.
+    """
+    if not stats:
+        return []
+
+    threshold = max(
+        SLOW_FILE_FACTOR * statistics.median(file.total_s for file in stats), MIN_SLOW_FILE_S
+    )
+    slow = sorted(
+        (file for file in stats if file.total_s >= threshold), key=lambda f: f.total_s, reverse=True
+    )
+    return slow[:MAX_SLOW_FILES]
+
+
+def _totals(stats: t.Sequence[FileStats]) -> dict[str, t.Any]:
+    return {
+        "files": len(stats),
+        "changed": sum(file.changed for file in stats),
+        "cached": sum(file.cached for file in stats),
+        "read_s": sum(file.read_s for file in stats),
+        "reflow_s": sum(file.reflow_s for file in stats),
+        "write_s": sum(file.write_s for file in stats),
+        "lines": sum(file.lines for file in stats),
+        "runs_flushed": sum(file.runs_flushed for file in stats),
+        "wrap_hits": sum(file.wrap_hits for file in stats),
+        "wrap_misses": sum(file.wrap_misses for file in stats),
+        "bytes_written": sum(file.bytes_written for file in stats),
+    }
+
+
+def format_summary(stats: t.Sequence[FileStats]) -> str:
+    """Build a human readable summary of the provided file stats, calling out any slow files."""
+    totals = _totals(stats)
+    total_s = totals["read_s"] + totals["reflow_s"] + totals["write_s"]
+    lines = [
+        (
+            f"Processed {totals['files']} file(s) ({totals['changed']} changed, "
+            f"{totals['cached']} cached) in {total_s:.3f}s"
+        ),
+        (
+            f"  read {totals['read_s']:.3f}s | reflow {totals['reflow_s']:.3f}s | "
+            f"write {totals['write_s']:.3f}s"
+        ),
+        (
+            f"  {totals['lines']} line(s), {totals['runs_flushed']} comment run(s) flushed, "
+            f"{totals['bytes_written']} byte(s) written"
+        ),
+        f"  wrap cache: {totals['wrap_hits']} hit(s), {totals['wrap_misses']} miss(es)",
+    ]
+
+    slow_files = find_slow_files(stats)
+    if slow_files:
+        lines.append("Slow files:")
+        lines.extend(
+            (
+                f"  {file.file}: {file.total_s:.3f}s (read {file.read_s:.3f}s, "
+                f"reflow {file.reflow_s:.3f}s, write {file.write_s:.3f}s, {file.lines} line(s))"
+            )
+            for file in slow_files
+        )
+
+    return "\n".join(lines)
+
+
+def build_report(stats: t.Sequence[FileStats]) -> dict[str, t.Any]:
+    """Build a JSON serializable report of the file stats, including totals & slow files."""
+    return {
+        "totals": _totals(stats),
+        "slow_files": [file.file for file in find_slow_files(stats)],
+        "files": [{**asdict(file), "total_s": file.total_s} for file in stats],
+    }
+
+
+def write_report(stats: t.Sequence[FileStats], out_file: Path) -> None:
+    """Write a JSON report of the provided file stats to the specified file."""
+    with out_file.open("w") as f:
+        json.dump(build_report(stats), f, indent=2)
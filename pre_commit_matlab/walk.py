@@ -0,0 +1,280 @@
+import os
+import re
+import typing as t
+from pathlib import Path
+
+MATLAB_SUFFIX = ".m"
+GITIGNORE_NAME = ".gitignore"
+
+# Directories that are never worth descending into
+_ALWAYS_SKIPPED = frozenset((".git",))
+
+
+class IgnorePattern(t.NamedTuple):
+    """
+    A single compiled `.gitignore`-style pattern.
+
+    `base` is the POSIX path, relative to the walk root, of the directory the pattern applies to,
+    and is empty for the walk root itself.
+    """
+
+    regex: re.Pattern[str]
+    base: str = ""
+    negate: bool = False
+    dir_only: bool = False
+
+
+def _translate_glob(glob: str) -> str:
+    """Translate a `.gitignore`-style glob into a regular expression, `**` included."""
+    parts = []
+    i = 0
+    n_chars = len(glob)
+    while i < n_chars:
+        char = glob[i]
+        if glob.startswith("**/", i):
+            # Leading or inner `**/` matches zero or more directories
+            parts.append("(?:.*/)?")
+            i += 2
+        elif glob.startswith("**", i) and i + 2 == n_chars:
+            parts.append(".*")
+            i += 1
+        elif char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = glob.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                contents = glob[i + 1 : end].replace("\\", "\\\\")
+                if contents.startswith("!"):
+                    contents = f"^{contents[1:]}"
+                parts.append(f"[{contents}]")
+                i = end
+        elif char == "\\" and i + 1 < n_chars:
+            i += 1
+            parts.append(re.escape(glob[i]))
+        else:
+            parts.append(re.escape(char))
+
+        i += 1
+
+    return "".join(parts)
+
+
+def compile_pattern(pattern: str, base: str = "") -> t.Optional[IgnorePattern]:
+    """
+    Compile the provided `.gitignore`-style pattern, relative to the provided `base` directory.
+
+    Returns `None` if the pattern is blank or a comment.
+
+    As with git, a pattern containing a non-trailing slash is anchored to its base directory, while
+    a pattern without one matches at any depth. A trailing slash restricts the pattern to
+    directories, and a leading `!` negates it.
+    """
+    pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        # Escaped leading `!` or `#`
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    anchored = "/" in pattern
+    regex = _translate_glob(pattern.lstrip("/"))
+    if not anchored:
+        regex = f"(?:.*/)?{regex}"
+
+    # A match on a directory also covers everything inside of it
+    return IgnorePattern(re.compile(f"{regex}(?:/.*)?", re.DOTALL), base, negate, dir_only)
+
+
+def is_ignored(rel_path: str, is_dir: bool, patterns: t.Sequence[IgnorePattern]) -> bool:
+    """
+    Check whether the provided POSIX path, relative to the walk root, is ignored by the patterns.
+
+    As with git, patterns are checked in order & the last matching pattern wins.
+    """
+    ignored = False
+    for pattern in patterns:
+        if pattern.dir_only and not is_dir:
+            continue
+
+        path = rel_path
+        if pattern.base:
+            if not rel_path.startswith(f"{pattern.base}/"):
+                continue
+            path = rel_path[len(pattern.base) + 1 :]
+
+        if pattern.regex.fullmatch(path):
+            ignored = not pattern.negate
+
+    return ignored
+
+
+def _read_gitignore(path: str, base: str) -> list[IgnorePattern]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    return [p for line in lines if (p := compile_pattern(line, base)) is not None]
+
+
+def _compile_exclude(exclude: t.Iterable[str]) -> list[IgnorePattern]:
+    return [p for pattern in exclude if (p := compile_pattern(pattern)) is not None]
+
+
+def _descend(
+    root: Path, rel_parts: t.Sequence[str], exclude: t.Iterable[str], honor_gitignore: bool
+) -> t.Optional[list[IgnorePattern]]:
+    """
+    Collect the patterns in effect for the directory beneath the root named by `rel_parts`.
+
+    Only the directories between the root & the target are checked, so only their `.gitignore`
+    files are read; the target's own `.gitignore` isn't included. Returns `None` if walking the root
+    wouldn't descend into the target.
+    """
+    patterns = _compile_exclude(exclude)
+    path = root
+    rel_path = ""
+    for name in rel_parts:
+        if honor_gitignore:
+            gitignore_path = os.path.join(path, GITIGNORE_NAME)
+            patterns = [*patterns, *_read_gitignore(gitignore_path, rel_path)]
+
+        path /= name
+        rel_path = f"{rel_path}/{name}" if rel_path else name
+        if name in _ALWAYS_SKIPPED or path.is_symlink() or is_ignored(rel_path, True, patterns):
+            return None
+
+    return patterns
+
+
+def _walk(
+    root: Path, exclude: t.Iterable[str], honor_gitignore: bool, start: t.Optional[Path] = None
+) -> t.Iterator[tuple[Path, bool]]:
+    """
+    Walk the provided root directory, see `walk_matlab_files` for details.
+
+    Yields `(path, is_dir)` for each directory descended into, the root included, before the files
+    found directly within it. If a `start` directory beneath the root is provided, only its part of
+    the walk is yielded.
+    """
+    rel_parts: t.Sequence[str] = ()
+    if start is not None:
+        try:
+            rel_parts = start.relative_to(root).parts
+        except ValueError:
+            return
+
+    patterns = _descend(root, rel_parts, exclude, honor_gitignore)
+    if patterns is None:
+        return
+
+    # Each entry is a directory to walk along with its path relative to the root & the patterns in
+    # effect for it
+    stack: list[tuple[str, str, list[IgnorePattern]]] = [
+        (os.fspath(root.joinpath(*rel_parts)), "/".join(rel_parts), patterns)
+    ]
+    while stack:
+        dir_path, rel_dir, patterns = stack.pop()
+        yield Path(dir_path), True
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        if honor_gitignore and any(entry.name == GITIGNORE_NAME for entry in entries):
+            gitignore_path = os.path.join(dir_path, GITIGNORE_NAME)
+            patterns = [*patterns, *_read_gitignore(gitignore_path, rel_dir)]
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in _ALWAYS_SKIPPED or is_ignored(rel_path, True, patterns):
+                        continue
+                    subdirs.append((entry.path, rel_path, patterns))
+                elif (
+                    entry.name.endswith(MATLAB_SUFFIX)
+                    and entry.is_file()
+                    and not is_ignored(rel_path, False, patterns)
+                ):
+                    yield Path(entry.path), False
+            except OSError:
+                continue
+
+        # Reversed so subdirectories are popped in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def walk_matlab_files(
+    root: Path, exclude: t.Iterable[str] = (), honor_gitignore: bool = True
+) -> t.Iterator[Path]:
+    """
+    Recursively yield the MATLAB files (`*.m`) beneath the provided root directory.
+
+    Files are yielded as they're discovered, in a deterministic order. `exclude` patterns use
+    `.gitignore` syntax, relative to `root`. If `honor_gitignore` is `True`, any `.gitignore` files
+    found while walking are also applied to their respective directories. Ignored directories &
+    `.git` directories are never descended into, and symlinked directories aren't followed.
+    """
+    return (path for path, is_dir in _walk(root, exclude, honor_gitignore) if not is_dir)
+
+
+def walk_matlab_dirs(
+    root: Path,
+    exclude: t.Iterable[str] = (),
+    honor_gitignore: bool = True,
+    start: t.Optional[Path] = None,
+) -> t.Iterator[Path]:
+    """
+    Recursively yield the directories, the root included, that `walk_matlab_files` descends into.
+
+    Directories are yielded in the same order they're walked by `walk_matlab_files`. If a `start`
+    directory beneath the root is provided, only it & the directories beneath it are yielded, as
+    they'd be walked from the root, so nothing is yielded if the walk wouldn't descend into it.
+    """
+    return (path for path, is_dir in _walk(root, exclude, honor_gitignore, start) if is_dir)
+
+
+def is_walked(
+    root: Path, file: Path, exclude: t.Iterable[str] = (), honor_gitignore: bool = True
+) -> bool:
+    """
+    Check whether `walk_matlab_files` would yield the provided file when walking the root directory.
+
+    Rather than walking the whole tree, only the directories between the root & the file are
+    checked, so only their `.gitignore` files are read.
+    """
+    try:
+        rel_parts = file.relative_to(root).parts
+    except ValueError:
+        return False
+
+    if not rel_parts or not file.name.endswith(MATLAB_SUFFIX) or not file.is_file():
+        return False
+
+    dir_parts = rel_parts[:-1]
+    patterns = _descend(root, dir_parts, exclude, honor_gitignore)
+    if patterns is None:
+        return False
+
+    if honor_gitignore:
+        gitignore_path = os.path.join(root.joinpath(*dir_parts), GITIGNORE_NAME)
+        patterns = [*patterns, *_read_gitignore(gitignore_path, "/".join(dir_parts))]
+
+    return not is_ignored("/".join(rel_parts), False, patterns)
@@ -0,0 +1,257 @@
+import ctypes
+import itertools
+import os
+import select
+import struct
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+from pre_commit_matlab.walk import MATLAB_SUFFIX, is_walked, walk_matlab_dirs, walk_matlab_files
+
+# Changes are only reported once no further changes have been seen for this long, in seconds, so
+# bursts of events from a single save (e.g. write, then rename into place) are reflowed once
+DEFAULT_DEBOUNCE_S = 0.2
+
+# How often, in seconds, the tree is rescanned for changes when inotify isn't available
+DEFAULT_POLL_INTERVAL_S = 1.0
+
+# inotify event flags, see inotify(7)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_DIR_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_ONLYDIR
+
+# Fixed size header of each inotify event: watch descriptor, mask, cookie, & length of the name
+_EVENT_HEADER = struct.Struct("iIII")
+
+_READ_SIZE = 64 * 1024
+
+
+class Watcher(t.Protocol):
+    """Source of changes to the MATLAB files being watched."""
+
+    def wait(self, timeout: t.Optional[float] = None) -> set[Path]:
+        """
+        Wait for watched files to be created or modified, returning the files that changed.
+
+        Blocks until at least one file changes, or until `timeout` seconds have passed, in which
+        case an empty set may be returned. If `timeout` is `None`, waits indefinitely.
+        """
+        ...
+
+    def close(self) -> None:  # noqa: D102
+        ...
+
+
+def _split_paths(paths: t.Iterable[Path]) -> tuple[list[Path], list[Path]]:
+    roots: list[Path] = []
+    files: list[Path] = []
+    for path in paths:
+        (roots if path.is_dir() else files).append(path)
+
+    return roots, files
+
+
+class PollingWatcher:
+    """
+    Portable `Watcher` that periodically rescans the watched paths.
+
+    Files discovered by walking a directory are subject to the `exclude` patterns & any `.gitignore`
+    files, see `walk_matlab_files` for details, while explicitly provided files are always watched.
+    A file is considered changed if its modification time, size, or inode differs from the previous
+    scan.
+    """
+
+    def __init__(
+        self,
+        paths: t.Iterable[Path],
+        exclude: t.Iterable[str] = (),
+        interval: float = DEFAULT_POLL_INTERVAL_S,
+    ) -> None:
+        self._roots, self._files = _split_paths(paths)
+        self._exclude = list(exclude)
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int, int]]:
+        snapshot = {}
+        walked = (walk_matlab_files(root, self._exclude) for root in self._roots)
+        for file in itertools.chain(self._files, *walked):
+            try:
+                st = file.stat()
+            except OSError:
+                continue
+            snapshot[file] = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+        return snapshot
+
+    def wait(self, timeout: t.Optional[float] = None) -> set[Path]:  # noqa: D102
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self._interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+
+            snapshot = self._scan()
+            changed = {
+                file for file, stamp in snapshot.items() if self._snapshot.get(file) != stamp
+            }
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:  # noqa: D102
+        return
+
+
+class InotifyWatcher:
+    """
+    Linux `Watcher` using inotify, via `ctypes`, so changes are seen without rescanning the tree.
+
+    Every directory walked beneath the watched directories is watched, along with the directory of
+    each explicitly provided file; see `PollingWatcher` for which files are reported. Directories
+    created after watching starts are watched as they appear.
+
+    An `OSError` is raised if inotify isn't available.
+    """
+
+    def __init__(self, paths: t.Iterable[Path], exclude: t.Iterable[str] = ()) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        try:
+            self._libc = ctypes.CDLL(None, use_errno=True)
+            inotify_init1 = self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify is unavailable: {e}") from e
+
+        fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._fd = fd
+
+        self._roots, files = _split_paths(paths)
+        self._files = set(files)
+        self._exclude = list(exclude)
+        self._dirs: dict[int, Path] = {}
+        try:
+            for root in self._roots:
+                for dir_path in walk_matlab_dirs(root, self._exclude):
+                    self._add_watch(dir_path)
+            for file in self._files:
+                self._add_watch(file.parent)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, dir_path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _DIR_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Can't watch '{dir_path}': {os.strerror(errno)}")
+
+        self._dirs[wd] = dir_path
+
+    def _is_watched(self, file: Path) -> bool:
+        if file in self._files:
+            return True
+
+        return any(is_walked(root, file, self._exclude) for root in self._roots)
+
+    def _added_dir(self, dir_path: Path) -> set[Path]:
+        """
+        Watch a directory that appeared after watching started, returning any files within it.
+
+        The directory & those beneath it are filtered as if walked from the watched directories, so
+        ignored trees, e.g. build output, don't use up watches.
+        """
+        found: set[Path] = set()
+        walked = (walk_matlab_dirs(root, self._exclude, start=dir_path) for root in self._roots)
+        for path in itertools.chain.from_iterable(walked):
+            try:
+                self._add_watch(path)
+            except OSError:
+                # Already removed again
+                continue
+
+            # Its files may have been written before the watch was in place
+            found.update(path.glob(f"*{MATLAB_SUFFIX}"))
+
+        return found
+
+    def _rescan(self) -> set[Path]:
+        """Report every watched file, since events were dropped by the kernel."""
+        walked = (walk_matlab_files(root, self._exclude) for root in self._roots)
+        return {*self._files, *itertools.chain.from_iterable(walked)}
+
+    def wait(self, timeout: t.Optional[float] = None) -> set[Path]:  # noqa: D102
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        candidates = set()
+        try:
+            while data := os.read(self._fd, _READ_SIZE):
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    name = data[offset : offset + name_len].rstrip(b"\0")
+                    offset += name_len
+
+                    if mask & _IN_Q_OVERFLOW:
+                        candidates.update(self._rescan())
+                    elif mask & _IN_IGNORED:
+                        self._dirs.pop(wd, None)
+                    elif wd in self._dirs and name:
+                        path = self._dirs[wd] / os.fsdecode(name)
+                        if mask & _IN_ISDIR:
+                            candidates.update(self._added_dir(path))
+                        elif not mask & _IN_CREATE:
+                            candidates.add(path)
+        except BlockingIOError:
+            pass
+
+        return {path for path in candidates if self._is_watched(path)}
+
+    def close(self) -> None:  # noqa: D102
+        if self._fd != -1:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths: t.Iterable[Path], exclude: t.Iterable[str] = ()) -> Watcher:
+    """Watch the provided paths using inotify where available, otherwise by polling."""
+    paths = list(paths)
+    try:
+        return InotifyWatcher(paths, exclude)
+    except OSError:
+        return PollingWatcher(paths, exclude)
+
+
+def iter_changes(watcher: Watcher, debounce: float = DEFAULT_DEBOUNCE_S) -> t.Iterator[list[Path]]:
+    """
+    Yield batches of changed files from the provided watcher, in sorted order.
+
+    A batch is only yielded once `debounce` seconds pass without any further changes, so a burst of
+    changes, e.g. saving many files at once, is gathered into a single batch, with each file
+    reported once no matter how many times it changed.
+    """
+    pending: set[Path] = set()
+    while True:
+        changed = watcher.wait(debounce if pending else None)
+        if changed:
+            pending |= changed
+        elif pending:
+            yield sorted(pending)
+            pending = set()
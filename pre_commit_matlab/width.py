@@ -0,0 +1,85 @@
+import bisect
+import functools
+import sys
+import unicodedata
+from pathlib import Path
+
+from pre_commit_matlab._width_table import WIDTHS, WIDTH_STARTS
+
+# Hangul Jamo medial vowels & final consonants combine with the preceding initial consonant
+_JAMO_COMBINING = range(0x1160, 0x1200)
+
+# Unassigned code points in these planes are reserved for ideographs, which are wide
+_IDEOGRAPHIC_PLANES = range(0x20000, 0x3FFFE)
+
+
+@functools.cache
+def char_width(char: str) -> int:
+    """
+    Look up the number of terminal columns taken up by the provided character.
+
+    Combining marks & invisible formatting characters take up no columns, East Asian Wide &
+    Fullwidth characters (CJK text & most emoji) take up two, and all other characters take up one.
+    """
+    return WIDTHS[bisect.bisect_right(WIDTH_STARTS, ord(char)) - 1]
+
+
+def text_width(text: str) -> int:
+    """
+    Measure the number of terminal columns taken up by the provided text, see `char_width`.
+
+    ASCII text is measured by its length, without consulting the width table.
+    """
+    if text.isascii():
+        return len(text)
+
+    return sum(map(char_width, text))
+
+
+def _unicode_width(code_point: int) -> int:
+    """Derive a code point's width from the Unicode database, see `char_width`."""
+    char = chr(code_point)
+    category = unicodedata.category(char)
+    if category == "Cn":
+        # Unassigned, so follow the preceding range unless reserved for ideographs
+        return 2 if code_point in _IDEOGRAPHIC_PLANES else -1
+    if code_point in _JAMO_COMBINING or category in ("Mn", "Me"):
+        return 0
+    if category == "Cf" and char != "\xad":  # Soft hyphens are displayed when breaking a line
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+
+    return 1
+
+
+def generate_table() -> str:
+    """Generate the source of the `_width_table` module from the running Python's Unicode data."""
+    starts: list[int] = []
+    widths: list[int] = []
+    for code_point in range(sys.maxunicode + 1):
+        width = _unicode_width(code_point)
+        if width != -1 and (not widths or width != widths[-1]):
+            starts.append(code_point)
+            widths.append(width)
+
+    starts_src = "\n".join(
+        f"    {' '.join(f'0x{start:X},' for start in starts[idx : idx + 10])}"
+        for idx in range(0, len(starts), 10)
+    )
+    widths_src = "\n".join(
+        f"    {' '.join(f'{width},' for width in widths[idx : idx + 32])}"
+        for idx in range(0, len(widths), 32)
+    )
+    return (
+        "# Generated by `python -m pre_commit_matlab.width`, do not edit\n"
+        "# Code points from WIDTH_STARTS[i] up to WIDTH_STARTS[i + 1] are WIDTHS[i] columns wide\n"
+        "# fmt: off\n"
+        f'UNICODE_VERSION = "{unicodedata.unidata_version}"\n\n'
+        f"WIDTH_STARTS = (\n{starts_src}\n)\n\n"
+        f"WIDTHS = (\n{widths_src}\n)\n"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    Path(__file__).with_name("_width_table.py").write_text(generate_table())
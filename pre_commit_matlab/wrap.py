@@ -0,0 +1,171 @@
+import re
+import typing as t
+
+from pre_commit_matlab.width import char_width, text_width
+
+# textwrap expands tabs, then converts any remaining ASCII whitespace character to a space before
+# splitting on runs of spaces
+_WHITESPACE_TRANS = str.maketrans("\n\x0b\x0c\r", "    ")
+_SPACE_RUN_RE = re.compile(r"( +)")
+
+
+def _wrap_words(
+    words: list[str], lead_space: bool, width: int, initial_indent: str, subsequent_indent: str
+) -> list[str]:
+    """
+    Greedily wrap single space separated words that are all guaranteed to fit on a line.
+
+    If `lead_space` is `True`, the text began with a single space, which is retained on the first
+    line if the first word still fits alongside it.
+    """
+    lines = []
+    indent = initial_indent
+    avail = width - len(initial_indent)
+
+    cur_line = [words[0]]
+    cur_len = len(words[0])
+    if lead_space and cur_len < avail:
+        cur_line[0] = f" {cur_line[0]}"
+        cur_len += 1
+
+    for word in words[1:]:
+        word_len = len(word)
+        if cur_len + word_len < avail:  # Account for the separating space
+            cur_line.append(word)
+            cur_len += word_len + 1
+        else:
+            lines.append(f"{indent}{' '.join(cur_line)}")
+            indent = subsequent_indent
+            avail = width - len(subsequent_indent)
+            cur_line = [word]
+            cur_len = word_len
+
+    lines.append(f"{indent}{' '.join(cur_line)}")
+    return lines
+
+
+def _fit_width(chunk: str, width: int) -> int:
+    """Count the leading characters of the provided chunk that fit within the display width."""
+    n_chars = 0
+    for char in chunk:
+        width -= char_width(char)
+        if width < 0:
+            break
+        n_chars += 1
+
+    return n_chars
+
+
+def _wrap_chunks(
+    chunks: list[str],
+    width: int,
+    initial_indent: str,
+    subsequent_indent: str,
+    display_width: bool = False,
+) -> list[str]:
+    """
+    Greedily wrap a sequence of word & whitespace chunks, mirroring `textwrap.TextWrapper`.
+
+    Whitespace chunks are dropped from the beginning & end of every line except the beginning of the
+    first line, and chunks too long to fit on any line are broken at the line boundary.
+
+    If `display_width` is `True`, chunks are measured in terminal columns rather than characters,
+    see `text_width`.
+    """
+    measure = text_width if display_width else len
+    lines: list[str] = []
+    n_chunks = len(chunks)
+    idx = 0
+    while idx < n_chunks:
+        indent = subsequent_indent if lines else initial_indent
+        avail = width - len(indent)
+
+        if lines and not chunks[idx].strip():
+            idx += 1
+
+        start = idx
+        cur_len = 0
+        while idx < n_chunks:
+            chunk_len = measure(chunks[idx])
+            if cur_len + chunk_len > avail:
+                break
+
+            cur_len += chunk_len
+            idx += 1
+
+        cur_line = chunks[start:idx]
+        if idx < n_chunks and measure(chunks[idx]) > avail:
+            # Chunk can't fit on any line, so put as much of it onto this line as will fit
+            # Make sure at least one character is taken if the indent is wider than the line
+            space_left = 1 if avail < 1 else avail - cur_len
+            chunk = chunks[idx]
+            if display_width:
+                space_left = _fit_width(chunk, space_left)
+                if not cur_line:
+                    # Likewise if the chunk's first character is wider than the line
+                    space_left = max(space_left, 1)
+            cur_line.append(chunk[:space_left])
+            chunks[idx] = chunk[space_left:]
+
+        if cur_line and not cur_line[-1].strip():
+            del cur_line[-1]
+
+        if cur_line:
+            lines.append(f"{indent}{''.join(cur_line)}")
+
+    return lines
+
+
+def wrap_simple(
+    text: str, width: int, initial_indent: str = "", subsequent_indent: str = ""
+) -> t.Optional[list[str]]:
+    """
+    Wrap the provided text like `wrap`, if it's simple enough to take the fast path.
+
+    Simple text is the typical comment: printable ASCII words separated by single spaces, each short
+    enough to fit on a line, so no whitespace needs munging & no words need breaking. Joining the
+    wrapped lines' text with single spaces reproduces it exactly. Returns `None` for any other text.
+    """
+    if text.isascii() and text.isprintable() and "  " not in text and not text.endswith(" "):
+        lead_space = text.startswith(" ")
+        words = text[1:].split(" ") if lead_space else text.split(" ")
+        min_avail = width - max(len(initial_indent), len(subsequent_indent))
+        if words[0] and max(map(len, words)) <= min_avail:
+            return _wrap_words(words, lead_space, width, initial_indent, subsequent_indent)
+
+    return None
+
+
+def wrap(
+    text: str,
+    width: int,
+    initial_indent: str = "",
+    subsequent_indent: str = "",
+    display_width: bool = False,
+) -> list[str]:
+    """
+    Greedily wrap the provided text to the specified width, returning the wrapped lines.
+
+    Output is identical to `textwrap.wrap` with `break_on_hyphens=False` & all other options left at
+    their defaults, without the overhead of building a `TextWrapper` or its regex based chunking.
+    Lines are never broken on hyphens, and words too long to fit on any line are broken at the line
+    boundary.
+
+    If `display_width` is `True`, non-ASCII text is measured in terminal columns rather than
+    characters, so wide (e.g. CJK) & zero width (e.g. combining) characters don't push lines past
+    the width. See `text_width` for details. ASCII text is wrapped identically either way.
+    """
+    if width <= 0:
+        raise ValueError(f"invalid width {width!r} (must be > 0)")
+
+    lines = wrap_simple(text, width, initial_indent, subsequent_indent)
+    if lines is not None:
+        return lines
+
+    if "\t" in text:
+        text = text.expandtabs()
+    text = text.translate(_WHITESPACE_TRANS)
+    chunks = [chunk for chunk in _SPACE_RUN_RE.split(text) if chunk]
+    return _wrap_chunks(
+        chunks, width, initial_indent, subsequent_indent, display_width and not text.isascii()
+    )
@@ -0,0 +1,25 @@
+import random
+
+from benchmarks.bench_reflow import BenchResult, find_regressions
+from benchmarks.corpus import CorpusSpec, generate_source
+
+SPEC = CorpusSpec("test", n_files=1, lines_per_file=200, comment_density=0.5, block_density=0.5)
+
+
+def test_corpus_deterministic() -> None:
+    assert generate_source(random.Random(0), SPEC) == generate_source(random.Random(0), SPEC)
+
+
+def test_corpus_contains_comment_kinds() -> None:
+    src = generate_source(random.Random(0), SPEC)
+    assert "%{" in src
+    assert "\n%" in src or "  %" in src
+
+
+def test_find_regressions() -> None:
+    res = BenchResult("memory", "test", "opts", 1, 1000, seconds=2.0, peak_mem_bytes=100)
+    baseline = {res.key: {"n_lines": 1000, "seconds": 1.0, "peak_mem_bytes": 50}}
+
+    regressions = find_regressions([res], baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert not find_regressions([res], baseline, threshold=2.0)
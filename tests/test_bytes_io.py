@@ -0,0 +1,134 @@
+import codecs
+import itertools
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments, source_io
+from pre_commit_matlab.matlab_reflow_comments import (
+    ReflowOptions,
+    process_file,
+    reflow_bytes,
+    reflow_source,
+)
+from pre_commit_matlab.stats import FileStats
+
+OPTIONS = ReflowOptions(line_length=40)
+
+DIRTY_SRC = dedent(
+    """\
+    function y = façade(x)
+    % Compute the façade of the château, which is naïve
+    % but Åland & à la carte
+    y = x;  % Trailing é
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, OPTIONS)
+
+
+@pytest.mark.parametrize("newline", ("\n", "\r\n", "\r"))
+def test_newline_preserved(newline: str) -> None:
+    src = DIRTY_SRC.replace("\n", newline).encode()
+    assert reflow_bytes(src, OPTIONS) == CLEAN_SRC.replace("\n", newline).encode()
+
+
+@pytest.mark.parametrize("encoding", ("utf-8", "latin-1", "cp1252"))
+def test_encoding_preserved(encoding: str) -> None:
+    src = DIRTY_SRC.encode(encoding)
+    assert reflow_bytes(src, OPTIONS, encoding=encoding) == CLEAN_SRC.encode(encoding)
+
+
+def test_utf8_continuation_bytes() -> None:
+    # "Å" & "à" end in 0x85 & 0xA0, which are whitespace when viewed as latin-1
+    src = "% Å\n% à\n% ÅÅ à\n".encode()
+    assert reflow_bytes(src, OPTIONS) == "% Å à ÅÅ à\n".encode()
+
+
+def test_capital_handling_non_ascii() -> None:
+    options = ReflowOptions(line_length=40, alternate_capital_handling=True)
+    src = "% first line\n% Élan starts a new run\n% élan doesn't\n"
+    assert reflow_bytes(src.encode(), options) == reflow_source(src, options).encode()
+
+
+NON_ASCII_INDENT_CASES = (
+    ("%\xa0 %} %} Éclair\n", "utf-8"),
+    ("%\xa0Éclair, château, & naïve\n% façade\n", "utf-8"),
+    ("%\u2003\u2003 indented words here\n% more\n", "utf-8"),
+    ("%\xa0\n% a\n", "cp1252"),
+    ("%\xa0 Éclair, château, & naïve\n% façade\n", "cp1252"),
+    ("%… not indented at all\n% words\n", "cp1252"),
+)
+
+
+@pytest.mark.parametrize(("src", "encoding"), NON_ASCII_INDENT_CASES)
+def test_non_ascii_inner_indent(src: str, encoding: str) -> None:
+    # Viewed as latin-1, a UTF-8 no-break space isn't whitespace while cp1252's ellipsis is
+    for flags in itertools.product((True, False), repeat=3):
+        options = ReflowOptions(12, *flags)
+        reflowed = reflow_bytes(src.encode(encoding), options, encoding=encoding)
+        assert reflowed == reflow_source(src, options).encode(encoding), flags
+
+
+def test_code_passed_through() -> None:
+    # Code isn't decoded, so bytes that are invalid in every encoding are left untouched
+    src = b"x = '\xff\xfe\x80';\n% short comment\n"
+    assert reflow_bytes(src, OPTIONS, encoding="utf-8") == src
+
+
+@pytest.mark.parametrize("bom", (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF32_BE))
+def test_bom_preserved(bom: bytes) -> None:
+    encoding = {
+        codecs.BOM_UTF8: "utf-8",
+        codecs.BOM_UTF16_LE: "utf-16-le",
+        codecs.BOM_UTF32_BE: "utf-32-be",
+    }[bom]
+    src = bom + DIRTY_SRC.replace("\n", "\r\n").encode(encoding)
+    truth_src = bom + CLEAN_SRC.replace("\n", "\r\n").encode(encoding)
+    assert reflow_bytes(src, OPTIONS) == truth_src
+
+
+def test_reflow_bytes_stats() -> None:
+    stats = FileStats()
+    reflow_bytes(DIRTY_SRC.replace("\n", "\r\n").encode(), OPTIONS, stats=stats)
+    assert stats.lines == 4
+    assert stats.runs_flushed == 1
+
+
+@pytest.mark.parametrize("mmap_threshold", (0, source_io.MMAP_THRESHOLD))
+def test_process_file_bytes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mmap_threshold: int
+) -> None:
+    monkeypatch.setattr(source_io, "MMAP_THRESHOLD", mmap_threshold)
+
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_bytes(DIRTY_SRC.replace("\n", "\r\n").encode("latin-1"))
+    truth_src = CLEAN_SRC.replace("\n", "\r\n").encode("latin-1")
+
+    stats = FileStats()
+    assert process_file(sample_file, 40, True, False, True, stats=stats)
+    assert sample_file.read_bytes() == truth_src
+    assert stats.bytes_written == len(truth_src)
+
+    assert not process_file(sample_file, 40, True, False, True)
+
+
+def test_encoding_cli(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_bytes(DIRTY_SRC.encode("cp1252"))
+
+    argv = ["--line-length=40", "--encoding=cp1252", str(sample_file)]
+    assert matlab_reflow_comments.main(["--check", *argv]) == 1
+    assert capsys.readouterr().out == f"{sample_file}:2: would reflow comments\n"
+
+    assert matlab_reflow_comments.main(["--diff", *argv]) == 1
+    assert "+% Compute the façade of the" in capsys.readouterr().out
+
+    assert matlab_reflow_comments.main(argv) == 1
+    assert sample_file.read_bytes() == CLEAN_SRC.encode("cp1252")
+
+
+def test_encoding_cli_unknown(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--encoding=not-a-codec", str(tmp_path / "sample_src.m")])
@@ -0,0 +1,56 @@
+import os
+from dataclasses import astuple
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.cache import ReflowCache
+
+DIRTY_SRC = dedent(
+    """\
+    % XBMINI is a MATLAB class definition providing the user with a set of
+    % methods to parse and analyze raw data files output by GCDC XBmini
+    % datalogger
+    """
+)
+
+OPTIONS = matlab_reflow_comments.ReflowOptions(line_length=100)
+
+
+def test_key_depends_on_options(tmp_path: Path) -> None:
+    cache = ReflowCache(tmp_path)
+    assert cache.key(b"% a", astuple(OPTIONS)) != cache.key(b"% a", (50, True, False, True))
+    assert cache.key(b"% a", astuple(OPTIONS)) != cache.key(b"% b", astuple(OPTIONS))
+
+
+def test_hit_skips_processing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ReflowCache(tmp_path / "cache")
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    outcome = matlab_reflow_comments._process_one(sample_file, OPTIONS, cache=cache)
+    assert outcome.changed
+
+    # Reflowed contents should now be recorded as clean, so processing is skipped
+    def _fail(*args: object) -> bool:
+        raise AssertionError("reflow should not run on a cache hit")
+
+    monkeypatch.setattr(matlab_reflow_comments, "_reflow_data", _fail)
+    outcome = matlab_reflow_comments._process_one(sample_file, OPTIONS, cache=cache)
+    assert not outcome.changed
+    assert outcome.error is None
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    cache = ReflowCache(tmp_path, max_entries=2)
+    for idx, key in enumerate(("a", "b", "c")):
+        cache.mark_clean(key)
+        os.utime(tmp_path / key, (idx, idx))
+
+    # Touching the oldest entry should protect it from eviction
+    assert cache.is_clean("a")
+    cache.evict()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
@@ -0,0 +1,100 @@
+import io
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import (
+    ReflowOptions,
+    _stream_find_first_change,
+    find_first_change,
+    reflow_source,
+)
+
+DIRTY_SRC = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    h.fig = figure;
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure data and
+    % prompts the user to window the region of the plot where the
+    % sensor is at ground level.
+    end
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, ReflowOptions(line_length=100))
+
+FIRST_CHANGE_CASES = (
+    (DIRTY_SRC, 3),
+    (CLEAN_SRC, None),
+    (CLEAN_SRC.rstrip("\n"), 5),
+    (f"{CLEAN_SRC}%\n%", 7),
+    ("", None),
+)
+
+
+@pytest.mark.parametrize(("src", "truth_line_no"), FIRST_CHANGE_CASES)
+def test_find_first_change(src: str, truth_line_no: int) -> None:
+    assert find_first_change(src, ReflowOptions(line_length=100)) == truth_line_no
+
+
+@pytest.mark.parametrize(("src", "truth_line_no"), FIRST_CHANGE_CASES)
+def test_stream_find_first_change(src: str, truth_line_no: int) -> None:
+    options = ReflowOptions(line_length=100)
+    assert _stream_find_first_change(io.StringIO(src), options) == truth_line_no
+
+
+@pytest.mark.parametrize("stream", (False, True))
+def test_check(tmp_path: Path, capsys: pytest.CaptureFixture, stream: bool) -> None:
+    dirty_file = tmp_path / "dirty.m"
+    dirty_file.write_text(DIRTY_SRC)
+    clean_file = tmp_path / "clean.m"
+    clean_file.write_text(CLEAN_SRC)
+
+    argv = ["--line-length=100", "--check", str(dirty_file), str(clean_file)]
+    if stream:
+        argv.append("--stream")
+
+    assert matlab_reflow_comments.main(argv) == 1
+    assert capsys.readouterr().out == f"{dirty_file}:3: would reflow comments\n"
+    assert dirty_file.read_text() == DIRTY_SRC
+
+    assert matlab_reflow_comments.main(["--line-length=100", "--check", str(clean_file)]) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_diff(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    dirty_file = tmp_path / "dirty.m"
+    dirty_file.write_text(DIRTY_SRC)
+
+    assert matlab_reflow_comments.main(["--line-length=100", "--diff", str(dirty_file)]) == 1
+    diff = capsys.readouterr().out
+    assert dirty_file.read_text() == DIRTY_SRC
+
+    assert diff.startswith(f"--- a/{dirty_file.as_posix()}\n+++ b/{dirty_file.as_posix()}\n")
+    assert "-% sensor is at ground level.\n" in diff
+    assert "+% sensor is at ground level.\n" not in diff
+
+
+def test_diff_missing_eof_newline(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text("x = 1;")
+
+    assert matlab_reflow_comments.main(["--diff", str(sample_file)]) == 1
+    assert capsys.readouterr().out.endswith("-x = 1;\n\\ No newline at end of file\n+x = 1;\n")
+
+
+@pytest.mark.parametrize(
+    ("flag", "truth_out"),
+    (
+        ("--check", "-:3: would reflow comments\n"),
+        ("--diff", "--- a/-\n"),
+    ),
+)
+def test_check_stdin(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture, flag: str, truth_out: str
+) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO(DIRTY_SRC))
+    assert matlab_reflow_comments.main(["--line-length=100", flag, "-"]) == 1
+    assert capsys.readouterr().out.startswith(truth_out)
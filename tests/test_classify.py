@@ -0,0 +1,98 @@
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab.matlab_reflow_comments import (
+    LineKind,
+    ReflowOptions,
+    _classify_text,
+    classify_lines,
+)
+
+SAMPLE_SRC = dedent(
+    """\
+    function foo(bar)
+    % Some comment
+    %   Indented comment
+    %
+    x = 1;  % Trailing comment
+      % an indented comment line
+    %{
+      Block comment body
+    %}
+    end
+    """
+)
+
+TRUTH_KINDS = [
+    LineKind.CODE,
+    LineKind.CAPITAL_COMMENT,
+    LineKind.INDENTED_COMMENT,
+    LineKind.BLANK_COMMENT,
+    LineKind.CODE,
+    LineKind.COMMENT,
+    LineKind.BLOCK_OPEN,
+    LineKind.BLOCK_BODY,
+    LineKind.BLOCK_CLOSE,
+    LineKind.CODE,
+]
+
+
+def test_classify_lines() -> None:
+    options = ReflowOptions(alternate_capital_handling=True)
+    classified = list(classify_lines(SAMPLE_SRC.splitlines(), options))
+
+    assert [kind for kind, *_ in classified] == TRUTH_KINDS
+    assert classified[5][2:] == (2, " an indented comment line")
+    assert classified[7][2:] == (2, "Block comment body")
+
+
+def test_classify_lines_no_block_reflow() -> None:
+    options = ReflowOptions(reflow_block_comments=False)
+    kinds = [kind for kind, *_ in classify_lines(SAMPLE_SRC.splitlines(), options)]
+
+    # Without block reflow the delimiters are plain comments & the body is code
+    assert kinds[6:9] == [LineKind.BLANK_COMMENT, LineKind.CODE, LineKind.BLANK_COMMENT]
+
+
+def _split_code_runs(classified: list) -> list:
+    """Split `_classify_text`'s joined code runs back out into their individual lines."""
+    split: list[tuple[LineKind, str, int, str]] = []
+    for kind, line, indent, content in classified:
+        if kind is LineKind.CODE:
+            split.extend((kind, code_line, 0, "") for code_line in line.split("\n"))
+        else:
+            split.append((kind, line, indent, content))
+
+    return split
+
+
+def _normalize_code_indent(classified: list) -> list:
+    """Zero out the indentation of code lines, which `_classify_text` doesn't compute."""
+    return [
+        (kind, line, 0 if kind is LineKind.CODE else indent, content)
+        for kind, line, indent, content in classified
+    ]
+
+
+CLASSIFY_TEXT_CASES = (
+    SAMPLE_SRC,
+    SAMPLE_SRC.rstrip("\n"),
+    "",
+    "\n\n",
+    "x = 1;\ny = 2;\n",
+    "%{\nunterminated block\n\n",
+    "%}\n% stray close\n",
+    "a = '%';\n  b = 2; % not a comment line\n% comment\n",
+    "a\x0cb\n% form feed falls back to splitlines\n",
+)
+
+
+@pytest.mark.parametrize("src", CLASSIFY_TEXT_CASES)
+@pytest.mark.parametrize("reflow_block_comments", (True, False))
+def test_classify_text_matches_classify_lines(src: str, reflow_block_comments: bool) -> None:
+    options = ReflowOptions(reflow_block_comments=reflow_block_comments)
+
+    from_text = _split_code_runs(list(_classify_text(src, options)))
+    from_lines = list(classify_lines(src.splitlines(), options))
+    assert from_text == _normalize_code_indent(from_lines)
@@ -0,0 +1,159 @@
+import http.client
+import io
+import threading
+import typing as t
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import client, matlab_reflow_comments
+from pre_commit_matlab.daemon import ReflowServer, parse_options
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+
+DIRTY_SRC = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure data and
+    % prompts the user to window the region of the plot where the
+    % sensor is at ground level.
+    h.fig = figure;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, ReflowOptions(line_length=100))
+
+
+@pytest.fixture
+def daemon_url() -> t.Iterator[str]:
+    server = ReflowServer(port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+
+    host, port = server.server_address[:2]
+    assert isinstance(host, str)
+    yield f"http://{host}:{port}"
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _post(url: str, src: str, headers: dict[str, str]) -> http.client.HTTPResponse:
+    conn = http.client.HTTPConnection(url.removeprefix("http://"))
+    conn.request("POST", "/", body=src.encode(), headers=headers)
+    return conn.getresponse()
+
+
+PARSE_OPTIONS_CASES: tuple[tuple[dict[str, str], ReflowOptions], ...] = (
+    ({}, ReflowOptions()),
+    ({"X-Line-Length": "100"}, ReflowOptions(line_length=100)),
+    ({"X-Ignore-Indented": "false"}, ReflowOptions(ignore_indented=False)),
+    ({"X-Alternate-Capital-Handling": "1"}, ReflowOptions(alternate_capital_handling=True)),
+    ({"X-Reflow-Block-Comments": "No"}, ReflowOptions(reflow_block_comments=False)),
+    ({"X-Display-Width": "yes"}, ReflowOptions(display_width=True)),
+)
+
+
+@pytest.mark.parametrize(("headers", "truth_options"), PARSE_OPTIONS_CASES)
+def test_parse_options(headers: dict[str, str], truth_options: ReflowOptions) -> None:
+    assert parse_options(headers) == truth_options
+
+
+@pytest.mark.parametrize("headers", ({"X-Line-Length": "wide"}, {"X-Ignore-Indented": "maybe"}))
+def test_parse_options_invalid(headers: dict[str, str]) -> None:
+    with pytest.raises(ValueError):
+        parse_options(headers)
+
+
+@pytest.mark.parametrize(
+    ("src", "truth_status", "truth_body"),
+    (
+        (DIRTY_SRC, 200, CLEAN_SRC),
+        (CLEAN_SRC, 204, ""),
+    ),
+)
+def test_daemon_reflow(daemon_url: str, src: str, truth_status: int, truth_body: str) -> None:
+    response = _post(daemon_url, src, {"X-Line-Length": "100"})
+    assert response.status == truth_status
+    assert response.read().decode() == truth_body
+
+
+def test_daemon_bad_request(daemon_url: str) -> None:
+    response = _post(daemon_url, DIRTY_SRC, {"X-Line-Length": "wide"})
+    assert response.status == 400
+    assert b"X-Line-Length" in response.read()
+
+
+def test_client(tmp_path: Path, daemon_url: str) -> None:
+    dirty_file = tmp_path / "dirty.m"
+    dirty_file.write_text(DIRTY_SRC)
+    clean_file = tmp_path / "clean.m"
+    clean_file.write_text(CLEAN_SRC)
+
+    argv = [f"--daemon-url={daemon_url}", "--line-length=100", str(dirty_file), str(clean_file)]
+    assert client.main(argv) == 1
+    assert dirty_file.read_text() == CLEAN_SRC
+    assert clean_file.read_text() == CLEAN_SRC
+
+    assert client.main(argv) == 0
+    assert sorted(tmp_path.iterdir()) == [clean_file, dirty_file]
+
+
+@pytest.mark.parametrize(
+    ("newline", "encoding"), (("\r\n", "utf-8"), ("\n", "latin-1"), ("\r\n", "cp1252"))
+)
+def test_client_preserves_encoding(
+    tmp_path: Path, daemon_url: str, newline: str, encoding: str
+) -> None:
+    src = DIRTY_SRC.replace("raw", "brute, café").replace("\n", newline).encode(encoding)
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_bytes(src)
+
+    truth_file = tmp_path / "truth_src.m"
+    truth_file.write_bytes(src)
+    assert matlab_reflow_comments.main(["--line-length=100", str(truth_file)]) == 1
+
+    assert client.main([f"--daemon-url={daemon_url}", "--line-length=100", str(sample_file)]) == 1
+    assert sample_file.read_bytes() == truth_file.read_bytes()
+    assert newline.encode() in sample_file.read_bytes()
+
+
+def test_client_stdin(
+    daemon_url: str, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO(DIRTY_SRC))
+    assert client.main([f"--daemon-url={daemon_url}", "--line-length=100", "-"]) == 0
+    assert capsys.readouterr().out == CLEAN_SRC
+
+
+def test_client_directory(tmp_path: Path, daemon_url: str) -> None:
+    sample_dir = tmp_path / "src"
+    sample_dir.mkdir()
+    sample_file = sample_dir / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    # Directories are walked by the full CLI, as if the daemon weren't running
+    assert client.main([f"--daemon-url={daemon_url}", "--line-length=100", str(sample_dir)]) == 1
+    assert sample_file.read_text() == CLEAN_SRC
+
+
+@pytest.mark.parametrize("extra_args", ([], ["--check"]))
+def test_client_local_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, extra_args: list[str]
+) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    local_calls = []
+
+    def _run_locally(argv: t.Sequence[str]) -> int:
+        local_calls.append(list(argv))
+        return 0
+
+    monkeypatch.setattr(client, "_run_locally", _run_locally)
+
+    # Port 1 is privileged & shouldn't have anything listening on it
+    argv = ["--daemon-url=http://127.0.0.1:1", *extra_args, str(sample_file)]
+    assert client.main(argv) == 0
+    assert local_calls == [[*extra_args, str(sample_file)]]
@@ -0,0 +1,130 @@
+import argparse
+import typing as t
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import driver, matlab_reflow_comments
+from pre_commit_matlab.driver import TransformPlugin, apply_transforms, load_transforms
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+
+DIRTY_SRC = dedent(
+    """\
+    function y = façade(x)
+    % Compute the façade of the provided value, which is a
+    % long description
+    y = x;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, ReflowOptions(line_length=40))
+
+
+def _add_suffix_arguments(parser: argparse._ActionsContainer) -> None:
+    parser.add_argument("--suffix", default="% Trailer")
+
+
+UPPER_CODE = TransformPlugin("upper-code", lambda args: lambda src: src.replace("y = x;", "Y = X;"))
+APPEND_SUFFIX = TransformPlugin(
+    "append-suffix", lambda args: lambda src: f"{src}{args.suffix}\n", _add_suffix_arguments
+)
+
+
+@pytest.fixture
+def plugins(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(driver, "_REGISTRY", dict(driver._REGISTRY))
+    driver.register_transform(UPPER_CODE)
+    driver.register_transform(APPEND_SUFFIX)
+
+
+def test_register_duplicate(plugins: None) -> None:
+    with pytest.raises(ValueError, match="already registered"):
+        driver.register_transform(UPPER_CODE)
+
+
+def test_load_transforms(plugins: None) -> None:
+    assert list(load_transforms()) == ["reflow-comments", "upper-code", "append-suffix"]
+
+
+class _EntryPoint(t.NamedTuple):
+    name: str
+    plugin: object
+
+    def load(self) -> object:
+        return self.plugin
+
+
+def test_load_transforms_entry_points(monkeypatch: pytest.MonkeyPatch) -> None:
+    entry_points = [_EntryPoint("b", APPEND_SUFFIX), _EntryPoint("a", UPPER_CODE)]
+    monkeypatch.setattr(driver, "entry_points", lambda group: entry_points)
+    assert list(load_transforms()) == ["reflow-comments", "upper-code", "append-suffix"]
+
+    entry_points.append(_EntryPoint("c", "not a plugin"))
+    with pytest.raises(ValueError, match="doesn't reference a TransformPlugin"):
+        load_transforms()
+
+
+@pytest.mark.parametrize("newline", ("\n", "\r\n"))
+def test_apply_transforms(tmp_path: Path, newline: str) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_bytes(DIRTY_SRC.replace("\n", newline).encode("latin-1"))
+
+    transforms = [
+        driver.REFLOW_COMMENTS.build(argparse.Namespace(**vars(ReflowOptions(line_length=40)))),
+        lambda src: src.replace("y = x;", "Y = X;"),
+    ]
+    truth_src = CLEAN_SRC.replace("y = x;", "Y = X;").replace("\n", newline).encode("latin-1")
+
+    assert apply_transforms(sample_file, transforms)
+    assert sample_file.read_bytes() == truth_src
+
+    assert not apply_transforms(sample_file, transforms)
+
+
+def test_driver_cli(tmp_path: Path, plugins: None) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC, encoding="utf-8")
+
+    argv = ["--line-length=40", "--suffix=% End", str(sample_file)]
+    assert driver.main(argv) == 1
+
+    truth_src = CLEAN_SRC.replace("y = x;", "Y = X;")
+    assert sample_file.read_text(encoding="utf-8") == f"{truth_src}% End\n"
+
+
+def test_driver_cli_subset(tmp_path: Path, plugins: None) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC, encoding="utf-8")
+
+    assert driver.main(["--transform=upper-code", str(sample_file)]) == 1
+    assert sample_file.read_text(encoding="utf-8") == DIRTY_SRC.replace("y = x;", "Y = X;")
+
+    assert driver.main(["--transform=upper-code", str(sample_file)]) == 0
+
+
+LINE_BOUNDARY_CASES = (
+    b"x = 1; % caf\x85 a\n",
+    'y = "\u2028";\n'.encode("utf-8"),
+    b"% Caf\x85 with a description long enough to wrap\n% onto the next line\n",
+)
+
+
+@pytest.mark.parametrize("src", LINE_BOUNDARY_CASES)
+def test_driver_line_boundaries(tmp_path: Path, src: bytes) -> None:
+    # Only newlines break lines, as with matlab-reflow-comments
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_bytes(src)
+    truth_file = tmp_path / "truth_src.m"
+    truth_file.write_bytes(src)
+
+    argv = ["--line-length=40"]
+    expected = matlab_reflow_comments.main([*argv, str(truth_file)])
+    assert driver.main([*argv, str(sample_file)]) == expected
+    assert sample_file.read_bytes() == truth_file.read_bytes()
+
+
+def test_driver_cli_error(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    missing_file = tmp_path / "missing.m"
+    assert driver.main([str(missing_file)]) == 1
+    assert capsys.readouterr().err.startswith(f"{missing_file}: ")
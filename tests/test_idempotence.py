@@ -0,0 +1,131 @@
+import itertools
+import random
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_source
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_bytes, reflow_source
+
+# Every combination of the boolean reflow options, at line lengths narrow enough that indentation
+# leaves little or no room for comment text
+OPTION_SETS = [
+    ReflowOptions(line_length, *flags)
+    for line_length in (10, 20, 40)
+    for flags in itertools.product((True, False), repeat=3)
+]
+
+# Fragments that stress the parser & wrapper: block delimiters, capitals, whitespace `wrap` doesn't
+# split on, words too long for a line, and multibyte characters
+FUZZ_WORDS = (
+    "alpha", "Beta", "x", "%", "%{", "%}", "%}x", "{", "}", "...", " ", "  ", "\t", "\u2003",
+    "\xa0", "é", "Éa", "aaaaaaaaaaaaaaa",
+)  # fmt: skip
+FUZZ_LINES = (
+    "% {w}", "%{w}", "  % {w}", "%{", "%}", "  %{", "  %}", "x = 1;", "", "%", "%  {w}", "% % {w}",
+    "%% {w}", "{w}", "  {w}",
+)  # fmt: skip
+
+
+def _fuzz_source(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.randint(1, 12)):
+        words = " ".join(rng.choice(FUZZ_WORDS) for _ in range(rng.randint(0, 12)))
+        lines.append(rng.choice(FUZZ_LINES).replace("{w}", words))
+
+    return "\n".join(lines) + "\n"
+
+
+def _assert_idempotent(src: str, options: ReflowOptions) -> None:
+    reflowed_src = reflow_source(src, options)
+    assert reflow_source(reflowed_src, options) == reflowed_src, (src, options)
+
+
+def test_fuzz_idempotent() -> None:
+    rng = random.Random(2024)
+    for _ in range(300):
+        src = _fuzz_source(rng)
+        for options in OPTION_SETS:
+            _assert_idempotent(src, options)
+
+
+@pytest.mark.parametrize("preset", PRESETS.values(), ids=PRESETS.keys())
+def test_corpus_idempotent(preset: CorpusSpec) -> None:
+    src = generate_source(random.Random(42), preset)[:20_000]
+    for options in OPTION_SETS:
+        _assert_idempotent(src, options)
+
+
+IDEMPOTENT_CASES = (
+    # Whitespace dropped at a line break is parsed back as a single space
+    ("% %   Gamma\n", "% % Gamma\n"),
+    # A block comment line starting with `%}` would close the block
+    ("%{\nfoo bar %}baz\n%}\n", "%{\nfoo bar %}baz\n%}\n"),
+    # An unclosed block comment's body doesn't gain a `%`
+    ("%{\n%\n", "%{\n%\n"),
+    # A stray block closing delimiter doesn't turn comments into code
+    ("% Run\n%}\n", "% Run\n%}\n"),
+    # A comment keeps its leading space, rather than becoming `%{`
+    ("%         {\n", "% {\n"),
+    # No room for text after the indentation, so words aren't broken into single characters
+    ("        % x ... ...\n", "        % x\n        % ...\n        % ...\n"),
+)
+
+
+@pytest.mark.parametrize(("src", "truth_src"), IDEMPOTENT_CASES)
+def test_idempotent_cases(src: str, truth_src: str) -> None:
+    options = ReflowOptions(line_length=10, ignore_indented=False)
+    assert reflow_source(src, options) == truth_src
+    assert reflow_source(truth_src, options) == truth_src
+
+
+def test_bytes_idempotent() -> None:
+    src = "% Façade, château, naïve, Åland,  à la carte\n".encode("cp1252")
+    options = ReflowOptions(line_length=12)
+    reflowed = reflow_bytes(src, options, encoding="cp1252")
+    assert reflow_bytes(reflowed, options, encoding="cp1252") == reflowed
+
+
+DIRTY_SRC = dedent(
+    """\
+    function y = foo(x)
+    % Compute the foo of the provided value, which is a
+    % long description
+    y = x;
+    """
+)
+
+
+@pytest.mark.parametrize("check", (False, True))
+def test_verify_idempotent_cli(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture, check: bool
+) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    argv = ["--line-length=40", "--verify-idempotent", str(sample_file)]
+    if check:
+        argv.append("--check")
+    assert matlab_reflow_comments.main(argv) == 1
+    assert capsys.readouterr().err == ""
+
+    # Simulate a wrapper that grows a run every time it's reflowed
+    def _wrap_run(text: str, *args: object) -> tuple[str, ...]:
+        return (f"%{text} again",)
+
+    monkeypatch.setattr(matlab_reflow_comments, "_wrap_run", _wrap_run)
+    sample_file.write_text(DIRTY_SRC)
+    assert matlab_reflow_comments.main(argv) == 1
+    assert capsys.readouterr().err == (
+        f"{sample_file}:2: reflowed comments aren't stable, reflowing again changes this line\n"
+    )
+
+
+@pytest.mark.parametrize("flag", ("--stream", "--changed-lines", "--line-ranges=1-2"))
+def test_verify_idempotent_cli_invalid(tmp_path: Path, flag: str) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--verify-idempotent", flag, str(sample_file)])
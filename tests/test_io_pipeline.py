@@ -0,0 +1,135 @@
+import threading
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.io_pipeline import pipelined
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+
+OPTIONS = ReflowOptions(line_length=40)
+
+DIRTY_SRC = dedent(
+    """\
+    function y = foo(x)
+    % Compute the foo of the provided value, which is a
+    % long description
+    y = x;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, OPTIONS)
+
+
+class MemoryFileSystem:
+    """
+    In-memory files, where every read & write must wait on a barrier of `n_concurrent` parties.
+
+    Reads & writes only complete once `n_concurrent` of them are in flight at once, so processing
+    deadlocks, failing on the barrier's timeout, unless file access is overlapped.
+    """
+
+    def __init__(self, files: dict[Path, bytes], n_concurrent: int = 1) -> None:
+        self.files = files
+        self._barrier = threading.Barrier(n_concurrent, timeout=5)
+
+    def read_bytes(self, file: Path) -> bytes:  # noqa: D102
+        self._barrier.wait()
+        try:
+            return self.files[file]
+        except KeyError:
+            raise FileNotFoundError(f"No such file: '{file}'") from None
+
+    def write_bytes(self, file: Path, data: bytes) -> None:  # noqa: D102
+        self._barrier.wait()
+        if file.suffix != ".m":
+            raise PermissionError(f"Read-only file: '{file}'")
+        self.files[file] = data
+
+
+def test_pipelined_in_order() -> None:
+    results = pipelined(
+        range(20),
+        lambda item: item * 2,
+        lambda item, data: (data, (lambda: data + 1) if item % 3 else None),
+        lambda item, e: -1,
+        n_threads=4,
+    )
+    assert list(results) == [idx * 2 + bool(idx % 3) for idx in range(20)]
+
+
+def test_pipelined_window() -> None:
+    reads: list[int] = []
+
+    def _read(item: int) -> int:
+        reads.append(item)
+        return item
+
+    results = pipelined(
+        range(100), _read, lambda item, data: (data, None), lambda item, e: -1, 2, window=3
+    )
+    assert next(results) == 0
+    assert len(reads) <= 3
+
+    assert list(results) == list(range(1, 100))
+    assert reads == list(range(100))
+
+
+def test_reads_overlapped() -> None:
+    files = {Path(f"file_{idx}.m"): DIRTY_SRC.encode() for idx in range(4)}
+    fs = MemoryFileSystem(dict(files), n_concurrent=4)
+
+    outcomes = matlab_reflow_comments._process_pipelined(
+        files, [None] * 4, fs, n_threads=4, options=OPTIONS, check=True
+    )
+    assert all(outcome.changed for outcome in outcomes)
+    assert fs.files == files
+
+
+def test_pipelined_reflow() -> None:
+    files = [Path(f"file_{idx}.m") for idx in range(6)]
+    fs = MemoryFileSystem({file: DIRTY_SRC.encode() for file in files})
+
+    outcomes = matlab_reflow_comments._process_pipelined(
+        files, [None, None, [], None, None, None], fs, n_threads=3, options=OPTIONS
+    )
+    assert [outcome.changed for outcome in outcomes] == [True, True, False, True, True, True]
+    assert fs.files.pop(files[2]) == DIRTY_SRC.encode()
+    assert set(fs.files.values()) == {CLEAN_SRC.encode()}
+
+
+def test_pipelined_errors() -> None:
+    files = [Path("missing.m"), Path("read_only.txt"), Path("sample.m")]
+    fs = MemoryFileSystem({file: DIRTY_SRC.encode() for file in files[1:]})
+
+    outcomes = list(
+        matlab_reflow_comments._process_pipelined(
+            files, [None] * 3, fs, n_threads=2, collect_stats=True, options=OPTIONS
+        )
+    )
+    assert [outcome.error is not None for outcome in outcomes] == [True, True, False]
+    for outcome, file in zip(outcomes, files, strict=True):
+        assert outcome.stats is not None
+        assert outcome.stats.file == str(file)
+    assert fs.files[files[2]] == CLEAN_SRC.encode()
+
+
+@pytest.mark.parametrize("check", (False, True))
+def test_io_threads_cli(tmp_path: Path, capsys: pytest.CaptureFixture, check: bool) -> None:
+    for idx in range(3):
+        (tmp_path / f"file_{idx}.m").write_text(DIRTY_SRC)
+
+    argv = ["--line-length=40", "--jobs=1", "--io-threads=2", str(tmp_path)]
+    if check:
+        argv.append("--check")
+    assert matlab_reflow_comments.main(argv) == 1
+
+    truth_src = DIRTY_SRC if check else CLEAN_SRC
+    assert all(file.read_text() == truth_src for file in tmp_path.iterdir())
+    assert capsys.readouterr().out.count("would reflow comments") == (3 if check else 0)
+
+
+def test_io_threads_cli_invalid(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--io-threads=-1", str(tmp_path)])
@@ -0,0 +1,54 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+
+SAMPLE_SRC = dedent(
+    """\
+    % XBMINI is a MATLAB class definition providing the user with a set of
+    % methods to parse and analyze raw data files output by GCDC XBmini
+    % datalogger
+    """
+)
+
+TRUTH_100_WIDTH = dedent(
+    """\
+    % XBMINI is a MATLAB class definition providing the user with a set of methods to parse and analyze
+    % raw data files output by GCDC XBmini datalogger
+    """
+)
+
+
+@pytest.mark.parametrize("n_jobs", (1, 2))
+def test_parallel_matches_serial(tmp_path: Path, n_jobs: int) -> None:
+    n_files = matlab_reflow_comments.MIN_PARALLEL_FILES + 2
+    files = [tmp_path / f"sample_{idx}.m" for idx in range(n_files)]
+    for file in files:
+        file.write_text(SAMPLE_SRC)
+
+    argv = ["--line-length=100", f"--jobs={n_jobs}", *(str(file) for file in files)]
+    assert matlab_reflow_comments.main(argv) == 1
+    assert all(file.read_text() == TRUTH_100_WIDTH for file in files)
+
+    # Files are now clean, so a second run should report no changes
+    assert matlab_reflow_comments.main(argv) == 0
+
+
+def test_errors_reported_in_input_order(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    n_files = matlab_reflow_comments.MIN_PARALLEL_FILES + 2
+    files = [tmp_path / f"sample_{idx}.m" for idx in range(n_files)]
+    for file in files[::2]:
+        file.write_text(SAMPLE_SRC)
+
+    ret = matlab_reflow_comments.main(["--jobs=2", *(str(file) for file in files)])
+    assert ret == 1
+
+    reported = [line.split(":")[0] for line in capsys.readouterr().err.splitlines()]
+    assert reported == [str(file) for file in files[1::2]]
+
+
+def test_invalid_jobs_rejected() -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--jobs=0"])
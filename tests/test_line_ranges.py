@@ -0,0 +1,167 @@
+import subprocess
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import changed_lines, matlab_reflow_comments
+from pre_commit_matlab.changed_lines import changed_line_ranges
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+
+SAMPLE_SRC = dedent(
+    """\
+    function foo(bar)
+    % This is a comment that is much longer than the line length we're using
+    x = 1;
+    % This is another comment that is much longer than the line length we're using
+    end
+    """
+)
+
+FIRST_RUN_REFLOWED = dedent(
+    """\
+    function foo(bar)
+    % This is a comment that is much longer than the
+    % line length we're using
+    x = 1;
+    % This is another comment that is much longer than the line length we're using
+    end
+    """
+)
+
+OPTIONS = ReflowOptions(line_length=50)
+
+
+@pytest.mark.parametrize(
+    ("line_ranges", "truth_src"),
+    (
+        ([(2, 2)], FIRST_RUN_REFLOWED),
+        ([(1, 3)], FIRST_RUN_REFLOWED),
+        ([(1, 1), (3, 3), (5, 5)], SAMPLE_SRC),
+        ([], SAMPLE_SRC),
+        ([(1, 5)], reflow_source(SAMPLE_SRC, OPTIONS)),
+    ),
+)
+def test_reflow_line_ranges(line_ranges: list, truth_src: str) -> None:
+    assert reflow_source(SAMPLE_SRC, OPTIONS, line_ranges) == truth_src
+
+
+def test_line_ranges_block_comment() -> None:
+    src = "%{\nA block comment that is much longer than the line length we're using\n%}\n"
+    truth_src = "%{\nA block comment that is much longer than the line\nlength we're using\n%}\n"
+
+    assert reflow_source(src, OPTIONS, [(3, 3)]) == truth_src
+    assert reflow_source(src, OPTIONS, [(4, 10)]) == src
+
+
+def test_line_ranges_cli(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(SAMPLE_SRC)
+
+    argv = ["--line-length=50", "--line-ranges=2-2", "--line-ranges=5-5", str(sample_file)]
+    assert matlab_reflow_comments.main(argv) == 1
+    assert sample_file.read_text() == FIRST_RUN_REFLOWED
+
+
+@pytest.mark.parametrize("line_range", ("2", "a-b", "0-2", "3-2"))
+def test_invalid_line_range(tmp_path: Path, line_range: str) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main([f"--line-ranges={line_range}", str(tmp_path / "a.m")])
+
+
+def test_line_ranges_single_file(tmp_path: Path) -> None:
+    argv = ["--line-ranges=1-2", str(tmp_path / "a.m"), str(tmp_path / "b.m")]
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(argv)
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    _git(tmp_path, "init")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_changed_line_ranges(git_repo: Path) -> None:
+    tracked_file = git_repo / "tracked.m"
+    tracked_file.write_text(SAMPLE_SRC)
+    clean_file = git_repo / "clean.m"
+    clean_file.write_text(SAMPLE_SRC)
+    _git(git_repo, "add", ".")
+    _git(git_repo, "commit", "-m", "Initial commit")
+
+    tracked_file.write_text(SAMPLE_SRC.replace("x = 1;", "x = 2;\ny = 3;").replace("end\n", ""))
+    untracked_file = git_repo / "untracked.m"
+    untracked_file.write_text(SAMPLE_SRC)
+
+    ranges = changed_line_ranges([tracked_file, clean_file, Path("untracked.m")])
+    assert ranges == [[(3, 4), (5, 6)], [], None]
+
+
+@pytest.mark.parametrize("filename", ("a b.m", "café.m", "tab\tname.m", 'quote"name.m'))
+def test_changed_line_ranges_special_filename(git_repo: Path, filename: str) -> None:
+    sample_file = git_repo / filename
+    sample_file.write_text(SAMPLE_SRC)
+    _git(git_repo, "add", ".")
+    _git(git_repo, "commit", "-m", "Initial commit")
+    assert changed_line_ranges([sample_file]) == [[]]
+
+    sample_file.write_text(SAMPLE_SRC.replace("x = 1;", "x = 2;"))
+    assert changed_line_ranges([sample_file]) == [[(3, 3)]]
+
+
+def test_changed_line_ranges_unmatched(git_repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sample_file = git_repo / "sample.m"
+    sample_file.write_text(SAMPLE_SRC)
+    _git(git_repo, "add", ".")
+    _git(git_repo, "commit", "-m", "Initial commit")
+    sample_file.write_text(SAMPLE_SRC.replace("x = 1;", "x = 2;"))
+
+    # A changed file missing from the parsed diff is considered changed entirely
+    monkeypatch.setattr(changed_lines, "_parse_diff", lambda diff, root: {})
+    assert changed_line_ranges([sample_file]) == [None]
+
+
+UNQUOTE_CASES = (
+    ("b/a b.m", "b/a b.m"),
+    ('"b/caf\\303\\251.m"', "b/café.m"),
+    ('"b/tab\\tname.m"', "b/tab\tname.m"),
+    ('"b/quote\\"name\\\\.m"', 'b/quote"name\\.m'),
+)
+
+
+@pytest.mark.parametrize(("path", "truth_path"), UNQUOTE_CASES)
+def test_unquote_path(path: str, truth_path: str) -> None:
+    assert changed_lines._unquote_path(path) == truth_path
+
+
+def test_changed_line_ranges_no_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    assert changed_line_ranges([tmp_path / "a.m"]) == [None]
+
+
+def test_changed_lines_cli(git_repo: Path) -> None:
+    sample_file = git_repo / "sample_src.m"
+    sample_file.write_text(SAMPLE_SRC)
+    _git(git_repo, "add", ".")
+    _git(git_repo, "commit", "-m", "Initial commit")
+
+    argv = ["--line-length=50", "--changed-lines", str(sample_file)]
+    assert matlab_reflow_comments.main(argv) == 0
+    assert sample_file.read_text() == SAMPLE_SRC
+
+    sample_file.write_text(SAMPLE_SRC.replace("x = 1;", "% Additional comment\nx = 1;"))
+    assert matlab_reflow_comments.main(argv) == 1
+    assert sample_file.read_text() == FIRST_RUN_REFLOWED.replace(
+        "using\nx = 1;", "using Additional comment\nx = 1;"
+    )
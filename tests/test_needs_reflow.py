@@ -0,0 +1,81 @@
+import random
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_source
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, needs_reflow, reflow_source
+
+OPTIONS = ReflowOptions(line_length=40)
+
+CLEAN_SRC = dedent(
+    """\
+    function y = foo(x)
+    % Compute the foo of the provided value,
+    % which is a long description
+    if x
+        % Indented comment run that spans
+        % more than one line
+    end
+    %
+      %{
+      Block comment contents that are
+      already wrapped
+      %}
+    y = x;
+    """
+)
+
+NEEDS_REFLOW_CASES = (
+    (CLEAN_SRC, False),
+    ("", False),
+    ("x = 1;\ny = 2;\n", False),
+    (CLEAN_SRC.rstrip("\n"), True),
+    (CLEAN_SRC.replace("\n", "\r\n"), True),
+    ("% This comment line is much longer than the line length\n", True),
+    ("% Short\n% lines\n", True),
+    ("% Trailing space \n", True),
+    ("% Double  space\n", True),
+    ("  % Mismatched\n% indent\n", True),
+    ("%{\n  Short\n  lines\n%}\n", True),
+    ("%{\n  Unclosed block\n", True),
+    ("%{\nUnclosed block\n", False),
+    ("% Stray block close\n%}\n", False),
+)
+
+
+@pytest.mark.parametrize(("src", "truth_needs_reflow"), NEEDS_REFLOW_CASES)
+def test_needs_reflow(src: str, truth_needs_reflow: bool) -> None:
+    assert needs_reflow(src, OPTIONS) == truth_needs_reflow
+
+
+def test_needs_reflow_capital_handling() -> None:
+    src = "% Short line\n% Capitalized line\n"
+    assert needs_reflow(src, OPTIONS)
+    assert not needs_reflow(src, ReflowOptions(line_length=40, alternate_capital_handling=True))
+
+
+@pytest.mark.parametrize("preset", PRESETS.values(), ids=PRESETS.keys())
+def test_needs_reflow_conservative(preset: CorpusSpec) -> None:
+    rng = random.Random(42)
+    for _ in range(5):
+        src = generate_source(rng, preset)[:20_000]
+        for line_length in (20, 40, 78):
+            options = ReflowOptions(line_length=line_length)
+            for candidate in (src, reflow_source(src, options)):
+                if not needs_reflow(candidate, options):
+                    assert reflow_source(candidate, options) == candidate
+
+
+def test_process_file_skipped(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def _wrap_run(*args: object, **kwargs: object) -> str:
+        raise AssertionError("Formatted file shouldn't be wrapped")
+
+    monkeypatch.setattr(matlab_reflow_comments, "_wrap_run", _wrap_run)
+
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(CLEAN_SRC)
+    assert matlab_reflow_comments.main(["--line-length=40", str(sample_file)]) == 0
+    assert matlab_reflow_comments.main(["--line-length=40", "--check", str(sample_file)]) == 0
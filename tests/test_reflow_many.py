@@ -0,0 +1,69 @@
+import typing as t
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_many, reflow_source
+
+OPTIONS = ReflowOptions(line_length=40)
+
+DIRTY_SRC = dedent(
+    """\
+    function y = foo(x)
+    % Compute the foo of the provided value, which is a
+    % long description
+    y = x;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, OPTIONS)
+
+
+def _make_files(tmp_path: Path) -> list[Path]:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.m").write_text(DIRTY_SRC)
+    (src_dir / "b.m").write_text(CLEAN_SRC)
+    (src_dir / "notes.txt").write_text(DIRTY_SRC)
+    (tmp_path / "c.m").write_text(DIRTY_SRC)
+    return [src_dir, tmp_path / "c.m", tmp_path / "missing.m"]
+
+
+def test_reflow_many(tmp_path: Path) -> None:
+    paths = _make_files(tmp_path)
+    results = reflow_many([str(paths[0]), *paths[1:]], OPTIONS)
+
+    truth_paths = [tmp_path / "src" / "a.m", tmp_path / "src" / "b.m", *paths[1:]]
+    assert [result.path for result in results] == truth_paths
+    assert [result.changed for result in results] == [True, False, True, False]
+    assert [result.error is not None for result in results] == [False, False, False, True]
+    assert all(result.output is None for result in results)
+    assert all(result.stats.file == str(result.path) for result in results)
+    assert results[0].stats.lines == 4
+    assert results[0].stats.bytes_written == len(CLEAN_SRC)
+
+    assert all(file.read_text() == CLEAN_SRC for file in truth_paths[:3])
+    assert (tmp_path / "src" / "notes.txt").read_text() == DIRTY_SRC
+
+
+def test_reflow_many_dry_run(tmp_path: Path) -> None:
+    paths = _make_files(tmp_path)
+    results = reflow_many(paths, OPTIONS, write=False, return_output=True)
+
+    assert [result.changed for result in results] == [True, False, True, False]
+    assert [result.output for result in results] == [*[CLEAN_SRC.encode()] * 3, None]
+    assert (tmp_path / "src" / "a.m").read_text() == DIRTY_SRC
+    assert (tmp_path / "c.m").read_text() == DIRTY_SRC
+
+
+@pytest.mark.parametrize("executor_type", (ThreadPoolExecutor, ProcessPoolExecutor))
+def test_reflow_many_executor(tmp_path: Path, executor_type: t.Callable[..., Executor]) -> None:
+    paths = _make_files(tmp_path)
+    with executor_type(max_workers=2) as executor:
+        results = reflow_many(paths, OPTIONS, executor, return_output=True)
+
+    assert [result.changed for result in results] == [True, False, True, False]
+    assert [result.output for result in results] == [*[CLEAN_SRC.encode()] * 3, None]
+    assert (tmp_path / "c.m").read_text() == CLEAN_SRC
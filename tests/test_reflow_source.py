@@ -0,0 +1,74 @@
+import typing as t
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab.matlab_reflow_comments import (
+    ReflowOptions,
+    iter_reflow_lines,
+    process_file,
+    reflow_source,
+)
+
+SAMPLE_SRC = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure data and
+    % prompts the user to window the region of the plot where the
+    % sensor is at ground level.
+    %{
+    This is a really long and descriptive block comment that has some
+    information about things and stuff
+    %}
+    h.fig = figure;
+    """
+)
+
+TRUTH_50_WIDTH = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure
+    % data and prompts the user to window the region
+    % of the plot where the sensor is at ground level.
+    %{
+    This is a really long and descriptive block
+    comment that has some information about things and
+    stuff
+    %}
+    h.fig = figure;
+    """
+)
+
+
+def test_reflow_source() -> None:
+    assert reflow_source(SAMPLE_SRC, ReflowOptions(line_length=50)) == TRUTH_50_WIDTH
+
+
+def test_iter_reflow_lines() -> None:
+    reflowed = list(iter_reflow_lines(SAMPLE_SRC.splitlines(), ReflowOptions(line_length=50)))
+    assert reflowed == TRUTH_50_WIDTH.splitlines()
+
+
+def test_iter_reflow_lines_is_lazy() -> None:
+    # Code lines should be yielded without needing to consume the rest of the source
+    def _src() -> t.Iterator[str]:
+        yield "a = 1;"
+        raise AssertionError("Source consumed past the first line")
+
+    assert next(iter_reflow_lines(_src(), ReflowOptions())) == "a = 1;"
+
+
+@pytest.mark.parametrize("line_length", (50, 100))
+def test_process_file_matches_reflow_source(tmp_path: Path, line_length: int) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(SAMPLE_SRC)
+    process_file(
+        sample_file,
+        line_length,
+        ignore_indented=True,
+        alternate_capital_handling=False,
+        reflow_block_comments=True,
+    )
+
+    assert sample_file.read_text() == reflow_source(SAMPLE_SRC, ReflowOptions(line_length))
@@ -0,0 +1,92 @@
+import random
+from textwrap import dedent
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_source
+from pre_commit_matlab.matlab_reflow_comments import (
+    ReflowOptions,
+    parse_segments,
+    reflow_segments,
+    reflow_source,
+)
+from pre_commit_matlab.segments import (
+    BlockComment,
+    CodeLines,
+    CommentRun,
+    Segment,
+    VerbatimComment,
+    render_segments,
+)
+
+SAMPLE_SRC = dedent(
+    """\
+    function y = foo(x)
+    y = x;
+    % A comment run that is
+    % split across lines
+    %
+    %  Indented comment
+      %{
+      Block comment
+      contents
+      %}
+    """
+)
+
+OPTIONS = ReflowOptions(line_length=40)
+
+
+def test_parse_segments() -> None:
+    truth_segments = [
+        CodeLines("function y = foo(x)\ny = x;"),
+        CommentRun(
+            ["% A comment run that is", "% split across lines"],
+            " A comment run that is split across lines",
+            0,
+        ),
+        VerbatimComment("%"),
+        VerbatimComment("%  Indented comment"),
+        BlockComment(
+            "  %{",
+            CommentRun(["  Block comment", "  contents"], "Block comment contents", 2, True),
+            "  %}",
+        ),
+    ]
+    assert parse_segments(SAMPLE_SRC, OPTIONS) == truth_segments
+
+
+def test_segments_slotted() -> None:
+    for segment in parse_segments(SAMPLE_SRC, OPTIONS):
+        assert not hasattr(segment, "__dict__")
+
+
+def test_segment_abstract() -> None:
+    segment_cls: type = Segment
+    with pytest.raises(TypeError, match="abstract"):
+        segment_cls()
+
+
+UNCLOSED_CASES = (
+    ("%{\nBody\n", [BlockComment("%{", CommentRun(["Body"], "Body", 0, True), None)]),
+    ("% Run\n%}\n", [CommentRun(["% Run"], " Run", 0), VerbatimComment("%}")]),
+    ("% Run\n%{\n%}\n", [CommentRun(["% Run"], " Run", 0), BlockComment("%{", None, "%}")]),
+)
+
+
+@pytest.mark.parametrize(("src", "truth_segments"), UNCLOSED_CASES)
+def test_parse_segments_delimiters(src: str, truth_segments: list) -> None:
+    assert parse_segments(src, OPTIONS) == truth_segments
+
+
+@pytest.mark.parametrize("preset", PRESETS.values(), ids=PRESETS.keys())
+def test_segments_round_trip(preset: CorpusSpec) -> None:
+    src = generate_source(random.Random(42), preset)[:20_000]
+    src = src[: src.rfind("\n") + 1]
+    for options in (OPTIONS, ReflowOptions(alternate_capital_handling=True)):
+        segments = parse_segments(src, options)
+        assert render_segments(segments) == src
+        assert render_segments(reflow_segments(segments, options)) == reflow_source(src, options)
+
+        # Reflowing is a pure transform, the parsed segments are left as-is
+        assert render_segments(segments) == src
@@ -0,0 +1,96 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.shard import load_costs, shard_files
+from pre_commit_matlab.stats import FileStats, write_report
+
+
+def _make_files(tmp_path: Path, sizes: list[int]) -> list[Path]:
+    files = []
+    for idx, size in enumerate(sizes):
+        file = tmp_path / f"file_{idx:02}.m"
+        file.write_text("x" * size)
+        files.append(file)
+
+    return files
+
+
+@pytest.mark.parametrize("count", (1, 2, 3, 7))
+def test_shards_partition(tmp_path: Path, count: int) -> None:
+    rng = random.Random(count)
+    files = _make_files(tmp_path, [rng.randint(0, 1000) for _ in range(20)])
+
+    shards = [shard_files(files, (index, count)) for index in range(1, count + 1)]
+    assert sorted(file for shard in shards for file in shard) == files
+    assert all(shard == sorted(shard) for shard in shards)
+
+    # Every runner computes the same partition, no matter the order the files are listed in
+    assert shard_files(reversed(files), (1, count)) == shards[0][::-1]
+
+
+def test_shards_balanced_by_size(tmp_path: Path) -> None:
+    files = _make_files(tmp_path, [1000, 900, 100, 100, 100, 100, 100, 100, 100, 100])
+
+    shards = [shard_files(files, (index, 2)) for index in (1, 2)]
+    assert shards == [files[0:10:2][:1] + files[3:10:2], [files[1], *files[2:10:2]]]
+
+
+def test_shards_balanced_by_cost(tmp_path: Path) -> None:
+    files = _make_files(tmp_path, [100, 100, 100, 100, 200])
+
+    shards = [shard_files(files, (index, 2)) for index in (1, 2)]
+    assert shards == [[files[2], files[4]], [files[0], files[1], files[3]]]
+
+    # Files without a recorded cost are estimated from the recorded cost per byte
+    costs = {files[0]: 4.0, files[1]: 1.0, files[2]: 1.0}
+    shards = [shard_files(files, (index, 2), costs) for index in (1, 2)]
+    assert shards == [[files[0], files[3]], [files[1], files[2], files[4]]]
+
+
+def test_load_costs(tmp_path: Path) -> None:
+    report_file = tmp_path / "stats.json"
+    stats = [FileStats(file="a.m", reflow_s=0.5), FileStats(file="b.m", read_s=1.0)]
+    write_report(stats, report_file)
+    assert load_costs(report_file) == {Path("a.m"): 0.5, Path("b.m"): 1.0}
+
+    report_file.write_text(json.dumps({"files": [{"file": "a.m"}]}))
+    with pytest.raises(ValueError, match="Invalid stats report"):
+        load_costs(report_file)
+
+
+def test_shard_cli(tmp_path: Path) -> None:
+    long_comment = "% This is a comment that is much longer than the line length we're using\n"
+    files = _make_files(tmp_path, [0] * 6)
+    for file in files:
+        file.write_text(long_comment)
+
+    truth_files = shard_files(files, (2, 3))
+    report_file = tmp_path / "stats.json"
+    argv = ["--line-length=50", "--shard=2/3", f"--stats-json={report_file}", str(tmp_path)]
+    assert matlab_reflow_comments.main(argv) == 1
+
+    changed = [file for file in files if file.read_text() != long_comment]
+    assert changed == truth_files
+
+    # Another run balances by the recorded costs
+    argv = ["--shard=1/3", f"--shard-costs={report_file}", str(tmp_path)]
+    assert matlab_reflow_comments.main(argv) == 1
+
+
+@pytest.mark.parametrize("shard", ("1", "0/2", "3/2", "a/b", "1/0"))
+def test_shard_cli_invalid(tmp_path: Path, shard: str) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main([f"--shard={shard}", str(tmp_path)])
+
+
+def test_shard_costs_cli_invalid(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main([f"--shard-costs={tmp_path / 'stats.json'}", str(tmp_path)])
+
+    with pytest.raises(SystemExit):
+        argv = ["--shard=1/2", f"--shard-costs={tmp_path / 'missing.json'}", str(tmp_path)]
+        matlab_reflow_comments.main(argv)
@@ -0,0 +1,102 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_source
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_bytes
+from pre_commit_matlab.stats import FileStats
+
+OPTION_SETS = (
+    ReflowOptions(line_length=40),
+    ReflowOptions(line_length=60, ignore_indented=False, alternate_capital_handling=True),
+    ReflowOptions(line_length=40, reflow_block_comments=False),
+)
+
+SPLIT_SRC = dedent(
+    """\
+    x = 1;
+    % Comment
+    %{
+    y = 2;
+    z = 3;
+    %}
+    y = 2;
+    z = 3;
+    """
+)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(matlab_reflow_comments, "MIN_SPLIT_CHUNK_LINES", 1)
+
+
+def test_split_source() -> None:
+    options = ReflowOptions()
+    chunks = matlab_reflow_comments._split_source(SPLIT_SRC, options, n_chunks=8)
+    assert chunks == ["x = 1;\n", "% Comment\n%{\ny = 2;\nz = 3;\n%}\ny = 2;\n", "z = 3;\n"]
+
+    # Without block comments, their body is code like any other
+    options = ReflowOptions(reflow_block_comments=False)
+    chunks = matlab_reflow_comments._split_source(SPLIT_SRC, options, n_chunks=8)
+    assert chunks[1:4] == ["% Comment\n%{\ny = 2;\n", "z = 3;\n", "%}\ny = 2;\n"]
+
+
+def test_split_source_unclosed_block() -> None:
+    src = "x = 1;\n%{\ny = 2;\nz = 3;\n"
+    chunks = matlab_reflow_comments._split_source(src, ReflowOptions(), n_chunks=4)
+    assert chunks == ["x = 1;\n", "%{\ny = 2;\nz = 3;\n"]
+
+
+def _assert_split_matches(data: bytes, options: ReflowOptions) -> None:
+    serial_stats = FileStats()
+    truth = reflow_bytes(data, options, stats=serial_stats)
+
+    split_stats = FileStats()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        split = matlab_reflow_comments._SplitReflow(executor, min_lines=0, n_chunks=8)
+        reflowed = matlab_reflow_comments._reflow_data(
+            data, options, stats=split_stats, split=split
+        )
+
+    assert (data if reflowed is None else reflowed) == truth
+    assert split_stats.lines == serial_stats.lines
+    assert split_stats.runs_flushed == serial_stats.runs_flushed
+
+
+@pytest.mark.parametrize("preset", PRESETS.values(), ids=PRESETS.keys())
+def test_split_matches_serial(small_chunks: None, preset: CorpusSpec) -> None:
+    src = generate_source(random.Random(42), preset)[:20_000]
+    for options in OPTION_SETS:
+        _assert_split_matches(src.encode(), options)
+        _assert_split_matches(src.replace("\n", "\r\n").encode(), options)
+        _assert_split_matches(src.encode("utf-16"), options)
+
+        # A final line that isn't terminated gains its newline, no matter which chunk it ends up in
+        _assert_split_matches(src.rstrip("\n").encode(), options)
+
+
+def test_split_unchanged(small_chunks: None) -> None:
+    src = reflow_bytes(SPLIT_SRC.encode(), ReflowOptions())
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        split = matlab_reflow_comments._SplitReflow(executor, min_lines=0, n_chunks=8)
+        assert matlab_reflow_comments._reflow_data(src, ReflowOptions(), split=split) is None
+
+
+def test_split_cli(tmp_path: Path, small_chunks: None) -> None:
+    src = generate_source(random.Random(42), PRESETS["comment-heavy"])[:20_000]
+    truth_src = reflow_bytes(src.encode(), ReflowOptions())
+
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(src)
+    assert matlab_reflow_comments.main(["--jobs=2", "--split-min-lines=1", str(sample_file)]) == 1
+    assert sample_file.read_bytes() == truth_src
+
+
+def test_split_cli_invalid(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--split-min-lines=-1", str(tmp_path)])
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, process_file, reflow_source
+from pre_commit_matlab.stats import FileStats, find_slow_files, format_summary
+
+DIRTY_SRC = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure data and
+    % prompts the user to window the region of the plot where the
+    % sensor is at ground level.
+    h.fig = figure;
+    %{
+    This is a really long and descriptive block comment that has some
+    information about things and stuff
+    %}
+    % Trailing comment
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, ReflowOptions(line_length=100))
+
+
+@pytest.mark.parametrize("stream", (False, True))
+def test_process_file_stats(tmp_path: Path, stream: bool) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    report_file = tmp_path / "stats.json"
+    argv = ["--line-length=100", f"--stats-json={report_file}", str(sample_file)]
+    if stream:
+        argv.append("--stream")
+    assert matlab_reflow_comments.main(argv) == 1
+
+    (stats,) = json.loads(report_file.read_text())["files"]
+    assert stats["changed"]
+    assert stats["lines"] == 10
+    assert stats["runs_flushed"] == 3
+    assert stats["bytes_written"] == sample_file.stat().st_size
+    assert stats["total_s"] > 0
+
+
+def test_process_file_stats_unchanged(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(CLEAN_SRC)
+
+    stats = FileStats()
+    assert not process_file(sample_file, 100, True, False, True, stats=stats)
+    assert not stats.changed
+    assert stats.bytes_written == 0
+    assert stats.write_s < stats.total_s
+
+
+def test_find_slow_files() -> None:
+    stats = [FileStats(file=f"{idx}.m", reflow_s=0.01) for idx in range(5)]
+    stats.append(FileStats(file="slow.m", reflow_s=0.5))
+    stats.append(FileStats(file="slower.m", read_s=0.5, reflow_s=0.5))
+
+    assert [file.file for file in find_slow_files(stats)] == ["slower.m", "slow.m"]
+
+
+def test_find_slow_files_noise() -> None:
+    stats = [FileStats(reflow_s=1e-6), FileStats(reflow_s=1e-4)]
+    assert find_slow_files(stats) == []
+    assert find_slow_files([]) == []
+
+
+def test_format_summary() -> None:
+    stats = [
+        FileStats(file="a.m", reflow_s=0.01, lines=10, runs_flushed=2, changed=True),
+        FileStats(file="b.m", read_s=0.001, cached=True),
+        FileStats(file="slow.m", reflow_s=1.0, lines=1000),
+    ]
+
+    summary = format_summary(stats)
+    assert summary.startswith("Processed 3 file(s) (1 changed, 1 cached) in 1.011s\n")
+    assert "1010 line(s), 2 comment run(s) flushed" in summary
+    assert summary.endswith(
+        "Slow files:\n  slow.m: 1.000s (read 0.000s, reflow 1.000s, write 0.000s, 1000 line(s))"
+    )
+
+
+def test_stats_cli(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    dirty_file = tmp_path / "dirty.m"
+    dirty_file.write_text(DIRTY_SRC)
+    clean_file = tmp_path / "clean.m"
+    clean_file.write_text(CLEAN_SRC)
+    report_file = tmp_path / "report.json"
+
+    argv = ["--line-length=100", "--stats", f"--stats-json={report_file}"]
+    assert matlab_reflow_comments.main([*argv, str(dirty_file), str(clean_file)]) == 1
+    assert capsys.readouterr().err.startswith("Processed 2 file(s) (1 changed, 0 cached)")
+
+    report = json.loads(report_file.read_text())
+    assert report["totals"]["files"] == 2
+    assert report["totals"]["changed"] == 1
+    assert report["totals"]["lines"] == 10 + CLEAN_SRC.count("\n")
+    assert [file["file"] for file in report["files"]] == [str(dirty_file), str(clean_file)]
+    assert all(file["total_s"] > 0 for file in report["files"])
+
+
+def test_stats_cli_cached(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(CLEAN_SRC)
+
+    argv = ["--line-length=100", "--stats", f"--cache-dir={tmp_path / 'cache'}", str(sample_file)]
+    assert matlab_reflow_comments.main(argv) == 0
+    assert matlab_reflow_comments.main(argv) == 0
+    assert "(0 changed, 1 cached)" in capsys.readouterr().err
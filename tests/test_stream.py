@@ -0,0 +1,58 @@
+import io
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source, reflow_stream
+
+DIRTY_SRC = dedent(
+    """\
+    function findgroundlevelpressure(dataObj)
+    % FINDGROUNDLEVELPRESSURE Plots the raw pressure data and
+    % prompts the user to window the region of the plot where the
+    % sensor is at ground level.
+    h.fig = figure;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, ReflowOptions(line_length=100))
+
+
+@pytest.mark.parametrize(
+    ("in_src", "truth_changed"),
+    (
+        (DIRTY_SRC, True),
+        (CLEAN_SRC, False),
+        (CLEAN_SRC.rstrip("\n"), True),
+    ),
+)
+def test_reflow_stream(in_src: str, truth_changed: bool) -> None:
+    dst = io.StringIO()
+    changed = reflow_stream(io.StringIO(in_src), dst, ReflowOptions(line_length=100))
+
+    assert changed == truth_changed
+    assert dst.getvalue() == CLEAN_SRC
+
+
+def test_stream_file(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    argv = ["--line-length=100", "--stream", str(sample_file)]
+    assert matlab_reflow_comments.main(argv) == 1
+    assert sample_file.read_text() == CLEAN_SRC
+    assert matlab_reflow_comments.main(argv) == 0
+    assert list(tmp_path.iterdir()) == [sample_file]
+
+
+def test_stdin_to_stdout(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO(DIRTY_SRC))
+    assert matlab_reflow_comments.main(["--line-length=100", "-"]) == 0
+    assert capsys.readouterr().out == CLEAN_SRC
+
+
+def test_stdin_exclusive(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["-", str(tmp_path / "sample_src.m")])
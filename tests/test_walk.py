@@ -0,0 +1,175 @@
+from pathlib import Path
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.walk import (
+    IgnorePattern,
+    compile_pattern,
+    is_ignored,
+    is_walked,
+    walk_matlab_dirs,
+    walk_matlab_files,
+)
+
+PATTERN_CASES = (
+    ("*.m", "a/b/foo.m", False, True),
+    ("*.m", "foo.txt", False, False),
+    ("foo.m", "a/foo.m", False, True),
+    ("/foo.m", "a/foo.m", False, False),
+    ("/foo.m", "foo.m", False, True),
+    ("a/*.m", "a/foo.m", False, True),
+    ("a/*.m", "a/b/foo.m", False, False),
+    ("a/**/foo.m", "a/b/c/foo.m", False, True),
+    ("a/**/foo.m", "a/foo.m", False, True),
+    ("**/build", "a/build", True, True),
+    ("a/**", "a/b/c.m", False, True),
+    ("build/", "a/build", True, True),
+    ("build/", "a/build", False, False),
+    ("foo?.m", "foo1.m", False, True),
+    ("foo[0-9].m", "foo1.m", False, True),
+    ("foo[!0-9].m", "foo1.m", False, False),
+    ("\\#foo.m", "#foo.m", False, True),
+)
+
+
+@pytest.mark.parametrize(("pattern", "rel_path", "is_dir", "truth_ignored"), PATTERN_CASES)
+def test_compile_pattern(pattern: str, rel_path: str, is_dir: bool, truth_ignored: bool) -> None:
+    compiled = compile_pattern(pattern)
+    assert compiled is not None
+    assert is_ignored(rel_path, is_dir, [compiled]) == truth_ignored
+
+
+@pytest.mark.parametrize("pattern", ("", "   ", "# comment", "/"))
+def test_compile_pattern_empty(pattern: str) -> None:
+    assert compile_pattern(pattern) is None
+
+
+def _compile_patterns(*patterns: str, base: str = "") -> list[IgnorePattern]:
+    compiled = []
+    for pattern in patterns:
+        ignore_pattern = compile_pattern(pattern, base)
+        assert ignore_pattern is not None, pattern
+        compiled.append(ignore_pattern)
+
+    return compiled
+
+
+def test_negated_pattern() -> None:
+    patterns = _compile_patterns("*.m", "!keep.m")
+    assert is_ignored("a/foo.m", False, patterns)
+    assert not is_ignored("a/keep.m", False, patterns)
+
+
+def test_based_pattern() -> None:
+    patterns = _compile_patterns("/foo.m", base="a/b")
+    assert is_ignored("a/b/foo.m", False, patterns)
+    assert not is_ignored("a/foo.m", False, patterns)
+    assert not is_ignored("a/b/c/foo.m", False, patterns)
+
+
+def _make_tree(root: Path, files: list[str]) -> None:
+    for file in files:
+        path = root / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1;\n")
+
+
+SAMPLE_TREE = [
+    "top.m",
+    "notes.txt",
+    ".git/hooks/hook.m",
+    "build/generated.m",
+    "src/a.m",
+    "src/b.m",
+    "src/sub/c.m",
+    "src/vendor/toolbox.m",
+    "src/vendor/keep.m",
+]
+
+
+def test_walk_matlab_files(tmp_path: Path) -> None:
+    _make_tree(tmp_path, SAMPLE_TREE)
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "src" / ".gitignore").write_text("vendor/*\n!vendor/keep.m\n")
+
+    walked = [path.relative_to(tmp_path).as_posix() for path in walk_matlab_files(tmp_path)]
+    assert walked == ["top.m", "src/a.m", "src/b.m", "src/sub/c.m", "src/vendor/keep.m"]
+
+
+@pytest.mark.parametrize("exclude", ([], ["/build", "src/sub/", "b.m"]))
+def test_is_walked(tmp_path: Path, exclude: list[str]) -> None:
+    _make_tree(tmp_path, SAMPLE_TREE)
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "src" / ".gitignore").write_text("vendor/*\n!vendor/keep.m\n")
+
+    walked = set(walk_matlab_files(tmp_path, exclude))
+    for file in SAMPLE_TREE:
+        path = tmp_path / file
+        assert is_walked(tmp_path, path, exclude) == (path in walked), file
+
+    assert not is_walked(tmp_path / "src", tmp_path / "top.m")
+    assert not is_walked(tmp_path, tmp_path / "missing.m")
+
+
+def test_walk_matlab_dirs(tmp_path: Path) -> None:
+    _make_tree(tmp_path, SAMPLE_TREE)
+
+    walked = walk_matlab_dirs(tmp_path, exclude=["/build"])
+    truth_walked = [".", "src", "src/sub", "src/vendor"]
+    assert [path.relative_to(tmp_path).as_posix() for path in walked] == truth_walked
+
+
+def test_walk_matlab_dirs_start(tmp_path: Path) -> None:
+    _make_tree(tmp_path, [*SAMPLE_TREE, "build/nested/generated.m"])
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "src" / ".gitignore").write_text("sub/\n")
+
+    walked = walk_matlab_dirs(tmp_path, start=tmp_path / "src")
+    assert [path.relative_to(tmp_path).as_posix() for path in walked] == ["src", "src/vendor"]
+
+    # Directories the walk from the root wouldn't descend into yield nothing
+    for start in ("build", "build/nested", "src/sub", ".git/hooks"):
+        assert list(walk_matlab_dirs(tmp_path, start=tmp_path / start)) == []
+    assert list(walk_matlab_dirs(tmp_path / "src", start=tmp_path / "build")) == []
+
+
+def test_walk_exclude(tmp_path: Path) -> None:
+    _make_tree(tmp_path, SAMPLE_TREE)
+
+    walked = walk_matlab_files(tmp_path, exclude=["/build", "src/sub/", "b.m"])
+    truth_walked = ["top.m", "src/a.m", "src/vendor/keep.m", "src/vendor/toolbox.m"]
+    assert [path.relative_to(tmp_path).as_posix() for path in walked] == truth_walked
+
+
+def test_walk_no_gitignore(tmp_path: Path) -> None:
+    _make_tree(tmp_path, ["a.m", "b.m"])
+    (tmp_path / ".gitignore").write_text("*.m\n")
+
+    assert list(walk_matlab_files(tmp_path)) == []
+    assert len(list(walk_matlab_files(tmp_path, honor_gitignore=False))) == 2
+
+
+def test_walk_cli(tmp_path: Path) -> None:
+    _make_tree(tmp_path, SAMPLE_TREE)
+    long_comment = "% This is a comment that is much longer than the line length we're using\n"
+    for file in SAMPLE_TREE:
+        (tmp_path / file).write_text(long_comment)
+
+    explicit_file = tmp_path / "build" / "generated.m"
+    argv = ["--line-length=50", "--exclude=vendor/", str(tmp_path / "src"), str(explicit_file)]
+    assert matlab_reflow_comments.main(argv) == 1
+
+    # Explicitly provided files are processed even if they'd be excluded when walking
+    for file in ("src/a.m", "src/b.m", "src/sub/c.m", "build/generated.m"):
+        assert (tmp_path / file).read_text() != long_comment
+
+    for file in ("top.m", ".git/hooks/hook.m", "src/vendor/toolbox.m", "src/vendor/keep.m"):
+        assert (tmp_path / file).read_text() == long_comment
+
+
+def test_walk_cli_parallel(tmp_path: Path) -> None:
+    n_files = matlab_reflow_comments.MIN_PARALLEL_FILES * 2
+    _make_tree(tmp_path, [f"pkg/file_{idx}.m" for idx in range(n_files)])
+
+    assert matlab_reflow_comments.main(["--jobs=2", str(tmp_path)]) == 0
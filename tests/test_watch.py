@@ -0,0 +1,155 @@
+import typing as t
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+from pre_commit_matlab.watch import InotifyWatcher, PollingWatcher, Watcher, iter_changes
+
+OPTIONS = ReflowOptions(line_length=40)
+
+DIRTY_SRC = dedent(
+    """\
+    function y = foo(x)
+    % Compute the foo of the provided value, which is a
+    % long description
+    y = x;
+    """
+)
+
+CLEAN_SRC = reflow_source(DIRTY_SRC, OPTIONS)
+
+
+class ScriptedWatcher:
+    """Watcher reporting a scripted sequence of changes, interrupting once they're exhausted."""
+
+    def __init__(self, changes: t.Iterable[set[Path]]) -> None:
+        self.changes = iter(changes)
+        self.timeouts: list[t.Optional[float]] = []
+        self.closed = False
+
+    def wait(self, timeout: t.Optional[float] = None) -> set[Path]:  # noqa: D102
+        self.timeouts.append(timeout)
+        try:
+            return next(self.changes)
+        except StopIteration:
+            raise KeyboardInterrupt from None
+
+    def close(self) -> None:  # noqa: D102
+        self.closed = True
+
+
+def test_iter_changes_debounce() -> None:
+    a, b = Path("a.m"), Path("b.m")
+    watcher = ScriptedWatcher([{b}, {a, b}, set(), {a}, set()])
+
+    batches = []
+    with pytest.raises(KeyboardInterrupt):
+        for batch in iter_changes(watcher, debounce=0.5):
+            batches.append(batch)
+
+    assert batches == [[a, b], [a]]
+    assert watcher.timeouts == [None, 0.5, 0.5, None, 0.5, None]
+
+
+def _make_tree(tmp_path: Path) -> tuple[Path, Path]:
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / ".gitignore").write_text("ignored/\nbuild/\n")
+    (tmp_path / "ignored" / "skip.m").write_text(DIRTY_SRC)
+    (tmp_path / "notes.txt").write_text(DIRTY_SRC)
+    sample_file = tmp_path / "sample.m"
+    sample_file.write_text(DIRTY_SRC)
+    return tmp_path, sample_file
+
+
+def _assert_watches(watcher: Watcher, root: Path, sample_file: Path) -> None:
+    assert watcher.wait(0.05) == set()
+
+    sample_file.write_text(CLEAN_SRC)
+    (root / "ignored" / "skip.m").write_text(CLEAN_SRC)
+    (root / "notes.txt").write_text(CLEAN_SRC)
+    assert watcher.wait(5) == {sample_file}
+
+    # Directories created while watching are picked up too, unless they're ignored
+    (root / "build" / "out").mkdir(parents=True)
+    (root / "build" / "out" / "generated.m").write_text(DIRTY_SRC)
+    (root / "sub").mkdir()
+    (root / "sub" / "new.m").write_text(DIRTY_SRC)
+    changed: set[Path] = set()
+    while root / "sub" / "new.m" not in changed:
+        changed |= watcher.wait(5)
+    assert changed == {root / "sub" / "new.m"}
+
+
+def test_polling_watcher(tmp_path: Path) -> None:
+    root, sample_file = _make_tree(tmp_path)
+    watcher = PollingWatcher([root], interval=0.01)
+    _assert_watches(watcher, root, sample_file)
+
+
+def test_inotify_watcher(tmp_path: Path) -> None:
+    root, sample_file = _make_tree(tmp_path)
+    try:
+        watcher = InotifyWatcher([root])
+    except OSError:
+        pytest.skip("inotify is unavailable")
+
+    try:
+        _assert_watches(watcher, root, sample_file)
+        assert sorted(watcher._dirs.values()) == [root, root / "sub"]
+    finally:
+        watcher.close()
+
+
+def test_reflow_watched(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample.m"
+    sample_file.write_text(DIRTY_SRC)
+
+    digests: dict[Path, bytes] = {}
+    outcome = matlab_reflow_comments._reflow_watched(sample_file, digests, OPTIONS)
+    assert outcome is not None and outcome.changed
+    assert sample_file.read_text() == CLEAN_SRC
+
+    # Our own write shows up as a change, but its contents were just reflowed
+    assert matlab_reflow_comments._reflow_watched(sample_file, digests, OPTIONS) is None
+
+    sample_file.write_text(f"{CLEAN_SRC}% Another comment\n")
+    outcome = matlab_reflow_comments._reflow_watched(sample_file, digests, OPTIONS)
+    assert outcome is not None and not outcome.changed
+
+    sample_file.unlink()
+    outcome = matlab_reflow_comments._reflow_watched(sample_file, digests, OPTIONS)
+    assert outcome is not None and outcome.error is not None
+    assert sample_file not in digests
+
+
+def test_watch_cli(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    sample_file = tmp_path / "sample.m"
+    sample_file.write_text(DIRTY_SRC)
+    missing_file = tmp_path / "missing.m"
+
+    watcher = ScriptedWatcher([{sample_file, missing_file}, set(), {sample_file}, set()])
+    monkeypatch.setattr(matlab_reflow_comments, "create_watcher", lambda paths, exclude: watcher)
+
+    assert matlab_reflow_comments.main(["--line-length=40", "--watch", str(tmp_path)]) == 0
+    assert sample_file.read_text() == CLEAN_SRC
+    assert watcher.closed
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{sample_file}: reflowed comments\n"
+    assert captured.err.startswith(f"{missing_file}: ")
+
+
+@pytest.mark.parametrize("flag", ("--check", "--diff", "--stream", "--changed-lines"))
+def test_watch_cli_invalid(tmp_path: Path, flag: str) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--watch", flag, str(tmp_path)])
+
+
+def test_watch_cli_no_paths() -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--watch"])
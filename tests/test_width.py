@@ -0,0 +1,82 @@
+import unicodedata
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import _width_table, matlab_reflow_comments, width
+from pre_commit_matlab.matlab_reflow_comments import ReflowOptions, reflow_source
+from pre_commit_matlab.width import char_width, text_width
+
+CHAR_WIDTH_CASES = (
+    ("a", 1),
+    ("é", 1),
+    ("́", 0),  # Combining acute accent
+    ("​", 0),  # Zero width space
+    ("\xad", 1),  # Soft hyphen
+    ("中", 2),
+    ("か", 2),
+    ("ｆ", 2),  # Fullwidth Latin
+    ("😀", 2),
+    ("ᅠ", 0),  # Hangul Jamo medial vowel
+)
+
+
+@pytest.mark.parametrize(("char", "truth_width"), CHAR_WIDTH_CASES)
+def test_char_width(char: str, truth_width: int) -> None:
+    assert char_width(char) == truth_width
+
+
+def test_text_width() -> None:
+    assert text_width("") == 0
+    assert text_width("plain ascii") == 11
+    assert text_width("中文 comment") == 12
+    assert text_width("café") == 4
+
+
+@pytest.mark.skipif(
+    unicodedata.unidata_version != _width_table.UNICODE_VERSION,
+    reason="Width table was generated from a different version of Unicode",
+)
+def test_width_table_up_to_date() -> None:
+    assert width.generate_table() == Path(_width_table.__file__).read_text(encoding="utf-8")
+
+
+WIDE_SRC = dedent(
+    """\
+    % 这是一个很长的中文注释，用于测试显示宽度的换行 and some ASCII words
+    % Plain ASCII comment
+    """
+)
+
+TRUTH_30_COLUMNS = dedent(
+    """\
+    % 这是一个很长的中文注释，用于
+    % 测试显示宽度的换行 and some
+    % ASCII words Plain ASCII
+    % comment
+    """
+)
+
+
+def test_reflow_display_width() -> None:
+    options = ReflowOptions(line_length=30, display_width=True)
+    reflowed_src = reflow_source(WIDE_SRC, options)
+    assert reflowed_src == TRUTH_30_COLUMNS
+    assert all(text_width(line) <= 30 for line in reflowed_src.splitlines())
+    assert reflow_source(reflowed_src, options) == reflowed_src
+
+    # Measured in characters, the wide text runs well past the line length
+    reflowed_src = reflow_source(WIDE_SRC, ReflowOptions(line_length=30))
+    assert max(map(text_width, reflowed_src.splitlines())) > 30
+
+
+def test_display_width_cli(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(WIDE_SRC, encoding="utf-8")
+
+    argv = ["--line-length=30", "--display-width=1", str(sample_file)]
+    assert matlab_reflow_comments.main(argv) == 1
+    assert sample_file.read_text(encoding="utf-8") == TRUTH_30_COLUMNS
+
+    assert matlab_reflow_comments.main(argv) == 0
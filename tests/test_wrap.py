@@ -0,0 +1,106 @@
+import random
+import textwrap
+
+import pytest
+
+from pre_commit_matlab.wrap import wrap, wrap_simple
+
+WORDS = ("foo", "barbaz", "x", "quux", "a-hyphenated-word", "longerwordthanmostlines", "100%")
+CHARS = "ab cdefg  h\t-ijKLM 　é\x1c\n.%"
+INDENTS = ("", "%", "% ", "    %", "    % ", "        ")
+
+
+def _textwrap_truth(text: str, width: int, initial: str, following: str) -> list[str]:
+    return textwrap.wrap(
+        text,
+        width=width,
+        initial_indent=initial,
+        subsequent_indent=following,
+        break_on_hyphens=False,
+    )
+
+
+WRAP_TEST_CASES = (
+    ("", 10, "%", "% "),
+    (" ", 10, "%", "% "),
+    (" This is a comment", 10, "%", "% "),
+    (" This is a comment", 8, "%", "% "),
+    (" supercalifragilistic", 10, "%", "% "),
+    ("trailing space ", 10, "", ""),
+    ("double  spaced  words", 10, "", ""),
+    ("\ttabbed\ttext with\ttabs", 12, "", ""),
+    ("the-boundary of a hyphen", 12, "%", "% "),
+    ("non breaking 　 spaces", 8, "", ""),
+)
+
+
+@pytest.mark.parametrize(("text", "width", "initial", "following"), WRAP_TEST_CASES)
+def test_wrap_matches_textwrap(text: str, width: int, initial: str, following: str) -> None:
+    assert wrap(text, width, initial, following) == _textwrap_truth(text, width, initial, following)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_wrap_differential(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(500):
+        if rng.random() < 0.5:
+            text = "".join(rng.choice(CHARS) for _ in range(rng.randint(0, 60)))
+        else:
+            lead = " " if rng.random() < 0.5 else ""
+            text = lead + " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 20)))
+
+        initial = rng.choice(INDENTS)
+        following = rng.choice(INDENTS)
+        # textwrap never terminates if an indent leaves no room on the line, so don't go there
+        width = rng.randint(max(len(initial), len(following)) + 1, 40)
+
+        truth = _textwrap_truth(text, width, initial, following)
+        assert wrap(text, width, initial, following) == truth, (text, width, initial, following)
+
+
+@pytest.mark.parametrize(("text", "width", "initial", "following"), WRAP_TEST_CASES)
+def test_wrap_simple(text: str, width: int, initial: str, following: str) -> None:
+    lines = wrap_simple(text, width, initial, following)
+    if lines is not None:
+        assert lines == wrap(text, width, initial, following)
+
+        texts = [lines[0][len(initial) :], *(line[len(following) :] for line in lines[1:])]
+        assert " ".join(texts).strip() == text.strip()
+
+
+def test_wrap_simple_fallback() -> None:
+    assert wrap_simple(" This is a comment", 10, "%", "% ") is not None
+    fallback_cases = ("double  spaced", " supercalifragilistic", "\ttabbed text", "non 　 breaking")
+    for text in fallback_cases:
+        assert wrap_simple(text, 10) is None
+
+
+def test_invalid_width() -> None:
+    with pytest.raises(ValueError):
+        wrap("foo", 0)
+
+
+DISPLAY_WIDTH_CASES = (
+    ("中文注释 中文注释 中文", 10, "% ", "% ", ["% 中文注释", "% 中文注释", "% 中文"]),
+    ("café́ crème brûlée", 12, "", "", ["café́ crème", "brûlée"]),
+    ("😀😀😀😀😀", 6, "", "", ["😀😀😀", "😀😀"]),
+    # A character wider than the line still gets a line of its own
+    ("中中", 3, "% ", "% ", ["% 中", "% 中"]),
+)
+
+
+@pytest.mark.parametrize(("text", "width", "initial", "following", "truth"), DISPLAY_WIDTH_CASES)
+def test_wrap_display_width(
+    text: str, width: int, initial: str, following: str, truth: list[str]
+) -> None:
+    assert wrap(text, width, initial, following, display_width=True) == truth
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_wrap_display_width_ascii(seed: int) -> None:
+    rng = random.Random(seed)
+    ascii_chars = [char for char in CHARS if char.isascii()]
+    for _ in range(500):
+        text = "".join(rng.choice(ascii_chars) for _ in range(rng.randint(0, 60)))
+        width = rng.randint(1, 40)
+        assert wrap(text, width, display_width=True) == wrap(text, width), (text, width)
@@ -0,0 +1,86 @@
+import typing as t
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+from pre_commit_matlab.matlab_reflow_comments import (
+    ReflowOptions,
+    configure_wrap_cache,
+    reflow_source,
+    wrap_cache_info,
+)
+from pre_commit_matlab.stats import FileStats
+
+LICENSE_HEADER = dedent(
+    """\
+    % Copyright (c) Example Corp. Permission is hereby granted, free of charge, to any
+    % person obtaining a copy of this software.
+    """
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_wrap_cache() -> t.Iterator[None]:
+    configure_wrap_cache()
+    yield
+    configure_wrap_cache()
+
+
+def test_repeated_runs_wrapped_once() -> None:
+    src = f"{LICENSE_HEADER}x = 1;\n{LICENSE_HEADER}"
+    stats = FileStats()
+    reflowed_src = reflow_source(src, ReflowOptions(line_length=40), stats=stats)
+
+    assert stats.runs_flushed == 2
+    assert (stats.wrap_hits, stats.wrap_misses) == (1, 1)
+    assert wrap_cache_info().currsize == 1
+
+    # Memoized result must match a fresh wrap
+    configure_wrap_cache(0)
+    assert reflow_source(src, ReflowOptions(line_length=40)) == reflowed_src
+
+
+@pytest.mark.parametrize(
+    "options",
+    (ReflowOptions(line_length=50), ReflowOptions(line_length=40, reflow_block_comments=False)),
+)
+def test_cache_keyed_on_options(options: ReflowOptions) -> None:
+    reflow_source(LICENSE_HEADER, ReflowOptions(line_length=40))
+    reflow_source(LICENSE_HEADER, options)
+    reflow_source(f"  {LICENSE_HEADER}", ReflowOptions(line_length=40))
+
+    truth_misses = 2 if options.line_length == 40 else 3
+    assert wrap_cache_info().misses == truth_misses
+
+
+def test_block_runs_keyed_separately() -> None:
+    inline_src = "% Some words that are wrapped\n"
+    block_src = "%{\n Some words that are wrapped\n%}\n"
+    options = ReflowOptions(line_length=20)
+    assert reflow_source(block_src, options) != reflow_source(inline_src, options)
+    assert wrap_cache_info().misses == 2
+
+
+def test_configure_wrap_cache() -> None:
+    configure_wrap_cache(1)
+    for _ in range(2):
+        reflow_source(f"{LICENSE_HEADER}x = 1;\n% Other\n", ReflowOptions())
+
+    info = wrap_cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (0, 4, 1)
+
+
+def test_wrap_cache_cli(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    for idx in range(3):
+        (tmp_path / f"file_{idx}.m").write_text(LICENSE_HEADER)
+
+    argv = ["--line-length=40", "--jobs=1", "--stats", str(tmp_path)]
+    assert matlab_reflow_comments.main(argv) == 1
+    assert "wrap cache: 2 hit(s), 1 miss(es)" in capsys.readouterr().err
+
+
+def test_wrap_cache_cli_invalid(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        matlab_reflow_comments.main(["--wrap-cache-size=-1", str(tmp_path)])
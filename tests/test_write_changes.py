@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from pre_commit_matlab import matlab_reflow_comments
+
+DIRTY_SRC = dedent(
+    """\
+    % XBMINI is a MATLAB class definition providing the user with a set of
+    % methods to parse and analyze raw data files output by GCDC XBmini
+    % datalogger
+    """
+)
+
+CLEAN_SRC = dedent(
+    """\
+    % XBMINI is a MATLAB class definition providing the user with a set of methods to parse and analyze
+    % raw data files output by GCDC XBmini datalogger
+    """
+)
+
+
+def test_clean_file_not_rewritten(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(CLEAN_SRC)
+    os.utime(sample_file, ns=(0, 0))
+
+    changed = matlab_reflow_comments.process_file(
+        sample_file,
+        100,
+        ignore_indented=True,
+        alternate_capital_handling=False,
+        reflow_block_comments=True,
+    )
+    assert not changed
+    assert sample_file.stat().st_mtime_ns == 0
+
+
+def test_dirty_file_replaced(tmp_path: Path) -> None:
+    sample_file = tmp_path / "sample_src.m"
+    sample_file.write_text(DIRTY_SRC)
+    sample_file.chmod(0o640)
+
+    changed = matlab_reflow_comments.process_file(
+        sample_file,
+        100,
+        ignore_indented=True,
+        alternate_capital_handling=False,
+        reflow_block_comments=True,
+    )
+    assert changed
+    assert sample_file.read_text() == CLEAN_SRC
+    assert sample_file.stat().st_mode & 0o777 == 0o640
+
+    # Temporary file should be renamed over the target, leaving nothing else behind
+    assert list(tmp_path.iterdir()) == [sample_file]
+
+
+@pytest.mark.parametrize("stream", (False, True))
+def test_symlink_written_through(tmp_path: Path, stream: bool) -> None:
+    target_file = tmp_path / "src" / "sample_src.m"
+    target_file.parent.mkdir()
+    target_file.write_text(DIRTY_SRC)
+    link_file = tmp_path / "link" / "link.m"
+    link_file.parent.mkdir()
+    link_file.symlink_to(target_file)
+
+    argv = ["--line-length=100", str(link_file)]
+    if stream:
+        argv.append("--stream")
+    assert matlab_reflow_comments.main(argv) == 1
+
+    assert link_file.is_symlink()
+    assert target_file.read_text() == CLEAN_SRC
+    assert list(link_file.parent.iterdir()) == [link_file]
+    assert list(target_file.parent.iterdir()) == [target_file]